@@ -0,0 +1,152 @@
+"""
+نظام الترجمة المكتبي - تصدير ملفات PDF بالجملة إلى ZIP
+Translation Office System - Parallel Batch PDF Export To ZIP
+"""
+
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, Tuple
+
+from config import JOB_WORKERS
+from pdf_styles import warm_up_pdf
+
+
+# دالة التقدم: (المنجز، الإجمالي)
+ProgressCallback = Callable[[int, int], None]
+
+# مولّد PDF واحد لكل عملية عاملة (إعداد الخطوط والأنماط مرة واحدة)
+_generator = None
+
+
+def render_final_pdf(project_data: Dict[str, Any]) -> bytes:
+    """عرض الوثيقة النهائية في الذاكرة (تُنفَّذ داخل عملية عاملة)"""
+    global _generator
+    if _generator is None:
+        from pdf_generator import PDFGenerator
+        _generator = PDFGenerator()
+
+    buffer = _generator.render_final_pdf(project_data)
+    if buffer is None:
+        raise RuntimeError("فشل في إنشاء PDF")
+    return buffer.getvalue()
+
+
+class _ZipSink:
+    """هدف كتابة غير قابل للتنقل؛ zipfile يكتب فيه ثم تُسحب البايتات للإرسال"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _unique_name(name: str, used: set) -> str:
+    """تجنب تكرار أسماء الملفات داخل الأرشيف"""
+    candidate = name
+    stem, ext = os.path.splitext(name)
+    counter = 2
+    while candidate in used:
+        candidate = f"{stem}_{counter}{ext}"
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+def iter_pdf_zip(items: Iterable[Tuple[str, Any]],
+                 render: Callable[[Any], bytes] = render_final_pdf,
+                 workers: int = JOB_WORKERS,
+                 results: Optional[Dict[str, Dict[str, Any]]] = None,
+                 progress: Optional[ProgressCallback] = None) -> Iterator[bytes]:
+    """مولّد بايتات أرشيف ZIP تُعرض ملفاته بالتوازي في مجمّع عمليات
+
+    items: أزواج (اسم الملف داخل الأرشيف، بيانات العرض). كل ملف يُضاف إلى
+    الأرشيف فور انتهاء عرضه وتُرسل بايتاته مباشرة، دون ملفات وسيطة على القرص.
+    عدد المهام المرسلة محدود بضعف عدد العمليات حتى لا تتراكم النتائج في
+    الذاكرة إذا كان المستهلك بطيئاً. الملفات الفاشلة تُذكر في errors.txt.
+    """
+    items = list(items)
+    total = len(items)
+    results = {} if results is None else results
+    used = set()
+    queue = iter(items)
+    pending = {}
+    errors = []
+    done = 0
+    sink = _ZipSink()
+
+    executor = ProcessPoolExecutor(max_workers=max(1, min(workers, total or 1)),
+                                   initializer=warm_up_pdf)
+    finished_cleanly = False
+
+    def submit_next() -> bool:
+        for name, payload in queue:
+            pending[executor.submit(render, payload)] = _unique_name(name, used)
+            return True
+        return False
+
+    try:
+        for _ in range(max(1, workers) * 2):
+            if not submit_next():
+                break
+
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = pending.pop(future)
+                    try:
+                        archive.writestr(name, future.result())
+                        results[name] = {'success': True, 'result': name, 'error': None}
+                    except Exception as e:
+                        print(f"فشل تصدير {name}: {e}")
+                        errors.append(f"{name}: {e}")
+                        results[name] = {'success': False, 'result': None, 'error': str(e)}
+                    done += 1
+                    if progress:
+                        progress(done, total)
+                    submit_next()
+
+                chunk = sink.take()
+                if chunk:
+                    yield chunk
+
+            if errors:
+                archive.writestr('errors.txt', "\n".join(errors))
+
+        yield sink.take()
+        finished_cleanly = True
+    finally:
+        # إذا أُغلق المولّد مبكراً (انقطاع العميل) تُلغى المهام التي لم تبدأ
+        executor.shutdown(wait=finished_cleanly, cancel_futures=not finished_cleanly)
+
+
+def export_pdf_zip(items: Iterable[Tuple[str, Any]], output_path: str,
+                   render: Callable[[Any], bytes] = render_final_pdf,
+                   workers: int = JOB_WORKERS,
+                   progress: Optional[ProgressCallback] = None) -> Dict[str, Dict[str, Any]]:
+    """كتابة أرشيف ZIP إلى مسار معين؛ النتيجة لكل ملف {'success', 'result', 'error'}"""
+    results: Dict[str, Dict[str, Any]] = {}
+    tmp_path = f"{output_path}.part"
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in iter_pdf_zip(items, render=render, workers=workers, results=results, progress=progress):
+                f.write(chunk)
+        os.replace(tmp_path, output_path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return results
@@ -0,0 +1,221 @@
+"""
+نظام الترجمة المكتبي - إنشاء مشاريع بالجملة من نموذج
+Translation Office System - Bulk Project Creation From CSV/JSONL
+"""
+
+import argparse
+import csv
+import json
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple, TextIO
+
+from template_compiler import template_compiler
+
+
+# أعمدة تخص المشروع نفسه؛ أي عمود آخر يُعامل كمتغير في النموذج
+PROJECT_FIELDS = (
+    'title', 'client_name', 'client_email', 'translator_id',
+    'translator_name', 'translator_license', 'translated_content'
+)
+
+BLANK_VALUE = '_________________'
+
+# (رقم السطر، بيانات الصف أو None، رسالة الخطأ أو None)
+Row = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+def detect_format(file_name: Optional[str], declared: Optional[str] = None) -> str:
+    """صيغة الملف من المعامل الصريح أو من الامتداد (csv افتراضياً)"""
+    if declared:
+        return declared.lower()
+    if file_name and Path(file_name).suffix.lower() in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    return 'csv'
+
+
+def iter_rows(stream: TextIO, file_format: str = 'csv') -> Iterator[Row]:
+    """قراءة الصفوف سطراً بسطر دون تحميل الملف كاملاً في الذاكرة"""
+    if file_format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"JSON غير صالح: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line_number, None, "كل سطر يجب أن يكون كائن JSON"
+                continue
+            yield line_number, row, None
+    elif file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # السطر 1 هو العناوين
+            line_number = reader.line_num
+            if None in row:
+                yield line_number, None, "عدد الأعمدة أكبر من العناوين"
+                continue
+            yield line_number, row, None
+    else:
+        raise ValueError(f"صيغة غير مدعومة: {file_format}")
+
+
+def split_row(row: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """فصل حقول المشروع عن متغيرات النموذج
+
+    في JSONL يمكن وضع المتغيرات في مفتاح "variables" أو كحقول مسطحة.
+    """
+    fields = {}
+    variables = {}
+    for key, value in row.items():
+        if key in PROJECT_FIELDS:
+            fields[key] = value
+        elif key == 'variables' and isinstance(value, dict):
+            variables.update(value)
+        else:
+            variables[key] = value
+    return fields, variables
+
+
+def build_project(template: Dict[str, Any], row: Dict[str, Any],
+                  translator_lookup: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None
+                  ) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+    """إنشاء سجل مشروع من صف واحد؛ يُرجع المشروع وتقرير المتغيرات"""
+    fields, variables = split_row(row)
+    if not (fields.get('title') or '').strip():
+        raise ValueError("عنوان المشروع مطلوب")
+
+    translator = None
+    if fields.get('translator_id') and translator_lookup is not None:
+        translator = translator_lookup(fields['translator_id'])
+        if translator is None:
+            raise ValueError(f"المترجم غير موجود: {fields['translator_id']}")
+    if translator is not None:
+        fields.setdefault('translator_name', translator.get('name', ''))
+        fields.setdefault('translator_license', translator.get('license_number', ''))
+
+    # حقول المشروع متاحة أيضاً كمتغيرات في النموذج (مثل {client_name})
+    compiled = template_compiler.get(template)
+    values = {name: (str(value) if value not in (None, '') else BLANK_VALUE)
+              for name, value in {**fields, **variables}.items()}
+    report = compiled.check(values)
+    report['unused'] = [name for name in report['unused'] if name in variables]
+
+    project = {
+        'id': f'proj-{str(uuid.uuid4())[:8]}',
+        'title': fields['title'],
+        'client_name': fields.get('client_name') or '',
+        'client_email': fields.get('client_email') or '',
+        'source_language': template['source_language'],
+        'target_language': template['target_language'],
+        'translator_id': fields.get('translator_id'),
+        'translator_name': fields.get('translator_name') or '',
+        'translator_license': fields.get('translator_license') or '',
+        'created_at': datetime.now().strftime('%Y-%m-%d'),
+        'status': 'new',
+        'translated_content': fields.get('translated_content') or '',
+        'original_content': compiled.render(values),
+        'template_id': template['id'],
+        'pdf_path': None,
+        'qr_code': None
+    }
+    return project, report
+
+
+def bulk_create(template: Dict[str, Any], rows: Iterable[Row], store,
+                submit_pdf: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                translator_lookup: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None
+                ) -> Dict[str, Any]:
+    """إنشاء مشروع لكل صف صالح ثم إرسال مهام PDF
+
+    المشاريع الصالحة تُضاف إلى المستودع دفعة واحدة (add_many تحت قفل
+    واحد)، ثم تُرسل مهام العرض إلى مجمّع العمليات فتُنفَّذ بالتوازي.
+    الصفوف الخاطئة لا توقف الدفعة وتُذكر في errors برقم سطرها.
+    """
+    projects = []
+    results = []
+    errors = []
+
+    for line_number, row, error in rows:
+        if error is None:
+            try:
+                project, report = build_project(template, row, translator_lookup)
+            except (ValueError, KeyError, TypeError) as e:
+                error = str(e)
+        if error is not None:
+            errors.append({'row': line_number, 'error': error})
+            continue
+
+        projects.append(project)
+        result = {'row': line_number, 'project_id': project['id'], 'job_id': None}
+        if report['missing']:
+            result['missing_variables'] = report['missing']
+        if report['unused']:
+            result['unused_variables'] = report['unused']
+        results.append(result)
+
+    store.add_many(projects)
+
+    if submit_pdf is not None:
+        for project, result in zip(projects, results):
+            try:
+                result['job_id'] = submit_pdf(project)['id']
+            except Exception as e:
+                print(f"تعذر إرسال مهمة PDF للمشروع {project['id']}: {e}")
+                result['pdf_error'] = str(e)
+
+    return {
+        'template_id': template['id'],
+        'created': len(projects),
+        'failed': len(errors),
+        'projects': results,
+        'errors': errors,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """رفع ملف CSV/JSONL إلى الخادم بالتدفق وطباعة تقرير الصفوف"""
+    parser = argparse.ArgumentParser(description="إنشاء مشاريع بالجملة من نموذج")
+    parser.add_argument('template_id', help="معرف النموذج")
+    parser.add_argument('file', help="ملف CSV أو JSONL (كل صف مشروع)")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="صيغة الملف (من الامتداد افتراضياً)")
+    parser.add_argument('--server', default='http://localhost:5000', help="عنوان simple_server")
+    parser.add_argument('--no-pdf', action='store_true', help="عدم إنشاء ملفات PDF")
+    args = parser.parse_args(argv)
+
+    import requests
+
+    params = {'format': detect_format(args.file, args.format)}
+    if args.no_pdf:
+        params['pdf'] = '0'
+
+    url = f"{args.server.rstrip('/')}/api/templates/{args.template_id}/bulk-create"
+    try:
+        with open(args.file, 'rb') as f:
+            # تمرير كائن الملف يجعل requests يرسله على دفعات
+            response = requests.post(url, params=params, data=f, timeout=600)
+    except (OSError, requests.RequestException) as e:
+        print(f"❌ فشل الإرسال: {e}")
+        return 1
+
+    try:
+        report = response.json()
+    except ValueError:
+        print(f"❌ استجابة غير متوقعة ({response.status_code}): {response.text[:200]}")
+        return 1
+    if response.status_code >= 400 and 'created' not in report:
+        print(f"❌ {report.get('error', response.status_code)}")
+        return 1
+
+    print(f"✅ تم إنشاء {report['created']} مشروع، فشل {report['failed']} صف")
+    for error in report['errors']:
+        print(f"   السطر {error['row']}: {error['error']}")
+    return 0 if not report['failed'] else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
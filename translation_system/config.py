@@ -11,9 +11,10 @@ BASE_DIR = Path(__file__).parent
 ASSETS_DIR = BASE_DIR / "assets"
 TEMP_DIR = BASE_DIR / "temp"
 LOGS_DIR = BASE_DIR / "logs"
+DATA_DIR = BASE_DIR / "data"
 
 # إنشاء المجلدات إذا لم تكن موجودة
-for directory in [ASSETS_DIR, TEMP_DIR, LOGS_DIR]:
+for directory in [ASSETS_DIR, TEMP_DIR, LOGS_DIR, DATA_DIR]:
     directory.mkdir(exist_ok=True)
 
 # إعدادات Google Drive
@@ -21,6 +22,44 @@ GOOGLE_DRIVE_CREDENTIALS_FILE = BASE_DIR / "credentials" / "credentials.json"
 GOOGLE_DRIVE_TOKEN_FILE = BASE_DIR / "credentials" / "token.json"
 GOOGLE_DRIVE_FOLDER_ID = os.getenv("GOOGLE_DRIVE_FOLDER_ID", "")
 
+# إعدادات قاعدة البيانات (SQLite بوضع WAL)
+DATABASE_FILE = Path(os.getenv("TRANSLATION_DB_FILE", str(DATA_DIR / "translation_office.db")))
+DATABASE_POOL_SIZE = 8
+DATABASE_BUSY_TIMEOUT = 30  # ثانية
+
+# إعدادات ذاكرة الترجمة (قاعدة منفصلة حتى لا تكبر قاعدة المشاريع)
+TM_DATABASE_FILE = Path(os.getenv("TM_DB_FILE", str(DATA_DIR / "translation_memory.db")))
+TM_NGRAM_SIZE = 2  # عدد الكلمات في كل مفتاح من فهرس البحث التقريبي
+TM_FUZZY_THRESHOLD = 0.7  # أدنى تشابه لاقتراح ترجمة (0..1)
+TM_FUZZY_LIMIT = 5  # عدد الاقتراحات لكل مقطع
+TM_FUZZY_CANDIDATES = 50  # أقصى عدد مرشحين يُحسب تشابههم لكل بحث
+TM_MAX_POSTINGS_SCAN = 5000  # أقصى عدد مدخلات فهرس تُقرأ لاختيار المرشحين
+
+# إعدادات طابور الرفع إلى Google Drive
+# DRIVE_API_ENDPOINT يسمح بتوجيه العميل إلى خادم Drive وهمي محلي للاختبار
+DRIVE_API_ENDPOINT = os.getenv("DRIVE_API_ENDPOINT", "")
+DRIVE_TOKEN_REFRESH_MARGIN = 300  # ثانية قبل انتهاء رمز الوصول
+DRIVE_FOLDER_CACHE_FILE = DATA_DIR / "drive_folders.json"
+DRIVE_SERVICE_POOL_SIZE = 8  # كائنات خدمة Drive المفتوحة لكل حساب
+DRIVE_SERVICE_POOL_TIMEOUT = 60  # ثانية انتظار كائن خدمة متاح
+DRIVE_LIST_PAGE_SIZE = 1000  # الحد الأقصى الذي يقبله Drive
+DRIVE_BATCH_SIZE = 100  # الحد الأقصى لطلبات الدفعة الواحدة في Drive
+DRIVE_BATCH_RETRIES = 3
+DRIVE_UPLOAD_PARALLELISM = int(os.getenv("DRIVE_UPLOAD_PARALLELISM", "4"))
+DRIVE_DOWNLOAD_CACHE_DIR = TEMP_DIR / "drive_cache"
+DRIVE_DOWNLOAD_CACHE_MAX_BYTES = 500 * 1024 * 1024  # بايت
+DRIVE_DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # بايت
+UPLOAD_QUEUE_DB = DATA_DIR / "upload_queue.db"
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # بايت (مضاعف 256KB كما يشترط Drive)
+UPLOAD_MAX_ATTEMPTS = 8
+UPLOAD_BACKOFF_BASE = 2  # ثانية
+UPLOAD_BACKOFF_MAX = 600  # ثانية
+
+# إعدادات قوالب صفحات الويب
+JINJA_CACHE_DIR = TEMP_DIR / "jinja_cache"  # الكود المترجم للقوالب
+STATIC_MAX_AGE = 365 * 24 * 3600  # ثانية (الملفات الثابتة تحمل بصمة محتواها)
+
 # إعدادات التطبيق
 APP_NAME = "نظام الترجمة المكتبي"
 APP_VERSION = "1.0.0"
@@ -32,10 +71,37 @@ PDF_MARGIN_TOP = 3.0  # سم
 PDF_MARGIN_BOTTOM = 2.0  # سم
 PDF_MARGIN_LEFT = 2.0  # سم
 PDF_MARGIN_RIGHT = 2.0  # سم
+ARABIC_FONT_FILE = Path(os.getenv("ARABIC_FONT_FILE", str(BASE_DIR / "fonts" / "arabic.ttf")))
+RTL_CACHE_SIZE = 8192  # عدد الأسطر المشكَّلة المحفوظة في الذاكرة
+PDF_LAYOUT_VERSION = 5  # يُرفع عند تغيير تخطيط PDF لإبطال النسخ المخزنة
+PDF_STREAM_LOOKAHEAD = 32  # عدد flowables المحمّلة مسبقاً أثناء البناء
+PDF_PARAGRAPH_CHUNK_CHARS = 3000  # حد طول الفقرة الواحدة قبل تقسيمها
+PDF_CACHE_DIR = TEMP_DIR / "pdf_cache"
+PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024  # بايت
 
 # إعدادات QR Code
 QR_CODE_SIZE = 100
 QR_CODE_BASE_URL = "https://your-domain.com/verify/"
+QR_CACHE_DIR = TEMP_DIR / "qr_cache"
+QR_CACHE_MEMORY_ITEMS = 512
+
+# إعدادات مهام العرض في الخلفية
+JOBS_DIR = TEMP_DIR / "jobs"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_WAIT_SECONDS = 20  # مدة انتظار /generate-pdf قبل الرد بـ 202
+JOB_MAX_WAIT_SECONDS = 60  # أقصى قيمة مقبولة لـ ?wait= في الطلب
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", str(24 * 3600)))  # مدة بقاء المهام المنتهية ونواتجها
+JOB_PRUNE_INTERVAL = 300  # ثانية بين عمليتي تنظيف
+
+# إعدادات استخراج النص من ملفات PDF
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACT_SHARD_PAGES = 8  # عدد الصفحات في كل مهمة استخراج
+PDF_PARALLEL_MIN_PAGES = 24  # الملفات الأصغر تُستخرج في نفس العملية
+EXTRACT_CACHE_DIR = TEMP_DIR / "extract_cache"
+EXTRACT_CACHE_MAX_BYTES = 100 * 1024 * 1024  # بايت
+EXTRACT_CACHE_VERSION = 2  # يُرفع عند تغيير طريقة الاستخراج لإبطال النتائج المخزنة
+DOCUMENT_PAGE_CACHE_SIZE = 32  # صفحات الوثيقة المفتوحة المحفوظة في الذاكرة (LRU)
+DOCX_PARAGRAPHS_PER_PAGE = 40  # فقرات "الصفحة" عند تصفح ملفات Word
 
 # إعدادات Flask Server
 FLASK_HOST = "localhost"
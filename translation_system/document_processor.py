@@ -5,7 +5,7 @@ Translation Office System - Document Processor
 
 import os
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterator
 from docx import Document
 from docx.shared import Inches, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -21,6 +21,14 @@ from config import (
     PDF_MARGIN_RIGHT,
     SUPPORTED_FILE_TYPES
 )
+from pdf_extract import iter_pdf_pages, PageText, ProgressCallback
+from extraction_cache import extraction_cache, record_content
+from lazy_document import LazyDocument, open_document
+from docx_reader import DocxReader, PARAGRAPH
+
+
+# تُستدعى لكل صفحة فور استخراجها: (رقم الصفحة من 0، النص)
+PageCallback = Callable[[int, str], None]
 
 
 class DocumentProcessor:
@@ -29,9 +37,13 @@ class DocumentProcessor:
     def __init__(self):
         self.supported_extensions = ['.docx', '.pdf']
     
-    def read_document(self, file_path: str) -> Tuple[bool, str, str]:
+    def read_document(self, file_path: str,
+                      on_page: Optional[PageCallback] = None,
+                      progress: Optional[ProgressCallback] = None) -> Tuple[bool, str, str]:
         """
         قراءة محتوى الوثيقة
+        on_page و progress لعرض صفحات PDF تدريجياً أثناء الاستخراج
+        الملف الذي قُرئ سابقاً (نفس المحتوى) يُعاد من ذاكرة الاستخراج
         Returns: (success, content, file_type)
         """
         try:
@@ -41,10 +53,16 @@ class DocumentProcessor:
             
             file_extension = file_path.suffix.lower()
             
+            if file_extension in self.supported_extensions:
+                record = extraction_cache.get(file_path)
+                if record is not None:
+                    self._replay_pages(record, on_page, progress)
+                    return True, record_content(record), record['file_type']
+            
             if file_extension == '.docx':
                 return self._read_docx(file_path)
             elif file_extension == '.pdf':
-                return self._read_pdf(file_path)
+                return self._read_pdf(file_path, on_page, progress)
             else:
                 return False, "", f"نوع الملف غير مدعوم: {file_extension}"
                 
@@ -52,39 +70,71 @@ class DocumentProcessor:
             return False, "", f"خطأ في قراءة الملف: {str(e)}"
     
     def _read_docx(self, file_path: Path) -> Tuple[bool, str, str]:
-        """قراءة ملف Word"""
+        """قراءة ملف Word (الفقرات وخلايا الجداول والترويسات والتذييلات)"""
         try:
-            doc = Document(file_path)
+            reader = DocxReader(file_path)
             content = []
-            
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    content.append(paragraph.text)
-            
-            return True, '\n'.join(content), 'docx'
+            segments = []
+            
+            for segment in reader:
+                content.append(segment.text)
+                segments.append([segment.kind, segment.part, segment.index,
+                                 segment.table, segment.row, segment.column])
+            
+            record = extraction_cache.put(file_path, {
+                'file_type': 'docx',
+                'paragraphs': content,
+                'segments': segments,
+                'paragraph_count': sum(1 for segment in segments if segment[0] == PARAGRAPH),
+                'page_count': max(1, reader.sections),
+            })
+            return True, record_content(record), 'docx'
             
         except Exception as e:
             return False, "", f"خطأ في قراءة ملف Word: {str(e)}"
     
-    def _read_pdf(self, file_path: Path) -> Tuple[bool, str, str]:
-        """قراءة ملف PDF"""
+    def _read_pdf(self, file_path: Path,
+                  on_page: Optional[PageCallback] = None,
+                  progress: Optional[ProgressCallback] = None) -> Tuple[bool, str, str]:
+        """قراءة ملف PDF (الملفات الكبيرة تُستخرج صفحاتها بالتوازي)"""
         try:
-            content = []
+            pages = []
             
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    if text and text.strip():
-                        content.append(text)
+            for page_number, text in self.iter_pdf_pages(file_path, progress):
+                if on_page:
+                    on_page(page_number, text)
+                pages.append(text)
             
-            return True, '\n'.join(content), 'pdf'
+            record = extraction_cache.put(file_path, {
+                'file_type': 'pdf',
+                'pages': pages,
+                'page_count': len(pages),
+            })
+            return True, record_content(record), 'pdf'
             
         except Exception as e:
             return False, "", f"خطأ في قراءة ملف PDF: {str(e)}"
     
+    @staticmethod
+    def _replay_pages(record: Dict[str, Any],
+                      on_page: Optional[PageCallback] = None,
+                      progress: Optional[ProgressCallback] = None):
+        """إرسال صفحات السجل المخزن إلى المستمعين كما لو استُخرجت الآن"""
+        pages = record.get('pages') or []
+        for page_number, text in enumerate(pages):
+            if on_page:
+                on_page(page_number, text)
+            if progress:
+                progress(page_number + 1, len(pages))
+    
+    def open_document(self, file_path: str) -> Optional[LazyDocument]:
+        """فتح الوثيقة للوصول إلى صفحاتها عند الطلب دون قراءة الملف كله"""
+        return open_document(file_path)
+    
+    def iter_pdf_pages(self, file_path, progress: Optional[ProgressCallback] = None) -> Iterator[PageText]:
+        """نص صفحات PDF بالترتيب فور استخراج كل مجموعة صفحات"""
+        return iter_pdf_pages(str(file_path), progress=progress)
+    
     def create_translation_template(self, original_content: str, output_path: str) -> bool:
         """إنشاء نموذج ترجمة من المحتوى الأصلي"""
         try:
@@ -235,16 +285,9 @@ class DocumentProcessor:
         qr_note.add_run("\nQR Code للتحقق من صحة الوثيقة")
     
     def extract_text_from_docx(self, file_path: str) -> str:
-        """استخراج النص من ملف Word"""
+        """استخراج النص من ملف Word (مع الجداول والترويسات والتذييلات)"""
         try:
-            doc = Document(file_path)
-            text_content = []
-            
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_content.append(paragraph.text)
-            
-            return '\n'.join(text_content)
+            return '\n'.join(segment.text for segment in DocxReader(file_path))
             
         except Exception as e:
             print(f"خطأ في استخراج النص من ملف Word: {e}")
@@ -291,11 +334,17 @@ class DocumentProcessor:
                 'modified': file_path.stat().st_mtime
             }
             
-            # إضافة معلومات خاصة بنوع الملف
-            if file_info['extension'] == '.docx':
-                doc = Document(file_path)
-                file_info['paragraphs'] = len(doc.paragraphs)
-                file_info['pages'] = len(doc.sections)
+            # إضافة معلومات خاصة بنوع الملف (من ذاكرة الاستخراج إن فُهرس الملف سابقاً، دون حساب بصمته)
+            record = extraction_cache.lookup(file_path) if file_info['extension'] in self.supported_extensions else None
+            if record is not None:
+                file_info['pages'] = record['page_count']
+                if 'paragraph_count' in record:
+                    file_info['paragraphs'] = record['paragraph_count']
+            elif file_info['extension'] == '.docx':
+                # نفس تعريف السجل المخزن: فقرات الجسم غير الفارغة
+                reader = DocxReader(file_path)
+                file_info['paragraphs'] = sum(1 for segment in reader if segment.kind == PARAGRAPH)
+                file_info['pages'] = max(1, reader.sections)
             elif file_info['extension'] == '.pdf':
                 with open(file_path, 'rb') as file:
                     pdf_reader = PyPDF2.PdfReader(file)
@@ -0,0 +1,202 @@
+"""
+نظام الترجمة المكتبي - قراءة ملفات Word مع الجداول والترويسات والتذييلات
+Translation Office System - Streaming Structure-Preserving DOCX Reader
+"""
+
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import Optional, List, Iterator, NamedTuple, Tuple, Union
+
+from lxml import etree
+
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+MC_NS = 'http://schemas.openxmlformats.org/markup-compatibility/2006'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+
+def _w(tag: str) -> str:
+    return f'{{{W_NS}}}{tag}'
+
+
+_P, _TBL, _TR, _TC = _w('p'), _w('tbl'), _w('tr'), _w('tc')
+_T, _TAB, _BR, _CR, _HYPHEN = _w('t'), _w('tab'), _w('br'), _w('cr'), _w('noBreakHyphen')
+_SECT_PR = _w('sectPr')
+_FALLBACK = f'{{{MC_NS}}}Fallback'
+
+# الوسوم التي يحتاجها المرور؛ بقية العناصر (التنسيق وغيره) لا تصل إلى Python
+_TAGS = (_P, _TBL, _TR, _TC, _T, _TAB, _BR, _CR, _HYPHEN, _SECT_PR, _FALLBACK)
+_CHARACTERS = {_TAB: '\t', _BR: '\n', _CR: '\n', _HYPHEN: '-'}
+
+PARAGRAPH = 'paragraph'
+TABLE_CELL = 'table_cell'
+HEADER = 'header'
+FOOTER = 'footer'
+
+
+class DocxSegment(NamedTuple):
+    """مقطع نصي من الوثيقة مع نوعه وموضعه"""
+    kind: str                      # paragraph, table_cell, header, footer
+    text: str
+    part: str                      # الجزء داخل الملف، مثل word/document.xml
+    index: int                     # ترتيب العنصر (فقرة أو جدول) في مستوى الجزء
+    table: Optional[int] = None    # رقم الجدول في الجزء (لخلايا الجداول)
+    row: Optional[int] = None
+    column: Optional[int] = None
+
+
+class _Cell:
+    __slots__ = ('table', 'row', 'column', 'depth', 'lines')
+
+    def __init__(self, table: int, row: int, column: int, depth: int):
+        self.table, self.row, self.column = table, row, column
+        self.depth = depth  # عدد الفقرات المفتوحة عند بداية الخلية
+        self.lines: List[str] = []
+
+
+class DocxReader:
+    """مرور واحد بالتدفق على XML ملف Word ينتج مقاطع مصنفة
+
+    بدلاً من بناء كائنات python-docx لكل فقرة وجزء نص، يُقرأ XML بـ
+    iterparse ولا تُستدعى Python إلا للعناصر المهمة (الفقرات والجداول وعناصر
+    النص)، وكل عنصر في مستوى الجسم يُحذف بعد قراءته فتبقى الذاكرة ثابتة.
+
+    الترتيب: الترويسات، ثم الجسم (فقرات وخلايا جداول بترتيب ظهورها)، ثم
+    التذييلات. كل خلية جدول مقطع واحد (فقراتها مفصولة بسطر جديد).
+    الفقرات الفارغة لا تُنتج مقاطع. بعد المرور يحتوي sections عدد أقسام
+    الوثيقة.
+    """
+
+    def __init__(self, file_path: Union[str, Path]):
+        self.file_path = Path(file_path)
+        self.sections = 0
+
+    def __iter__(self) -> Iterator[DocxSegment]:
+        self.sections = 0
+        with zipfile.ZipFile(self.file_path) as archive:
+            main_part = self._main_part(archive)
+            headers, footers = self._header_footer_parts(archive, main_part)
+            for part in headers:
+                yield from self._walk(archive, part, HEADER)
+            yield from self._walk(archive, main_part, PARAGRAPH, count_sections=True)
+            for part in footers:
+                yield from self._walk(archive, part, FOOTER)
+
+    # ---- أجزاء الحزمة ----
+
+    @staticmethod
+    def _relationships(archive: zipfile.ZipFile, rels_name: str) -> List[Tuple[str, str]]:
+        """(النوع، الهدف) لكل علاقة في ملف .rels"""
+        try:
+            root = etree.fromstring(archive.read(rels_name))
+        except KeyError:
+            return []
+        return [(rel.get('Type', ''), rel.get('Target', ''))
+                for rel in root.iter(f'{{{PKG_REL_NS}}}Relationship')
+                if rel.get('TargetMode') != 'External']
+
+    def _main_part(self, archive: zipfile.ZipFile) -> str:
+        for rel_type, target in self._relationships(archive, '_rels/.rels'):
+            if rel_type == OFFICE_DOCUMENT_REL:
+                return target.lstrip('/')
+        return 'word/document.xml'
+
+    def _header_footer_parts(self, archive: zipfile.ZipFile, main_part: str) -> Tuple[List[str], List[str]]:
+        folder, name = posixpath.split(main_part)
+        rels_name = posixpath.join(folder, '_rels', f'{name}.rels')
+        headers, footers = [], []
+        for rel_type, target in self._relationships(archive, rels_name):
+            kind = rel_type.rsplit('/', 1)[-1]
+            if kind not in (HEADER, FOOTER):
+                continue
+            part = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(folder, target))
+            parts = headers if kind == HEADER else footers
+            if part not in parts:
+                parts.append(part)
+        return sorted(headers), sorted(footers)
+
+    # ---- المرور على XML ----
+
+    def _walk(self, archive: zipfile.ZipFile, part: str, kind: str,
+              count_sections: bool = False) -> Iterator[DocxSegment]:
+        """مقاطع جزء واحد (الجسم أو ترويسة أو تذييل)"""
+        try:
+            stream = archive.open(part)
+        except KeyError:
+            return
+
+        paragraphs: List[List[str]] = []   # نص الفقرات المفتوحة (مربعات النص تفتح فقرة داخل فقرة)
+        cells: List[_Cell] = []
+        tables: List[List[int]] = []       # [رقم الجدول، الصف، العمود] للجداول المفتوحة
+        table_count = 0
+        fallback = 0                       # داخل mc:Fallback (نسخة بديلة مكررة من المحتوى)
+        block = -1
+
+        with stream:
+            for event, elem in etree.iterparse(stream, events=('start', 'end'), tag=_TAGS,
+                                               huge_tree=True, resolve_entities=False):
+                tag = elem.tag
+                if event == 'start':
+                    if tag == _FALLBACK:
+                        fallback += 1
+                    elif fallback:
+                        continue
+                    elif tag == _P:
+                        if not paragraphs and not tables:
+                            block += 1
+                        paragraphs.append([])
+                    elif tag == _TBL:
+                        if not paragraphs and not tables:
+                            block += 1
+                        tables.append([table_count, -1, -1])
+                        table_count += 1
+                    elif tag == _TR and tables:
+                        tables[-1][1] += 1
+                        tables[-1][2] = -1
+                    elif tag == _TC and tables:
+                        tables[-1][2] += 1
+                        table, row, column = tables[-1]
+                        cells.append(_Cell(table, row, column, len(paragraphs)))
+                    continue
+
+                # event == 'end'
+                if tag == _FALLBACK:
+                    fallback -= 1
+                elif fallback:
+                    pass
+                elif tag == _T:
+                    if paragraphs and elem.text:
+                        paragraphs[-1].append(elem.text)
+                elif tag in _CHARACTERS:
+                    if paragraphs:
+                        paragraphs[-1].append(_CHARACTERS[tag])
+                elif tag == _P and paragraphs:
+                    text = ''.join(paragraphs.pop())
+                    if cells and cells[-1].depth == len(paragraphs):
+                        cells[-1].lines.append(text)
+                    elif text.strip():
+                        yield DocxSegment(kind, text, part, block)
+                elif tag == _TC and cells:
+                    cell = cells.pop()
+                    text = '\n'.join(line for line in cell.lines if line.strip())
+                    if text:
+                        yield DocxSegment(TABLE_CELL if kind == PARAGRAPH else kind, text, part, block,
+                                          cell.table, cell.row, cell.column)
+                elif tag == _TBL and tables:
+                    tables.pop()
+                elif tag == _SECT_PR and count_sections:
+                    self.sections += 1
+
+                # تحرير العناصر المقروءة في مستوى الجسم
+                if tag in (_P, _TBL) and not paragraphs and not tables:
+                    elem.clear(keep_tail=False)
+                    parent = elem.getparent()
+                    while parent is not None and elem.getprevious() is not None:
+                        del parent[0]
+
+
+def iter_docx_segments(file_path: Union[str, Path]) -> Iterator[DocxSegment]:
+    """مقاطع ملف Word بالترتيب (ترويسات، جسم وجداول، تذييلات)"""
+    return iter(DocxReader(file_path))
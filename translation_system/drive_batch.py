@@ -0,0 +1,196 @@
+"""
+نظام الترجمة المكتبي - عمليات Google Drive المجمّعة
+Translation Office System - Batched Google Drive Operations
+"""
+
+import mimetypes
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Iterable, Tuple
+
+from config import DRIVE_BATCH_SIZE, DRIVE_BATCH_RETRIES, DRIVE_UPLOAD_PARALLELISM
+from upload_queue import resumable_upload
+
+
+# دالة التقدم: (المنجز، الإجمالي)
+ProgressCallback = Callable[[int, int], None]
+
+# أخطاء مؤقتة تستحق إعادة المحاولة داخل الدفعة
+_TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _is_transient(error: Exception) -> bool:
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status == 403:
+        # Drive يعيد 403 لتجاوز حد المعدل أيضاً، وليس فقط لرفض الصلاحية
+        return b'rateLimitExceeded' in (getattr(error, 'content', b'') or b'')
+    return status in _TRANSIENT_STATUSES
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_batch(service, requests: Iterable[Tuple[str, Any]],
+              progress: Optional[ProgressCallback] = None,
+              batch_size: int = DRIVE_BATCH_SIZE,
+              retries: int = DRIVE_BATCH_RETRIES) -> Dict[str, Dict[str, Any]]:
+    """تنفيذ طلبات Drive في دفعات (حتى 100 طلب لكل طلب HTTP)
+
+    requests: أزواج (مفتاح، طلب) حيث الطلب كائن HttpRequest غير منفَّذ.
+    النتيجة لكل مفتاح: {'success', 'result', 'error'}. العناصر التي تفشل بخطأ
+    مؤقت (تجاوز الحد أو خطأ خادم) يُعاد إرسالها في دفعة لاحقة.
+    """
+    # معرفات الطلبات داخل الدفعة يجب أن تكون فريدة
+    pending = list(dict(requests).items())
+    total = len(pending)
+    results: Dict[str, Dict[str, Any]] = {}
+    attempt = 0
+
+    while pending:
+        retry: List[Tuple[str, Any]] = []
+        for chunk in _chunks(pending, batch_size):
+            by_key = dict(chunk)
+
+            def callback(request_id, response, exception, by_key=by_key):
+                if exception is not None and attempt < retries and _is_transient(exception):
+                    retry.append((request_id, by_key[request_id]))
+                    return
+                results[request_id] = {
+                    'success': exception is None,
+                    'result': response,
+                    'error': str(exception) if exception is not None else None,
+                }
+
+            batch = service.new_batch_http_request(callback=callback)
+            for key, request in chunk:
+                batch.add(request, request_id=key)
+            try:
+                batch.execute()
+            except Exception as e:
+                # فشل الدفعة كلها (مثلاً انقطاع الشبكة)
+                for key, _ in chunk:
+                    if key not in results:
+                        results[key] = {'success': False, 'result': None, 'error': str(e)}
+                print(f"فشل تنفيذ دفعة Drive: {e}")
+
+            if progress:
+                progress(len(results), total)
+
+        pending = retry
+        if pending:
+            attempt += 1
+            # تراجع أُسّي مع تشويش قبل إعادة العناصر المؤقتة
+            time.sleep((2 ** attempt) * random.uniform(0.5, 1.0))
+
+    return results
+
+
+def batch_delete(service, file_ids: Iterable[str],
+                 progress: Optional[ProgressCallback] = None) -> Dict[str, Dict[str, Any]]:
+    """حذف عدة ملفات في دفعات"""
+    return run_batch(service, [(file_id, service.files().delete(fileId=file_id)) for file_id in file_ids],
+                     progress=progress)
+
+
+def batch_get_info(service, file_ids: Iterable[str],
+                   fields: str = 'id, name, size, mimeType, createdTime, modifiedTime, webViewLink',
+                   progress: Optional[ProgressCallback] = None) -> Dict[str, Dict[str, Any]]:
+    """معلومات عدة ملفات في دفعات"""
+    return run_batch(
+        service,
+        [(file_id, service.files().get(fileId=file_id, fields=fields)) for file_id in file_ids],
+        progress=progress
+    )
+
+
+def batch_share(service, file_ids: Iterable[str], role: str = 'reader', share_type: str = 'anyone',
+                progress: Optional[ProgressCallback] = None) -> Dict[str, Dict[str, Any]]:
+    """منح إذن مشاركة لعدة ملفات ثم إرجاع روابطها
+
+    result لكل ملف ناجح هو webViewLink.
+    """
+    file_ids = list(file_ids)
+    total = len(file_ids) * 2
+
+    def permissions_progress(done, _):
+        if progress:
+            progress(done, total)
+
+    def links_progress(done, _):
+        if progress:
+            progress(len(file_ids) + done, total)
+
+    permission = {'type': share_type, 'role': role}
+    shared = run_batch(
+        service,
+        [(file_id, service.permissions().create(fileId=file_id, body=permission, fields='id'))
+         for file_id in file_ids],
+        progress=permissions_progress
+    )
+    shared_ids = [file_id for file_id, item in shared.items() if item['success']]
+    links = batch_get_info(service, shared_ids, fields='id, webViewLink', progress=links_progress)
+
+    results = {}
+    for file_id in file_ids:
+        item = shared[file_id]
+        if item['success']:
+            info = links.get(file_id, {})
+            item = {
+                'success': info.get('success', False),
+                'result': (info.get('result') or {}).get('webViewLink'),
+                'error': info.get('error'),
+            }
+        results[file_id] = item
+    return results
+
+
+def upload_many(service_factory: Callable[[], Any], files: Iterable[Tuple[str, Dict[str, Any]]],
+                parallelism: int = DRIVE_UPLOAD_PARALLELISM,
+                progress: Optional[ProgressCallback] = None) -> Dict[str, Dict[str, Any]]:
+    """رفع عدة ملفات بالتوازي عبر جلسات قابلة للاستئناف
+
+    files: أزواج (مسار الملف، بيانات Drive الوصفية).
+    service_factory تُرجع مدير سياق يعير كل خيط عامل كائن خدمة خاصاً به
+    (كائنات httplib2 غير آمنة بين الخيوط) ويعيده بعد الرفع. التقدم يُحسب بالبايتات المرفوعة من إجمالي حجم الملفات.
+    """
+    files = [(str(path), metadata) for path, metadata in files]
+    sizes = {path: Path(path).stat().st_size if Path(path).exists() else 0 for path, _ in files}
+    total_bytes = sum(sizes.values())
+    sent: Dict[str, int] = {path: 0 for path, _ in files}
+    lock = threading.Lock()
+
+    def report(path: str, uploaded: int):
+        with lock:
+            sent[path] = uploaded
+            done = sum(sent.values())
+        if progress:
+            progress(done, total_bytes)
+
+    def upload(path: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        if not Path(path).exists():
+            raise FileNotFoundError(f"الملف غير موجود: {path}")
+        mime_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        with service_factory() as service:
+            result = resumable_upload(
+                service, path, metadata, mime_type=mime_type,
+                on_progress=lambda uploaded, _: report(path, uploaded)
+            )
+        report(path, sizes[path])
+        return result
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix='drive-upload') as executor:
+        futures = {executor.submit(upload, path, metadata): path for path, metadata in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = {'success': True, 'result': future.result(), 'error': None}
+            except Exception as e:
+                print(f"فشل رفع {path}: {e}")
+                results[path] = {'success': False, 'result': None, 'error': str(e)}
+    return results
@@ -0,0 +1,417 @@
+"""
+نظام الترجمة المكتبي - عميل Google Drive المشترك
+Translation Office System - Shared Google Drive Client Manager
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, Iterator
+
+from config import (
+    DRIVE_API_ENDPOINT,
+    DRIVE_TOKEN_REFRESH_MARGIN,
+    DRIVE_FOLDER_CACHE_FILE,
+    DRIVE_LIST_PAGE_SIZE,
+    DRIVE_SERVICE_POOL_SIZE,
+    DRIVE_SERVICE_POOL_TIMEOUT
+)
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+def is_not_found(error: Exception) -> bool:
+    """هل الخطأ رد 404 من Drive (مثلاً مجلد أب محذوف)"""
+    resp = getattr(error, 'resp', None)
+    return resp is not None and getattr(resp, 'status', None) == 404
+
+
+def _utcnow() -> datetime:
+    """الوقت الحالي بتوقيت UTC دون منطقة زمنية (كما في expiry لدى google-auth)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+_discovery_lock = threading.Lock()
+_discovery_doc: Optional[Dict[str, Any]] = None
+
+
+def _drive_discovery_document() -> Dict[str, Any]:
+    """وثيقة اكتشاف Drive v3 المضمّنة في المكتبة (دون أي طلب شبكة)"""
+    global _discovery_doc
+    with _discovery_lock:
+        if _discovery_doc is None:
+            from googleapiclient.discovery_cache import get_static_doc
+            content = get_static_doc('drive', 'v3')
+            if content is None:
+                raise RuntimeError("وثيقة اكتشاف Drive v3 غير موجودة في googleapiclient")
+            _discovery_doc = json.loads(content)
+        return _discovery_doc
+
+
+class DriveClient:
+    """عميل Drive واحد لكل مجموعة بيانات اعتماد
+
+    - بيانات الاعتماد تُحمَّل مرة واحدة وتُجدَّد قبل انتهائها بهامش
+      DRIVE_TOKEN_REFRESH_MARGIN (من خيط خلفي) فلا يدفع أي طلب كلفة التجديد.
+    - httplib2.Http غير آمن بين الخيوط، لذلك كائنات الخدمة في مجمّع محدود
+      (مثل storage.ConnectionPool): كل كائن يُستعار لخيط واحد ثم يُعاد ومعه
+      اتصالاته المفتوحة، وكلها تتشارك بيانات الاعتماد نفسها.
+    """
+
+    def __init__(self, name: str, credentials_loader: Callable[[], Any],
+                 api_endpoint: str = DRIVE_API_ENDPOINT,
+                 refresh_margin: int = DRIVE_TOKEN_REFRESH_MARGIN,
+                 pool_size: int = DRIVE_SERVICE_POOL_SIZE,
+                 pool_timeout: float = DRIVE_SERVICE_POOL_TIMEOUT):
+        self.name = name
+        self.credentials_loader = credentials_loader
+        self.api_endpoint = api_endpoint
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self._credentials = None
+        self._lock = threading.RLock()
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._pool_lock = threading.Lock()
+        self._refresh_timer: Optional[threading.Timer] = None
+        self.stats = {
+            'services_built': 0,
+            'token_refreshes': 0,
+            'calls': 0,
+            'errors': 0,
+            'last_latency_ms': None,
+            'avg_latency_ms': None,
+            'last_error': None,
+            'last_success_at': None,
+        }
+
+    # ---- بيانات الاعتماد ----
+
+    def _needs_refresh(self, credentials) -> bool:
+        if not getattr(credentials, 'token', None):
+            return True
+        expiry = getattr(credentials, 'expiry', None)
+        if expiry is None:
+            return False
+        return expiry - _utcnow() <= self.refresh_margin
+
+    def _refresh(self, credentials):
+        from google.auth.transport.requests import Request
+        credentials.refresh(Request())
+        self.stats['token_refreshes'] += 1
+        self._schedule_refresh(credentials)
+
+    def _schedule_refresh(self, credentials):
+        """جدولة التجديد التالي قبل انتهاء الرمز"""
+        expiry = getattr(credentials, 'expiry', None)
+        if expiry is None:
+            return
+        delay = (expiry - _utcnow() - self.refresh_margin).total_seconds()
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        self._refresh_timer = threading.Timer(max(delay, 1.0), self._background_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                if self._credentials is not None:
+                    self._refresh(self._credentials)
+        except Exception as e:
+            self.stats['last_error'] = str(e)
+            print(f"تعذر تجديد رمز Google Drive ({self.name}): {e}")
+
+    def credentials(self):
+        """بيانات الاعتماد المخزنة (تُحمَّل وتُجدَّد عند الحاجة)"""
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = self.credentials_loader()
+            if self._needs_refresh(self._credentials):
+                self._refresh(self._credentials)
+            return self._credentials
+
+    # ---- مجمّع كائنات الخدمة ----
+
+    def _build_service(self):
+        """بناء كائن خدمة جديد باتصال HTTP خاص به"""
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.http import build_http
+        from google_auth_httplib2 import AuthorizedHttp
+
+        http = AuthorizedHttp(self.credentials(), http=build_http())
+        client_options = {'api_endpoint': self.api_endpoint} if self.api_endpoint else None
+        document = _drive_discovery_document()
+        # build_from_document يعدّل الوثيقة المشتركة أثناء البناء
+        with _discovery_lock:
+            service = build_from_document(document, http=http, client_options=client_options)
+        with self._lock:
+            self.stats['services_built'] += 1
+        return service
+
+    def acquire(self):
+        """استعارة كائن خدمة من المجمّع (يُبنى عند الحاجة حتى pool_size)"""
+        try:
+            service = self._idle.get_nowait()
+        except queue.Empty:
+            service = None
+
+        if service is None:
+            with self._pool_lock:
+                build = self._created < self.pool_size
+                if build:
+                    self._created += 1
+            if build:
+                try:
+                    return self._build_service()
+                except Exception:
+                    with self._pool_lock:
+                        self._created -= 1
+                    raise
+            service = self._idle.get(timeout=self.pool_timeout)
+
+        # تجديد استباقي إن لم يعمل المؤقت (مثلاً بعد سبات الجهاز)
+        try:
+            self.credentials()
+        except Exception:
+            self.release(service)
+            raise
+        return service
+
+    def release(self, service):
+        """إعادة كائن الخدمة إلى المجمّع"""
+        self._idle.put_nowait(service)
+
+    @contextmanager
+    def connection(self):
+        """مدير سياق لاستعارة كائن خدمة"""
+        service = self.acquire()
+        try:
+            yield service
+        finally:
+            self.release(service)
+
+    def execute(self, request):
+        """تنفيذ طلب Drive مع قياس زمن الاستجابة"""
+        started = time.perf_counter()
+        try:
+            result = request.execute()
+        except Exception as e:
+            self.stats['errors'] += 1
+            self.stats['last_error'] = str(e)
+            raise
+        self._record_latency((time.perf_counter() - started) * 1000)
+        return result
+
+    def _record_latency(self, latency_ms: float):
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['last_latency_ms'] = round(latency_ms, 1)
+            previous = self.stats['avg_latency_ms']
+            # متوسط متحرك أُسّي
+            self.stats['avg_latency_ms'] = round(
+                latency_ms if previous is None else previous * 0.8 + latency_ms * 0.2, 1
+            )
+            self.stats['last_success_at'] = datetime.now().isoformat()
+
+    def ping(self) -> bool:
+        """استدعاء خفيف لقياس الاتصال وزمن الاستجابة"""
+        try:
+            with self.connection() as service:
+                self.execute(service.about().get(fields='user(emailAddress)'))
+            return True
+        except Exception as e:
+            print(f"فشل الاتصال بـ Google Drive ({self.name}): {e}")
+            return False
+
+    def health(self) -> Dict[str, Any]:
+        """حالة العميل: المصادقة وصلاحية الرمز وزمن الاستجابة"""
+        with self._lock:
+            credentials = self._credentials
+            expiry = getattr(credentials, 'expiry', None)
+            return {
+                'name': self.name,
+                'authenticated': credentials is not None and bool(getattr(credentials, 'token', None)),
+                'token_expires_in': (
+                    int((expiry - _utcnow()).total_seconds()) if expiry else None
+                ),
+                'api_endpoint': self.api_endpoint or None,
+                'pool_size': self.pool_size,
+                'services_idle': self._idle.qsize(),
+                **self.stats,
+            }
+
+    def close(self):
+        """إيقاف مؤقت التجديد"""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+
+
+class DriveClientManager:
+    """سجل عملاء Drive على مستوى العملية (عميل واحد لكل مفتاح اعتماد)"""
+
+    def __init__(self):
+        self._clients: Dict[str, DriveClient] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[DriveClient]:
+        """عميل مسجّل مسبقاً"""
+        return self._clients.get(name)
+
+    def get_or_create(self, name: str, credentials_loader: Callable[[], Any]) -> DriveClient:
+        """الحصول على العميل أو إنشاؤه عند أول طلب"""
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                client = DriveClient(name, credentials_loader)
+                self._clients[name] = client
+            return client
+
+    def service_account(self, key_file: str, scopes) -> Optional[DriveClient]:
+        """عميل بحساب خدمة (Service Account)؛ None إذا لم يوجد ملف المفتاح"""
+        key_path = Path(key_file).resolve()
+        name = f"service_account:{key_path}"
+        client = self.get(name)
+        if client is not None:
+            return client
+        if not key_path.exists():
+            print(f"ملف Service Account غير موجود: {key_file}")
+            return None
+
+        def load():
+            from google.oauth2 import service_account
+            return service_account.Credentials.from_service_account_file(str(key_path), scopes=scopes)
+
+        return self.get_or_create(name, load)
+
+    def health(self) -> Dict[str, Any]:
+        """حالة جميع العملاء"""
+        with self._lock:
+            clients = list(self._clients.values())
+        return {client.name: client.health() for client in clients}
+
+
+def iter_drive_files(service, query: Optional[str] = None,
+                     fields: str = 'id, name, size, mimeType, createdTime, modifiedTime',
+                     page_size: int = DRIVE_LIST_PAGE_SIZE, order_by: Optional[str] = None,
+                     limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """مولّد لملفات Drive يتبع nextPageToken عند الحاجة فقط
+
+    الصفحة التالية لا تُطلب إلا بعد استهلاك الصفحة الحالية، لذلك التوقف
+    المبكر (أو limit) لا يكلّف طلبات إضافية.
+    """
+    params = {
+        'fields': f"nextPageToken, files({fields})",
+        'pageSize': min(page_size, limit) if limit else page_size,
+    }
+    if query:
+        params['q'] = query
+    if order_by:
+        params['orderBy'] = order_by
+
+    yielded = 0
+    page_token = None
+    while True:
+        if page_token:
+            params['pageToken'] = page_token
+        response = service.files().list(**params).execute()
+        for item in response.get('files', []):
+            yield item
+            yielded += 1
+            if limit and yielded >= limit:
+                return
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+
+class DriveFolderCache:
+    """ذاكرة دائمة لمعرفات المجلدات (اسم المجلد -> معرف Drive)
+
+    تُحفظ في ملف JSON حتى لا يُجري بدء تشغيل الخوادم بحثاً في Drive عن
+    مجلدات معروفة. المفتاح يتضمن الحساب والمجلد الأب.
+    """
+
+    def __init__(self, cache_file: Path = DRIVE_FOLDER_CACHE_FILE):
+        self.cache_file = Path(cache_file)
+        self._lock = threading.Lock()
+        self._folders: Dict[str, str] = {}
+        self._load()
+
+    @staticmethod
+    def _key(account: str, folder_name: str, parent_id: Optional[str] = None) -> str:
+        return f"{account}|{parent_id or 'root'}|{folder_name}"
+
+    def _load(self):
+        try:
+            self._folders = json.loads(self.cache_file.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            self._folders = {}
+        except (OSError, ValueError) as e:
+            print(f"تعذر قراءة ذاكرة مجلدات Drive: {e}")
+            self._folders = {}
+
+    def _save(self):
+        """حفظ ذري لملف الذاكرة"""
+        tmp_path = self.cache_file.with_suffix('.json.tmp')
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(self._folders, ensure_ascii=False, indent=2), encoding='utf-8')
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"تعذر حفظ ذاكرة مجلدات Drive: {e}")
+
+    def get(self, account: str, folder_name: str, parent_id: Optional[str] = None) -> Optional[str]:
+        """معرف المجلد المخزن أو None"""
+        with self._lock:
+            return self._folders.get(self._key(account, folder_name, parent_id))
+
+    def set(self, account: str, folder_name: str, folder_id: str, parent_id: Optional[str] = None):
+        """تخزين معرف المجلد"""
+        with self._lock:
+            self._folders[self._key(account, folder_name, parent_id)] = folder_id
+            self._save()
+
+    def forget(self, account: str, folder_name: str, parent_id: Optional[str] = None):
+        """إزالة معرف (مثلاً عند حذف المجلد من Drive)"""
+        with self._lock:
+            if self._folders.pop(self._key(account, folder_name, parent_id), None) is not None:
+                self._save()
+
+
+def find_or_create_folder(service, folder_name: str, parent_id: Optional[str] = None,
+                          account: str = 'default') -> Optional[str]:
+    """معرف مجلد Drive بالاسم: من الذاكرة الدائمة أولاً ثم بحث ثم إنشاء"""
+    folder_id = drive_folders.get(account, folder_name, parent_id)
+    if folder_id:
+        return folder_id
+
+    escaped_name = folder_name.replace("\\", "\\\\").replace("'", "\\'")
+    query = f"name='{escaped_name}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
+    if parent_id:
+        query += f" and '{parent_id}' in parents"
+    existing = next(iter_drive_files(service, query, fields='id, name', limit=1), None)
+
+    if existing:
+        folder_id = existing['id']
+    else:
+        metadata = {'name': folder_name, 'mimeType': FOLDER_MIME_TYPE}
+        if parent_id:
+            metadata['parents'] = [parent_id]
+        folder_id = service.files().create(body=metadata, fields='id').execute().get('id')
+
+    if folder_id:
+        drive_folders.set(account, folder_name, folder_id, parent_id)
+    return folder_id
+
+
+# مدير مشترك على مستوى العملية
+drive_clients = DriveClientManager()
+drive_folders = DriveFolderCache()
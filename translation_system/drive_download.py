@@ -0,0 +1,237 @@
+"""
+نظام الترجمة المكتبي - تحميل ملفات Google Drive بالتدفق
+Translation Office System - Streaming Google Drive Downloads
+"""
+
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator
+
+from config import (
+    DRIVE_DOWNLOAD_CACHE_DIR,
+    DRIVE_DOWNLOAD_CACHE_MAX_BYTES,
+    DRIVE_DOWNLOAD_CHUNK_SIZE
+)
+
+
+_SAFE_ID = re.compile(r'[^A-Za-z0-9_-]')
+
+DOWNLOAD_FIELDS = 'id, name, size, mimeType, md5Checksum'
+
+
+class ChecksumMismatchError(IOError):
+    """محتوى الملف المحمّل لا يطابق md5Checksum في Drive"""
+
+
+class DriveDownloadCache:
+    """ذاكرة قراءة على القرص لملفات Drive محدودة الحجم
+
+    الملف المكتمل يُخزن باسم يتضمن معرفه وبصمة md5، فأي تعديل في Drive
+    يغيّر البصمة ويتجاوز النسخة القديمة. التحميل الجزئي يُحفظ كملف .part
+    ويُستأنف من آخر بايت بطلب Range. عند تجاوز الحجم الأقصى تُحذف الملفات
+    الأقدم استخداماً.
+    """
+
+    def __init__(self, cache_dir: Path = DRIVE_DOWNLOAD_CACHE_DIR,
+                 max_bytes: int = DRIVE_DOWNLOAD_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._downloading: Dict[str, threading.Lock] = {}
+
+    def _name(self, file_id: str, md5: Optional[str]) -> str:
+        return f"{_SAFE_ID.sub('_', file_id)}.{md5 or 'nomd5'}"
+
+    def path(self, file_id: str, md5: Optional[str]) -> Path:
+        """مسار النسخة المكتملة"""
+        return self.cache_dir / self._name(file_id, md5)
+
+    def partial_path(self, file_id: str, md5: Optional[str]) -> Path:
+        """مسار التحميل الجزئي القابل للاستئناف"""
+        return self.cache_dir / f"{self._name(file_id, md5)}.part"
+
+    def lookup(self, file_id: str, md5: Optional[str]) -> Optional[Path]:
+        """النسخة المكتملة إن وُجدت (مع تحديث وقت الاستخدام)"""
+        path = self.path(file_id, md5)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def download_lock(self, file_id: str) -> threading.Lock:
+        """قفل لكل ملف حتى لا يكتب تحميلان في ملف .part نفسه"""
+        with self._lock:
+            return self._downloading.setdefault(file_id, threading.Lock())
+
+    def commit(self, file_id: str, md5: Optional[str]) -> Path:
+        """نقل التحميل الجزئي المكتمل إلى الذاكرة ثم تطبيق حد الحجم"""
+        path = self.path(file_id, md5)
+        os.replace(self.partial_path(file_id, md5), path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[Path] = None):
+        """حذف الملفات الأقدم استخداماً حتى يعود الحجم تحت الحد"""
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.iterdir():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            # ملفات التحميلات الجارية (.part قيد الكتابة والنسخة التي ستحل محلها) لا تُحذف
+            busy = {_SAFE_ID.sub('_', file_id) for file_id, lock in self._downloading.items() if lock.locked()}
+
+            total = sum(size for _, size, _ in entries)
+            # الملفات المكتملة أولاً، ثم ملفات .part المتروكة (تُفقد معها إمكانية الاستئناف)
+            entries.sort(key=lambda entry: (entry[2].suffix == '.part', entry[0]))
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep or path.name.split('.', 1)[0] in busy:
+                    continue
+                try:
+                    path.unlink()
+                    total -= size
+                except OSError:
+                    pass
+
+
+def _read_file(path: Path, chunk_size: int, start: int = 0) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _download_ranges(request, start: int, size: Optional[int], chunk_size: int,
+                     num_retries: int = 3) -> Iterator[bytes]:
+    """تحميل محتوى طلب get_media بطلبات Range صريحة تبدأ من البايت start
+
+    أخطاء الشبكة وردود 429/5xx تُعاد حتى num_retries مرة مع تراجع أُسّي.
+    """
+    from googleapiclient.errors import HttpError
+
+    offset = start
+    while size is None or offset < size:
+        headers = dict(request.headers)
+        headers['range'] = f"bytes={offset}-{offset + chunk_size - 1}"
+        for attempt in range(num_retries + 1):
+            if attempt:
+                time.sleep(random.random() * 2 ** attempt)
+            try:
+                resp, content = request.http.request(request.uri, method='GET', headers=headers)
+            except OSError:
+                if attempt == num_retries:
+                    raise
+                continue
+            if resp.status != 429 and resp.status < 500:
+                break
+        else:
+            raise HttpError(resp, content, uri=request.uri)
+
+        if resp.status == 416:
+            # لا بايتات بعد offset: الملف اكتمل
+            return
+        if resp.status not in (200, 206):
+            raise HttpError(resp, content, uri=request.uri)
+
+        if resp.status == 200:
+            # الخادم تجاهل Range وأرسل الملف كاملاً
+            if content[offset:]:
+                yield content[offset:]
+            return
+        total = resp.get('content-range', '').rsplit('/', 1)[-1]
+        if total.isdigit():
+            size = int(total)
+        if not content:
+            return
+        offset += len(content)
+        yield content
+
+
+def get_download_info(service, file_id: str) -> Dict[str, Any]:
+    """بيانات الملف اللازمة للتحميل (الحجم وبصمة md5)"""
+    return service.files().get(fileId=file_id, fields=DOWNLOAD_FIELDS).execute()
+
+
+def stream_drive_file(service, file_id: str, info: Optional[Dict[str, Any]] = None,
+                      cache: Optional[DriveDownloadCache] = None,
+                      chunk_size: int = DRIVE_DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    """مولّد يُرجع محتوى ملف Drive على دفعات
+
+    - إذا كانت النسخة في الذاكرة المحلية تُقرأ من القرص دون أي طلب إلى Drive.
+    - غير ذلك يُحمَّل الملف بطلبات Range متتالية؛ كل دفعة تُرسل للمستهلك فور
+      وصولها وتُكتب في ملف .part، فإذا انقطع التحميل يُستأنف لاحقاً من حيث توقف.
+    - في النهاية يُقارن md5 المحسوب مع md5Checksum في Drive.
+    """
+    if info is None:
+        info = get_download_info(service, file_id)
+    md5 = info.get('md5Checksum')
+
+    if cache is not None:
+        cached = cache.lookup(file_id, md5)
+        if cached is not None:
+            yield from _read_file(cached, chunk_size)
+            return
+
+    lock = cache.download_lock(file_id) if cache is not None else None
+    # إذا كان خيط آخر يحمّل الملف نفسه نكتفي بالتدفق دون الكتابة في الذاكرة
+    caching = lock is not None and lock.acquire(blocking=False)
+    try:
+        digest = hashlib.md5()
+        part_file = None
+        offset = 0
+
+        if caching:
+            part_path = cache.partial_path(file_id, md5)
+            if part_path.exists():
+                # البايتات المحمّلة سابقاً تُرسل من القرص ثم يُستأنف من بعدها
+                for chunk in _read_file(part_path, chunk_size):
+                    digest.update(chunk)
+                    offset += len(chunk)
+                    yield chunk
+            part_file = open(part_path, 'ab')
+
+        try:
+            request = service.files().get_media(fileId=file_id)
+            expected_size = int(info['size']) if info.get('size') else None
+            # الطلب الأول يبدأ من نهاية الجزء المحفوظ
+            for data in _download_ranges(request, offset, expected_size, chunk_size):
+                if part_file is not None:
+                    part_file.write(data)
+                digest.update(data)
+                yield data
+        finally:
+            if part_file is not None:
+                part_file.close()
+
+        if md5 and digest.hexdigest() != md5:
+            if caching:
+                try:
+                    cache.partial_path(file_id, md5).unlink()
+                except OSError:
+                    pass
+            raise ChecksumMismatchError(f"بصمة الملف {file_id} لا تطابق Drive")
+
+        if caching:
+            cache.commit(file_id, md5)
+    finally:
+        if caching:
+            lock.release()
+
+
+# ذاكرة مشتركة على مستوى العملية
+drive_download_cache = DriveDownloadCache()
@@ -0,0 +1,195 @@
+"""
+نظام الترجمة المكتبي - ذاكرة نتائج استخراج النص من الوثائق
+Translation Office System - Content-Hash Keyed Extraction Cache
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple, Union
+
+from config import EXTRACT_CACHE_DIR, EXTRACT_CACHE_MAX_BYTES, EXTRACT_CACHE_VERSION
+
+
+# عدد السجلات المحفوظة في الذاكرة، وعدد الملفات في فهرس الفحص السريع
+_MEMORY_ITEMS = 16
+_INDEX_ITEMS = 4096
+_HASH_CHUNK = 1024 * 1024
+
+
+def record_content(record: Dict[str, Any]) -> str:
+    """النص الكامل كما يُرجعه read_document (يُشتق من البنية المخزنة)"""
+    if record['file_type'] == 'pdf':
+        return '\n'.join(text for text in record['pages'] if text.strip())
+    return '\n'.join(record['paragraphs'])
+
+
+class ExtractionCache:
+    """ذاكرة دائمة لنتائج قراءة ملفات Word و PDF
+
+    المفتاح هو SHA-256 لمحتوى الملف (يُحسب بالتدفق)، فنفس الملف بأي اسم أو
+    مسار يُقرأ مرة واحدة. لتجنب قراءة الملف كاملاً عند كل استيراد يُحفظ
+    فهرس صغير (المسار، الحجم، وقت التعديل) ← البصمة؛ إذا لم يتغير الحجم
+    ووقت التعديل تُستخدم البصمة المحفوظة مباشرة.
+
+    كل سجل ملف JSON مضغوط يحتوي بنية الوثيقة: نص كل صفحة (PDF) أو الفقرات
+    (Word) وعدد الصفحات، ومنها يُشتق النص الكامل.
+    """
+
+    def __init__(self, cache_dir: Path = EXTRACT_CACHE_DIR, max_bytes: int = EXTRACT_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._index_path = self.cache_dir / "index.json"
+        self._index: "OrderedDict[str, list]" = OrderedDict(self._load_index())
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'hashed': 0}
+
+    # ---- البصمة ----
+
+    def _load_index(self) -> Dict[str, list]:
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = self._index_path.with_suffix('.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self._index_path)
+        except OSError as e:
+            print(f"تعذر حفظ فهرس ذاكرة الاستخراج: {e}")
+
+    @staticmethod
+    def _signature(stat: os.stat_result) -> Tuple[int, int]:
+        return stat.st_size, stat.st_mtime_ns
+
+    def indexed_digest(self, file_path: Union[str, Path]) -> Optional[str]:
+        """البصمة المحفوظة في الفهرس إذا لم يتغير الحجم ووقت التعديل، دون قراءة الملف"""
+        path = str(Path(file_path).resolve())
+        size, mtime = self._signature(os.stat(path))
+        with self._lock:
+            entry = self._index.get(path)
+            if entry is not None and entry[0] == size and entry[1] == mtime:
+                self._index.move_to_end(path)
+                return entry[2]
+        return None
+
+    def digest(self, file_path: Union[str, Path]) -> str:
+        """SHA-256 لمحتوى الملف (من الفهرس إذا لم يتغير الحجم ووقت التعديل)"""
+        digest = self.indexed_digest(file_path)
+        if digest is not None:
+            return digest
+
+        path = str(Path(file_path).resolve())
+        size, mtime = self._signature(os.stat(path))
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        self.stats['hashed'] += 1
+
+        with self._lock:
+            self._index[path] = [size, mtime, digest]
+            self._index.move_to_end(path)
+            while len(self._index) > _INDEX_ITEMS:
+                self._index.popitem(last=False)
+            self._save_index()
+        return digest
+
+    # ---- السجلات ----
+
+    def _record_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.json.gz"
+
+    def get(self, file_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """سجل الاستخراج المخزن للملف أو None"""
+        return self._load(self.digest(file_path))
+
+    def lookup(self, file_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """مثل get لكن من الفهرس فقط: ملف لم يُفهرس بحجمه ووقت تعديله الحاليين لا يُقرأ لحساب بصمته"""
+        digest = self.indexed_digest(file_path)
+        return self._load(digest) if digest is not None else None
+
+    def _load(self, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._memory.get(digest)
+            if record is not None:
+                self._memory.move_to_end(digest)
+                self.stats['memory_hits'] += 1
+                return record
+
+        path = self._record_path(digest)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                record = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.stats['misses'] += 1
+            return None
+        if record.get('version') != EXTRACT_CACHE_VERSION:
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['disk_hits'] += 1
+        self._remember(digest, record)
+        return record
+
+    def put(self, file_path: Union[str, Path], record: Dict[str, Any]) -> Dict[str, Any]:
+        """حفظ سجل استخراج (كتابة ذرية) وإرجاعه"""
+        digest = self.digest(file_path)
+        record = dict(record, version=EXTRACT_CACHE_VERSION)
+        path = self._record_path(digest)
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=5) as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"تعذر حفظ نتيجة الاستخراج: {e}")
+        self._remember(digest, record)
+        self.evict(keep=path)
+        return record
+
+    def _remember(self, digest: str, record: Dict[str, Any]):
+        with self._lock:
+            self._memory[digest] = record
+            self._memory.move_to_end(digest)
+            while len(self._memory) > _MEMORY_ITEMS:
+                self._memory.popitem(last=False)
+
+    def evict(self, keep: Optional[Path] = None):
+        """حذف السجلات الأقدم استخداماً حتى يعود الحجم تحت الحد"""
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob('*.json.gz'):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    path.unlink()
+                    total -= size
+                except OSError:
+                    pass
+
+
+# ذاكرة مشتركة على مستوى العملية
+extraction_cache = ExtractionCache()
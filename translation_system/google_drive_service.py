@@ -5,15 +5,13 @@ Translation Office System - Google Drive Service
 
 import os
 import json
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Iterable, Callable, Union, BinaryIO
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-import io
 import mimetypes
 
 from config import (
@@ -21,6 +19,10 @@ from config import (
     GOOGLE_DRIVE_TOKEN_FILE,
     GOOGLE_DRIVE_FOLDER_ID
 )
+from upload_queue import resumable_upload
+from drive_client import drive_clients, iter_drive_files
+from drive_batch import batch_delete, batch_get_info, batch_share, upload_many
+from drive_download import drive_download_cache, get_download_info, stream_drive_file
 
 
 class GoogleDriveService:
@@ -30,23 +32,42 @@ class GoogleDriveService:
     SCOPES = ['https://www.googleapis.com/auth/drive.file']
     
     def __init__(self):
-        self.service = None
-        self.credentials = None
+        self.client = None
         self._authenticate()
     
+    @contextmanager
+    def connection(self):
+        """كائن خدمة Drive مستعار من مجمّع العميل المشترك (None إذا لم يتوفر)"""
+        if not self.client:
+            yield None
+            return
+        with self.client.connection() as service:
+            yield service
+    
+    @property
+    def credentials(self):
+        """بيانات الاعتماد المشتركة (تُجدَّد تلقائياً)"""
+        return self.client.credentials() if self.client else None
+    
     def _authenticate(self):
-        """المصادقة مع Google Drive API"""
+        """المصادقة مع Google Drive API (مرة واحدة لكل عملية)"""
+        client_name = f"oauth:{GOOGLE_DRIVE_TOKEN_FILE}"
+        self.client = drive_clients.get(client_name)
+        if self.client is not None:
+            return
+        
         try:
+            credentials = None
             # التحقق من وجود ملف الرمز المميز
             if GOOGLE_DRIVE_TOKEN_FILE.exists():
-                self.credentials = Credentials.from_authorized_user_file(
+                credentials = Credentials.from_authorized_user_file(
                     str(GOOGLE_DRIVE_TOKEN_FILE), self.SCOPES
                 )
             
             # إذا لم تكن هناك بيانات اعتماد صالحة، اطلب من المستخدم المصادقة
-            if not self.credentials or not self.credentials.valid:
-                if self.credentials and self.credentials.expired and self.credentials.refresh_token:
-                    self.credentials.refresh(Request())
+            if not credentials or not credentials.valid:
+                if credentials and credentials.expired and credentials.refresh_token:
+                    credentials.refresh(Request())
                 else:
                     if not GOOGLE_DRIVE_CREDENTIALS_FILE.exists():
                         raise FileNotFoundError(
@@ -56,15 +77,15 @@ class GoogleDriveService:
                     flow = InstalledAppFlow.from_client_secrets_file(
                         str(GOOGLE_DRIVE_CREDENTIALS_FILE), self.SCOPES
                     )
-                    self.credentials = flow.run_local_server(port=0)
+                    credentials = flow.run_local_server(port=0)
                 
                 # حفظ الرمز المميز للمرة القادمة
                 GOOGLE_DRIVE_TOKEN_FILE.parent.mkdir(exist_ok=True)
                 with open(GOOGLE_DRIVE_TOKEN_FILE, 'w') as token:
-                    token.write(self.credentials.to_json())
+                    token.write(credentials.to_json())
             
-            # إنشاء خدمة Google Drive
-            self.service = build('drive', 'v3', credentials=self.credentials)
+            # تسجيل العميل المشترك؛ كائن الخدمة يُبنى من وثيقة الاكتشاف المضمّنة
+            self.client = drive_clients.get_or_create(client_name, lambda: credentials)
             print("تم الاتصال بنجاح بـ Google Drive")
             
         except Exception as e:
@@ -74,9 +95,6 @@ class GoogleDriveService:
     def upload_file(self, file_path: str, folder_id: Optional[str] = None) -> Optional[str]:
         """رفع ملف إلى Google Drive"""
         try:
-            if not self.service:
-                raise Exception("خدمة Google Drive غير متاحة")
-            
             file_path = Path(file_path)
             if not file_path.exists():
                 raise FileNotFoundError(f"الملف غير موجود: {file_path}")
@@ -92,15 +110,11 @@ class GoogleDriveService:
                 'parents': [folder_id or GOOGLE_DRIVE_FOLDER_ID] if (folder_id or GOOGLE_DRIVE_FOLDER_ID) else []
             }
             
-            # إنشاء وسيط الملف
-            media = MediaFileUpload(str(file_path), mimetype=mime_type, resumable=True)
-            
-            # رفع الملف
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id, name, webViewLink'
-            ).execute()
+            # رفع الملف على دفعات عبر جلسة قابلة للاستئناف
+            with self.connection() as service:
+                if not service:
+                    raise Exception("خدمة Google Drive غير متاحة")
+                file = resumable_upload(service, str(file_path), file_metadata, mime_type=mime_type)
             
             print(f"تم رفع الملف بنجاح: {file.get('name')} (ID: {file.get('id')})")
             return file.get('id')
@@ -112,28 +126,73 @@ class GoogleDriveService:
             print(f"خطأ غير متوقع: {e}")
             return None
     
-    def download_file(self, file_id: str, destination_path: str) -> bool:
-        """تحميل ملف من Google Drive"""
+    def upload_buffer(self, data: Union[bytes, memoryview, BinaryIO], file_name: str,
+                      folder_id: Optional[str] = None,
+                      mime_type: str = 'application/pdf') -> Optional[Dict[str, Any]]:
+        """رفع محتوى من الذاكرة (مثل PDF معروض في BytesIO) دون ملف مؤقت"""
         try:
-            if not self.service:
-                raise Exception("خدمة Google Drive غير متاحة")
-            
-            # طلب تحميل الملف
-            request = self.service.files().get_media(fileId=file_id)
-            file = io.BytesIO()
-            downloader = MediaIoBaseDownload(file, request)
+            file_metadata = {
+                'name': file_name,
+                'parents': [folder_id or GOOGLE_DRIVE_FOLDER_ID] if (folder_id or GOOGLE_DRIVE_FOLDER_ID) else []
+            }
+            with self.connection() as service:
+                if not service:
+                    raise Exception("خدمة Google Drive غير متاحة")
+                file = resumable_upload(service, data, file_metadata, mime_type=mime_type)
             
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-                print(f"تحميل: {int(status.progress() * 100)}%")
+            print(f"تم رفع الملف بنجاح: {file.get('name')} (ID: {file.get('id')})")
+            return file
             
-            # حفظ الملف
+        except HttpError as error:
+            print(f"خطأ في رفع الملف: {error}")
+            return None
+        except Exception as e:
+            print(f"خطأ غير متوقع: {e}")
+            return None
+    
+    def stream_file(self, file_id: str, info: Optional[Dict[str, Any]] = None,
+                    use_cache: bool = True) -> Iterator[bytes]:
+        """تحميل ملف بالتدفق على دفعات (مع الاستئناف والتحقق من md5)"""
+        if not self.client:
+            raise Exception("خدمة Google Drive غير متاحة")
+        
+        def stream():
+            # كائن الخدمة يبقى مستعاراً حتى ينتهي التدفق
+            with self.connection() as service:
+                yield from stream_drive_file(
+                    service, file_id, info=info,
+                    cache=drive_download_cache if use_cache else None
+                )
+        
+        return stream()
+    
+    def get_download_info(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """الحجم وبصمة md5 ونوع الملف قبل التحميل"""
+        try:
+            with self.connection() as service:
+                if not service:
+                    raise Exception("خدمة Google Drive غير متاحة")
+                return get_download_info(service, file_id)
+        except Exception as e:
+            print(f"خطأ في الحصول على معلومات التحميل: {e}")
+            return None
+    
+    def cached_file_path(self, info: Dict[str, Any]) -> Optional[Path]:
+        """مسار النسخة المحلية المكتملة إن وُجدت"""
+        return drive_download_cache.lookup(info['id'], info.get('md5Checksum'))
+    
+    def download_file(self, file_id: str, destination_path: str) -> bool:
+        """تحميل ملف من Google Drive"""
+        try:
             destination_path = Path(destination_path)
             destination_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(destination_path, 'wb') as f:
-                f.write(file.getvalue())
+            # الكتابة على القرص مباشرة بدلاً من تجميع الملف كاملاً في الذاكرة
+            tmp_path = destination_path.with_name(destination_path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                for chunk in self.stream_file(file_id):
+                    f.write(chunk)
+            os.replace(tmp_path, destination_path)
             
             print(f"تم تحميل الملف بنجاح: {destination_path}")
             return True
@@ -148,13 +207,14 @@ class GoogleDriveService:
     def get_file_info(self, file_id: str) -> Optional[Dict[str, Any]]:
         """الحصول على معلومات الملف"""
         try:
-            if not self.service:
-                raise Exception("خدمة Google Drive غير متاحة")
-            
-            file = self.service.files().get(
-                fileId=file_id,
-                fields='id, name, size, mimeType, createdTime, modifiedTime, webViewLink'
-            ).execute()
+            with self.connection() as service:
+                if not service:
+                    raise Exception("خدمة Google Drive غير متاحة")
+                
+                file = service.files().get(
+                    fileId=file_id,
+                    fields='id, name, size, mimeType, createdTime, modifiedTime, webViewLink'
+                ).execute()
             
             return file
             
@@ -165,24 +225,33 @@ class GoogleDriveService:
             print(f"خطأ غير متوقع: {e}")
             return None
     
-    def list_files(self, folder_id: Optional[str] = None, query: Optional[str] = None) -> List[Dict[str, Any]]:
-        """قائمة الملفات في مجلد معين"""
+    def iter_files(self, folder_id: Optional[str] = None, query: Optional[str] = None,
+                   fields: str = 'id, name, size, mimeType, createdTime, modifiedTime',
+                   page_size: int = 1000, order_by: Optional[str] = None,
+                   limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """مولّد لملفات مجلد معين يجلب الصفحات التالية عند الحاجة فقط"""
+        if not self.client:
+            raise Exception("خدمة Google Drive غير متاحة")
+        
+        # بناء الاستعلام
+        q = f"'{folder_id or GOOGLE_DRIVE_FOLDER_ID}' in parents and trashed=false"
+        if query:
+            q += f" and {query}"
+        
+        def files():
+            # كائن الخدمة يبقى مستعاراً ما دامت الصفحات تُطلب
+            with self.connection() as service:
+                yield from iter_drive_files(service, q, fields=fields, page_size=page_size,
+                                            order_by=order_by, limit=limit)
+        
+        return files()
+    
+    def list_files(self, folder_id: Optional[str] = None, query: Optional[str] = None,
+                   fields: str = 'id, name, size, mimeType, createdTime, modifiedTime',
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """قائمة الملفات في مجلد معين (جميع الصفحات)"""
         try:
-            if not self.service:
-                raise Exception("خدمة Google Drive غير متاحة")
-            
-            # بناء الاستعلام
-            q = f"'{folder_id or GOOGLE_DRIVE_FOLDER_ID}' in parents and trashed=false"
-            if query:
-                q += f" and {query}"
-            
-            results = self.service.files().list(
-                q=q,
-                pageSize=100,
-                fields="nextPageToken, files(id, name, size, mimeType, createdTime, modifiedTime)"
-            ).execute()
-            
-            return results.get('files', [])
+            return list(self.iter_files(folder_id, query, fields=fields, limit=limit))
             
         except HttpError as error:
             print(f"خطأ في قائمة الملفات: {error}")
@@ -194,10 +263,10 @@ class GoogleDriveService:
     def delete_file(self, file_id: str) -> bool:
         """حذف ملف من Google Drive"""
         try:
-            if not self.service:
-                raise Exception("خدمة Google Drive غير متاحة")
-            
-            self.service.files().delete(fileId=file_id).execute()
+            with self.connection() as service:
+                if not service:
+                    raise Exception("خدمة Google Drive غير متاحة")
+                service.files().delete(fileId=file_id).execute()
             print(f"تم حذف الملف بنجاح: {file_id}")
             return True
             
@@ -211,19 +280,19 @@ class GoogleDriveService:
     def create_folder(self, folder_name: str, parent_folder_id: Optional[str] = None) -> Optional[str]:
         """إنشاء مجلد جديد"""
         try:
-            if not self.service:
-                raise Exception("خدمة Google Drive غير متاحة")
-            
             folder_metadata = {
                 'name': folder_name,
                 'mimeType': 'application/vnd.google-apps.folder',
                 'parents': [parent_folder_id or GOOGLE_DRIVE_FOLDER_ID] if (parent_folder_id or GOOGLE_DRIVE_FOLDER_ID) else []
             }
             
-            folder = self.service.files().create(
-                body=folder_metadata,
-                fields='id, name'
-            ).execute()
+            with self.connection() as service:
+                if not service:
+                    raise Exception("خدمة Google Drive غير متاحة")
+                folder = service.files().create(
+                    body=folder_metadata,
+                    fields='id, name'
+                ).execute()
             
             print(f"تم إنشاء المجلد بنجاح: {folder.get('name')} (ID: {folder.get('id')})")
             return folder.get('id')
@@ -238,19 +307,19 @@ class GoogleDriveService:
     def get_shareable_link(self, file_id: str) -> Optional[str]:
         """الحصول على رابط قابل للمشاركة"""
         try:
-            if not self.service:
-                raise Exception("خدمة Google Drive غير متاحة")
-            
             # إنشاء إذن للقراءة العامة
             permission = {
                 'type': 'anyone',
                 'role': 'reader'
             }
             
-            self.service.permissions().create(
-                fileId=file_id,
-                body=permission
-            ).execute()
+            with self.connection() as service:
+                if not service:
+                    raise Exception("خدمة Google Drive غير متاحة")
+                service.permissions().create(
+                    fileId=file_id,
+                    body=permission
+                ).execute()
             
             # الحصول على الرابط
             file_info = self.get_file_info(file_id)
@@ -265,6 +334,50 @@ class GoogleDriveService:
         except Exception as e:
             print(f"خطأ غير متوقع: {e}")
             return None
-
-
-
+    
+    # ---- العمليات المجمّعة ----
+    
+    def delete_files(self, file_ids: Iterable[str],
+                     progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Dict[str, Any]]:
+        """حذف عدة ملفات في طلبات Drive مجمّعة (نتيجة لكل ملف)"""
+        with self.connection() as service:
+            if not service:
+                print("خدمة Google Drive غير متاحة")
+                return {}
+            return batch_delete(service, file_ids, progress=progress)
+    
+    def get_files_info(self, file_ids: Iterable[str],
+                       fields: str = 'id, name, size, mimeType, createdTime, modifiedTime, webViewLink',
+                       progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Dict[str, Any]]:
+        """معلومات عدة ملفات في طلبات Drive مجمّعة"""
+        with self.connection() as service:
+            if not service:
+                print("خدمة Google Drive غير متاحة")
+                return {}
+            return batch_get_info(service, file_ids, fields=fields, progress=progress)
+    
+    def get_shareable_links(self, file_ids: Iterable[str],
+                            progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Dict[str, Any]]:
+        """روابط مشاركة لعدة ملفات (إذن قراءة عام) في طلبات مجمّعة"""
+        with self.connection() as service:
+            if not service:
+                print("خدمة Google Drive غير متاحة")
+                return {}
+            return batch_share(service, file_ids, progress=progress)
+    
+    def upload_files(self, file_paths: Iterable[str], folder_id: Optional[str] = None,
+                     parallelism: Optional[int] = None,
+                     progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Dict[str, Any]]:
+        """رفع عدة ملفات بالتوازي (التقدم بالبايتات)"""
+        if not self.client:
+            print("خدمة Google Drive غير متاحة")
+            return {}
+        
+        parent = folder_id or GOOGLE_DRIVE_FOLDER_ID
+        files = [
+            (str(path), {'name': Path(path).name, 'parents': [parent]} if parent else {'name': Path(path).name})
+            for path in file_paths
+        ]
+        options = {'parallelism': parallelism} if parallelism else {}
+        # كل خيط رفع يستعير كائن خدمة خاصاً به من مجمّع العميل المشترك
+        return upload_many(self.client.connection, files, progress=progress, **options)
@@ -0,0 +1,232 @@
+"""
+نظام الترجمة المكتبي - مهام العرض في الخلفية
+Translation Office System - Background Render Jobs
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, Tuple
+
+from config import JOBS_DIR, JOB_WORKERS, JOB_TTL_SECONDS, JOB_PRUNE_INTERVAL
+
+
+# حالات المهمة
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+FINISHED_STATES = (DONE, FAILED)
+
+
+def _run_job(fn: Callable, args: Tuple, artifact_path: str) -> Optional[str]:
+    """تُنفَّذ داخل عملية العامل: تستدعي دالة العرض مع مسار الناتج"""
+    return fn(*args, artifact_path)
+
+
+class JobManager:
+    """مدير مهام العرض (PDF) في مجمّع عمليات
+
+    - التزامن محدود بعدد العمليات في المجمّع.
+    - الطلبات المتطابقة (نفس المفتاح) أثناء التنفيذ تُدمج في مهمة واحدة.
+    - حالة كل مهمة تُحفظ كملف JSON في JOBS_DIR وتُستعاد عند إعادة التشغيل.
+    - المهام المنتهية منذ أكثر من ttl ثانية تُحذف مع ملفاتها (عند البدء ثم
+      دورياً مع الإرسال).
+    """
+
+    def __init__(self, jobs_dir: Path = JOBS_DIR, max_workers: int = JOB_WORKERS,
+                 initializer: Optional[Callable[[], None]] = None,
+                 ttl: float = JOB_TTL_SECONDS):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self._last_prune = time.monotonic()
+        # يُنفَّذ مرة في كل عملية عاملة عند بدئها (مثل تحميل الخطوط)
+        self.initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # خيوط لمعالجة ما بعد الانتهاء (مثل الرفع) حتى لا تُحجز عمليات العرض
+        self._callbacks = ThreadPoolExecutor(max_workers=2, thread_name_prefix='job-callback')
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Dict[str, str] = {}
+        self._events: Dict[str, threading.Event] = {}
+        self._load_jobs()
+        self.prune()
+
+    # ---- الحالة الدائمة ----
+
+    def _job_file(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _persist(self, job: Dict[str, Any]):
+        """حفظ ذري لحالة المهمة"""
+        path = self._job_file(job['id'])
+        tmp_path = path.with_suffix('.json.tmp')
+        try:
+            tmp_path.write_text(json.dumps(job, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"تعذر حفظ حالة المهمة {job['id']}: {e}")
+
+    def _load_jobs(self):
+        """استعادة المهام المحفوظة؛ غير المكتملة منها توقفت مع العملية السابقة"""
+        for path in self.jobs_dir.glob('*.json'):
+            try:
+                job = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            if job.get('status') not in FINISHED_STATES:
+                job['status'] = FAILED
+                job['error'] = 'توقفت المهمة بسبب إعادة تشغيل الخادم'
+                job['updated_at'] = datetime.now().isoformat()
+                self._persist(job)
+            event = threading.Event()
+            event.set()
+            self._jobs[job['id']] = job
+            self._events[job['id']] = event
+
+    def _update(self, job_id: str, only_if: Optional[str] = None, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            # تجنّب الكتابة فوق حالة نهائية وصلت من خيط آخر
+            if only_if is not None and job['status'] != only_if:
+                return dict(job)
+            job.update(changes)
+            job['updated_at'] = datetime.now().isoformat()
+            snapshot = dict(job)
+        self._persist(snapshot)
+        return snapshot
+
+    def prune(self, max_age: Optional[float] = None) -> int:
+        """حذف المهام المنتهية الأقدم من max_age ثانية مع ملفات حالتها ونواتجها"""
+        cutoff = (datetime.now() - timedelta(seconds=self.ttl if max_age is None else max_age)).isoformat()
+        with self._lock:
+            self._last_prune = time.monotonic()
+            expired = [job for job in self._jobs.values()
+                       if job['status'] in FINISHED_STATES and job['updated_at'] < cutoff]
+            for job in expired:
+                del self._jobs[job['id']]
+                self._events.pop(job['id'], None)
+
+        for job in expired:
+            paths = [self._job_file(job['id'])]
+            # الناتج يُحذف فقط إذا كان داخل مجلد المهام
+            if job.get('artifact_path') and Path(job['artifact_path']).parent == self.jobs_dir:
+                paths.append(Path(job['artifact_path']))
+            for path in paths:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"تعذر حذف {path}: {e}")
+        return len(expired)
+
+    # ---- الواجهة العامة ----
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # يُنشأ عند أول استخدام حتى لا تُطلق العمليات عند الاستيراد
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     initializer=self.initializer)
+            return self._executor
+
+    def submit(self, key: str, fn: Callable, args: Tuple = (), suffix: str = '.pdf',
+               meta: Optional[Dict[str, Any]] = None,
+               on_complete: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """إرسال مهمة عرض؛ تُرجع المهمة الجارية نفسها إذا كان المفتاح قيد التنفيذ
+
+        fn تُستدعى في عملية منفصلة بالشكل fn(*args, artifact_path) ويجب أن
+        تكون دالة على مستوى الوحدة (قابلة للتسلسل) وتُرجع المسار أو None.
+        """
+        with self._lock:
+            existing_id = self._in_flight.get(key)
+            if existing_id is not None:
+                return dict(self._jobs[existing_id])
+
+            job_id = uuid.uuid4().hex
+            now = datetime.now().isoformat()
+            job = {
+                'id': job_id,
+                'key': key,
+                'status': QUEUED,
+                'artifact_path': str(self.jobs_dir / f"{job_id}{suffix}"),
+                'error': None,
+                'meta': meta or {},
+                'created_at': now,
+                'updated_at': now,
+            }
+            self._jobs[job_id] = job
+            self._in_flight[key] = job_id
+            self._events[job_id] = threading.Event()
+            snapshot = dict(job)
+
+        self._persist(snapshot)
+        try:
+            future = self._get_executor().submit(_run_job, fn, tuple(args), snapshot['artifact_path'])
+        except Exception as e:
+            self._finish(job_id, None, e, on_complete)
+            return self.get(job_id)
+
+        self._update(job_id, only_if=QUEUED, status=RUNNING)
+        future.add_done_callback(lambda f: self._callbacks.submit(self._on_done, job_id, f, on_complete))
+        if time.monotonic() - self._last_prune >= JOB_PRUNE_INTERVAL:
+            self._last_prune = time.monotonic()
+            self._callbacks.submit(self.prune)
+        return self.get(job_id)
+
+    def _on_done(self, job_id: str, future: Future, on_complete):
+        try:
+            result = future.result()
+            error = None if result else RuntimeError('فشل العرض')
+        except Exception as e:
+            result, error = None, e
+        self._finish(job_id, result, error, on_complete)
+
+    def _finish(self, job_id: str, result: Optional[str], error: Optional[BaseException], on_complete):
+        if error is None:
+            job = self._update(job_id, status=DONE, artifact_path=result)
+        else:
+            job = self._update(job_id, status=FAILED, error=str(error))
+
+        with self._lock:
+            if self._in_flight.get(job['key']) == job_id:
+                del self._in_flight[job['key']]
+            event = self._events.get(job_id)
+        if event is not None:
+            event.set()
+
+        # المعالجة اللاحقة (مثل الرفع إلى Drive) لا تؤخر من ينتظر الناتج
+        if on_complete is not None and job['status'] == DONE:
+            try:
+                on_complete(job)
+            except Exception as e:
+                print(f"خطأ في معالجة ما بعد المهمة {job_id}: {e}")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """الحصول على حالة المهمة"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """انتظار انتهاء المهمة حتى المهلة المحددة ثم إرجاع حالتها"""
+        event = self._events.get(job_id)
+        if event is None:
+            return None
+        event.wait(timeout)
+        return self.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        """إيقاف المجمّعات"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+        self._callbacks.shutdown(wait=wait)
@@ -0,0 +1,205 @@
+"""
+نظام الترجمة المكتبي - وصول كسول إلى صفحات الوثائق الكبيرة
+Translation Office System - Lazy Page-Level Document Access
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Union
+
+import PyPDF2
+
+from config import DOCUMENT_PAGE_CACHE_SIZE, DOCX_PARAGRAPHS_PER_PAGE
+from docx_reader import iter_docx_segments
+from extraction_cache import extraction_cache
+from pdf_extract import page_text
+
+
+# (رقم الصفحة من 0، نص الفقرة)
+PageParagraph = Tuple[int, str]
+
+
+class LazyDocument:
+    """مقبض وثيقة يستخرج الصفحات عند طلبها
+
+    عدد الصفحات ومعلومات الملف متاحة فور الفتح؛ نص كل صفحة يُستخرج عند أول
+    طلب ويُحفظ في ذاكرة LRU صغيرة، فعرض صفحة من ملف من مئات الصفحات لا
+    يستخرج الملف كله. إذا كان الملف قد قُرئ سابقاً تُؤخذ الصفحات من ذاكرة
+    الاستخراج مباشرة؛ البحث فيها بفهرس (الحجم، وقت التعديل) فقط دون حساب
+    بصمة المحتوى، فالفتح لا يقرأ الملف كاملاً.
+
+    ملفات Word ليس لها صفحات ثابتة، فتُعرض فقراتها في صفحات من
+    paragraphs_per_page فقرة.
+    """
+
+    def __init__(self, file_path: Union[str, Path],
+                 cache_size: int = DOCUMENT_PAGE_CACHE_SIZE,
+                 paragraphs_per_page: int = DOCX_PARAGRAPHS_PER_PAGE):
+        self.file_path = Path(file_path)
+        self.file_type = self.file_path.suffix.lower().lstrip('.')
+        if self.file_type not in ('pdf', 'docx'):
+            raise ValueError(f"نوع الملف غير مدعوم: {self.file_path.suffix}")
+        if not self.file_path.is_file():
+            raise FileNotFoundError(f"الملف غير موجود: {self.file_path}")
+
+        self.cache_size = max(1, cache_size)
+        self.paragraphs_per_page = max(1, paragraphs_per_page)
+        self._lock = threading.RLock()
+        self._pages: "OrderedDict[int, str]" = OrderedDict()
+        self._file = None
+        self._reader: Optional[PyPDF2.PdfReader] = None
+        self._paragraphs: Optional[List[str]] = None
+        self._page_count: Optional[int] = None
+        self._record_checked = False
+        self._cached_record: Optional[Dict[str, Any]] = None
+
+    # ---- المصدر ----
+
+    @property
+    def _record(self) -> Optional[Dict[str, Any]]:
+        """سجل ذاكرة الاستخراج (يُبحث عنه عند أول حاجة)"""
+        if not self._record_checked:
+            try:
+                self._cached_record = extraction_cache.lookup(self.file_path)
+            except OSError:
+                self._cached_record = None
+            self._record_checked = True
+        return self._cached_record
+
+    def _pdf_reader(self) -> PyPDF2.PdfReader:
+        """قارئ على الملف المفتوح: الكائنات تُقرأ من القرص عند الحاجة
+
+        تمرير المسار إلى PdfReader يقرأ الملف كله إلى الذاكرة، لذلك يُفتح
+        الملف هنا ويبقى مفتوحاً حتى close.
+        """
+        if self._reader is None:
+            self._file = open(self.file_path, 'rb')
+            self._reader = PyPDF2.PdfReader(self._file)
+        return self._reader
+
+    def _docx_paragraphs(self) -> List[str]:
+        """مقاطع ملف Word غير الفارغة (فقرات وخلايا جداول وترويسات وتذييلات)"""
+        if self._paragraphs is None:
+            if self._record is not None:
+                self._paragraphs = self._record['paragraphs']
+            else:
+                self._paragraphs = [segment.text for segment in iter_docx_segments(self.file_path)]
+        return self._paragraphs
+
+    # ---- المعلومات ----
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            with self._lock:
+                if self.file_type == 'pdf':
+                    if self._record is not None:
+                        self._page_count = self._record['page_count']
+                    else:
+                        self._page_count = len(self._pdf_reader().pages)
+                else:
+                    paragraphs = len(self._docx_paragraphs())
+                    self._page_count = -(-paragraphs // self.paragraphs_per_page)
+        return self._page_count
+
+    def __len__(self) -> int:
+        return self.page_count
+
+    def info(self) -> Dict[str, Any]:
+        """معلومات الملف وعدد الصفحات (وعنوان ومؤلف PDF إن وُجدا) دون استخراج النص"""
+        stat = self.file_path.stat()
+        info = {
+            'name': self.file_path.name,
+            'size': stat.st_size,
+            'modified': stat.st_mtime,
+            'file_type': self.file_type,
+            'pages': self.page_count,
+            'cached': self._record is not None,
+        }
+        if self.file_type == 'pdf':
+            try:
+                with self._lock:
+                    metadata = self._pdf_reader().metadata or {}
+                info['title'] = metadata.get('/Title') or ''
+                info['author'] = metadata.get('/Author') or ''
+            except Exception as e:
+                print(f"تعذر قراءة بيانات PDF: {e}")
+        else:
+            info['paragraphs'] = len(self._docx_paragraphs())
+        return info
+
+    # ---- الصفحات ----
+
+    def _index(self, page_number: int) -> int:
+        count = self.page_count
+        if page_number < 0:
+            page_number += count
+        if not 0 <= page_number < count:
+            raise IndexError(f"رقم الصفحة خارج النطاق: {page_number}")
+        return page_number
+
+    def page(self, page_number: int) -> str:
+        """نص صفحة واحدة (من 0؛ الأرقام السالبة من النهاية)"""
+        page_number = self._index(page_number)
+        if self._record is not None and self.file_type == 'pdf':
+            return self._record['pages'][page_number]
+        if self.file_type == 'docx':
+            start = page_number * self.paragraphs_per_page
+            return '\n'.join(self._docx_paragraphs()[start:start + self.paragraphs_per_page])
+
+        with self._lock:
+            text = self._pages.get(page_number)
+            if text is not None:
+                self._pages.move_to_end(page_number)
+                return text
+            text = page_text(self._pdf_reader().pages[page_number])
+            self._pages[page_number] = text
+            while len(self._pages) > self.cache_size:
+                self._pages.popitem(last=False)
+            return text
+
+    def page_paragraphs(self, page_number: int) -> List[str]:
+        """فقرات صفحة واحدة (الأسطر غير الفارغة)"""
+        return [line for line in self.page(page_number).split('\n') if line.strip()]
+
+    def iter_pages(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """الصفحات [start, stop) بالترتيب، كل صفحة تُستخرج عند الوصول إليها"""
+        stop = self.page_count if stop is None else min(stop, self.page_count)
+        for page_number in range(max(0, start), stop):
+            yield page_number, self.page(page_number)
+
+    def iter_paragraphs(self, start_page: int = 0) -> Iterator[PageParagraph]:
+        """فقرات الوثيقة مع رقم صفحتها، صفحة بعد صفحة"""
+        for page_number in range(max(0, start_page), self.page_count):
+            for paragraph in self.page_paragraphs(page_number):
+                yield page_number, paragraph
+
+    def text(self) -> str:
+        """النص الكامل بنفس شكل read_document (يستخرج كل الصفحات)"""
+        return '\n'.join(text for _, text in self.iter_pages() if text.strip())
+
+    # ---- الإغلاق ----
+
+    def close(self):
+        with self._lock:
+            self._reader = None
+            self._pages.clear()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "LazyDocument":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_document(file_path: Union[str, Path], **kwargs) -> Optional[LazyDocument]:
+    """فتح مقبض كسول أو None إذا كان الملف غير موجود أو غير مدعوم"""
+    try:
+        return LazyDocument(file_path, **kwargs)
+    except (OSError, ValueError) as e:
+        print(f"تعذر فتح الوثيقة: {e}")
+        return None
@@ -21,7 +21,10 @@ from models import TranslationManager, Translator, TranslationProject
 from document_processor import DocumentProcessor
 from pdf_generator import PDFGenerator
 from google_drive_service import GoogleDriveService
-from config import SUPPORTED_LANGUAGES, COMPANY_NAME, APP_NAME
+from upload_queue import UploadQueue
+from batch_export import export_pdf_zip
+from translation_memory import TranslationMemory
+from config import SUPPORTED_LANGUAGES, COMPANY_NAME, APP_NAME, GOOGLE_DRIVE_FOLDER_ID
 
 
 class MainWindow(QMainWindow):
@@ -29,13 +32,20 @@ class MainWindow(QMainWindow):
     
     def __init__(self):
         super().__init__()
-        self.translation_manager = TranslationManager()
+        self.translation_memory = TranslationMemory()
+        self.translation_manager = TranslationManager(memory=self.translation_memory)
         self.document_processor = DocumentProcessor()
         self.pdf_generator = PDFGenerator()
         self.google_drive_service = None
+        # رفع ملفات PDF المصدّرة في الخلفية حتى لا تتجمد الواجهة
+        self.drive_uploads = UploadQueue('desktop', self.get_drive_api)
+        self.drive_uploads.on_complete(self.on_drive_upload_complete)
+        # رفع ما تبقى في الطابور من تشغيل سابق
+        self.drive_uploads.start()
         
         self.current_project = None
         self.current_translator = None
+        self.source_document = None  # مقبض كسول للمستند الأصلي المعروض
         
         self.init_ui()
         self.setup_connections()
@@ -109,6 +119,14 @@ class MainWindow(QMainWindow):
         export_pdf_action.triggered.connect(self.export_pdf)
         translation_menu.addAction(export_pdf_action)
         
+        export_pdf_batch_action = QAction('تصدير PDF للمشاريع المحددة (ZIP)', self)
+        export_pdf_batch_action.triggered.connect(self.export_selected_pdfs)
+        translation_menu.addAction(export_pdf_batch_action)
+        
+        upload_files_action = QAction('رفع ملفات إلى Google Drive', self)
+        upload_files_action.triggered.connect(self.upload_files_to_drive)
+        translation_menu.addAction(upload_files_action)
+        
         # قائمة المترجمين
         translators_menu = menubar.addMenu('المترجمين')
         
@@ -260,6 +278,8 @@ class MainWindow(QMainWindow):
             "العنوان", "العميل", "اللغة المصدر", "اللغة الهدف", 
             "المترجم", "الحالة", "التاريخ"
         ])
+        # تحديد عدة صفوف للتصدير بالجملة
+        self.projects_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         
         layout.addWidget(self.projects_table)
         
@@ -300,10 +320,33 @@ class MainWindow(QMainWindow):
         import_translated_btn.clicked.connect(self.import_translated_document)
         file_buttons_layout.addWidget(import_translated_btn)
         
+        pretranslate_btn = QPushButton("ترجمة مسبقة من الذاكرة")
+        pretranslate_btn.clicked.connect(self.pretranslate_from_memory)
+        file_buttons_layout.addWidget(pretranslate_btn)
+        
         file_buttons_layout.addStretch()
         
         translation_layout.addLayout(file_buttons_layout)
         
+        # تصفح المستند الأصلي صفحة بصفحة (تُستخرج الصفحة المعروضة فقط)
+        source_pages_layout = QHBoxLayout()
+        source_pages_layout.addWidget(QLabel("صفحة المصدر:"))
+        self.source_page_spin = QSpinBox()
+        self.source_page_spin.setRange(0, 0)
+        self.source_page_spin.setEnabled(False)
+        self.source_page_spin.valueChanged.connect(self.show_source_page)
+        source_pages_layout.addWidget(self.source_page_spin)
+        self.source_page_label = QLabel("")
+        source_pages_layout.addWidget(self.source_page_label)
+        source_pages_layout.addStretch()
+        translation_layout.addLayout(source_pages_layout)
+        
+        # نص المستند المستورد (يظهر صفحة بصفحة أثناء الاستخراج)
+        self.source_text_edit = QTextEdit()
+        self.source_text_edit.setReadOnly(True)
+        self.source_text_edit.setPlaceholderText("نص المستند المستورد يظهر هنا...")
+        translation_layout.addWidget(self.source_text_edit)
+        
         # محرر النص
         self.translation_text_edit = QTextEdit()
         self.translation_text_edit.setPlaceholderText("أدخل محتوى الترجمة هنا...")
@@ -467,11 +510,36 @@ class MainWindow(QMainWindow):
         )
         
         if file_path:
-            success, content, file_type = self.document_processor.read_document(file_path)
-            if success:
-                QMessageBox.information(self, "نجح الاستيراد", f"تم استيراد الملف بنجاح\nالنوع: {file_type}")
-            else:
-                QMessageBox.warning(self, "خطأ في الاستيراد", f"فشل في استيراد الملف: {content}")
+            # الاستخراج في خيط خلفي؛ الصفحات تُعرض فور جاهزيتها دون تجميد الواجهة
+            self.open_source_view(None)
+            self.source_text_edit.clear()
+            self.tab_widget.setCurrentIndex(1)
+            self.import_worker = DocumentImportWorker(self.document_processor, file_path, self)
+            self.import_worker.page_ready.connect(self.on_import_page)
+            self.import_worker.progress.connect(self.on_batch_progress)
+            self.import_worker.completed.connect(self.on_import_completed)
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(0)
+            self.progress_bar.setVisible(True)
+            self.status_bar.showMessage("جاري استيراد الملف...")
+            self.import_worker.start()
+    
+    def on_import_page(self, page_number: int, text: str):
+        """إلحاق صفحة مستخرجة بنص المستند المعروض"""
+        if text.strip():
+            self.source_text_edit.append(f"--- صفحة {page_number + 1} ---\n{text}")
+    
+    def on_import_completed(self, success: bool, content: str, file_type: str):
+        """انتهاء الاستيراد في الخلفية"""
+        self.progress_bar.setVisible(False)
+        self.status_bar.showMessage("جاهز")
+        if success:
+            if file_type != 'pdf':
+                # ملفات Word تُقرأ دفعة واحدة
+                self.source_text_edit.setPlainText(content)
+            QMessageBox.information(self, "نجح الاستيراد", f"تم استيراد الملف بنجاح\nالنوع: {file_type}")
+        else:
+            QMessageBox.warning(self, "خطأ في الاستيراد", f"فشل في استيراد الملف: {content or file_type}")
     
     def create_translation_template(self):
         """إنشاء نموذج ترجمة"""
@@ -520,47 +588,194 @@ class MainWindow(QMainWindow):
         
         if file_path:
             # تجميع بيانات المشروع
-            project_data = {
-                'project_id': self.current_project.id,
-                'client_name': self.current_project.client_name,
-                'client_email': self.current_project.client_email,
-                'source_language': self.current_project.source_language,
-                'target_language': self.current_project.target_language,
-                'translator_name': self.current_translator.name if self.current_translator else "",
-                'translator_license': self.current_translator.license_number if self.current_translator else "",
-                'translation_date': self.current_project.created_at.strftime("%Y-%m-%d"),
-                'certification_date': QDate.currentDate().toString("yyyy-MM-dd"),
-                'translated_content': self.translation_text_edit.toPlainText(),
-                'original_content': getattr(self.current_project, 'original_content', "")  # المحتوى الأصلي المحفوظ
-            }
+            project_data = self.build_pdf_data(
+                self.current_project, self.current_translator, self.translation_text_edit.toPlainText()
+            )
             
             success = self.pdf_generator.generate_final_pdf(project_data, file_path)
             if success:
                 # تحديث حالة المشروع
                 self.current_project.status = "completed"
                 self.current_project.final_pdf_path = file_path
-                # رفع إلى Google Drive وحفظ الرابط
-                drive_link = None
-                try:
-                    if not self.google_drive_service:
-                        self.google_drive_service = GoogleDriveService()
-                    file_id = self.google_drive_service.upload_file(file_path)
-                    if file_id:
-                        self.current_project.google_drive_id = file_id
-                        drive_link = self.google_drive_service.get_shareable_link(file_id)
-                except Exception as e:
-                    print(f"خطأ رفع Google Drive: {e}")
+                self.translation_manager.save_project(self.current_project)
+                # الترجمة المصدّرة معتمدة: تُحفظ في وثيقة المشروع ليقرأها التصدير بالجملة،
+                # ومقاطعها في ذاكرة الترجمة لإعادة استخدامها
+                self.translation_manager.save_translation(self.current_project, project_data['translated_content'])
+                # الرفع إلى Google Drive في الخلفية؛ المعرف يُحفظ عند اكتماله
+                self.drive_uploads.enqueue(
+                    file_path,
+                    folder=GOOGLE_DRIVE_FOLDER_ID or None,
+                    meta={'project_id': self.current_project.id}
+                )
                 self.refresh_projects()
-                if drive_link:
-                    QMessageBox.information(self, "نجح التصدير", f"تم إنشاء ورفع PDF بنجاح\nالرابط: {drive_link}")
-                else:
-                    QMessageBox.information(self, "نجح التصدير", "تم إنشاء PDF بنجاح")
+                QMessageBox.information(self, "نجح التصدير", "تم إنشاء PDF بنجاح، وسيتم رفعه إلى Google Drive في الخلفية")
             else:
                 QMessageBox.warning(self, "خطأ في التصدير", "فشل في إنشاء PDF")
     
+    def pretranslate_from_memory(self):
+        """ملء الترجمة من ذاكرة الترجمة: كل مقطع له ترجمة محفوظة يُستبدل بها"""
+        if not self.current_project:
+            QMessageBox.warning(self, "تحذير", "يرجى تحديد مشروع أولاً")
+            return
+        
+        original_content = getattr(self.current_project, 'original_content', "")
+        if not original_content and self.source_document is not None:
+            original_content = self.source_document.text()
+        if not original_content:
+            QMessageBox.warning(self, "تحذير", "يرجى استيراد المستند الأصلي أولاً")
+            return
+        
+        project = self.current_project
+        
+        def operation(progress):
+            # أول بحث تقريبي لزوج لغات يبني فهرسه، لذلك يجري في الخلفية
+            lines = original_content.split('\n')
+            translated, matched, total = [], 0, 0
+            for number, line in enumerate(lines, 1):
+                parts = []
+                for segment, match in self.translation_memory.pretranslate(
+                        line, project.source_language, project.target_language):
+                    total += 1
+                    matched += match is not None
+                    parts.append(match.target if match is not None else segment)
+                translated.append(' '.join(parts))
+                progress(number, len(lines))
+            return {'text': '\n'.join(translated), 'matched': matched, 'total': total}
+        
+        self.memory_worker = BatchWorker(operation, self)
+        self.memory_worker.progress.connect(self.on_batch_progress)
+        self.memory_worker.completed.connect(self.on_pretranslate_completed)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.status_bar.showMessage("جاري البحث في ذاكرة الترجمة...")
+        self.memory_worker.start()
+    
+    def on_pretranslate_completed(self, results: dict):
+        """عرض نتيجة الترجمة المسبقة في محرر الترجمة"""
+        self.progress_bar.setVisible(False)
+        self.status_bar.showMessage("جاهز")
+        if not results:
+            QMessageBox.warning(self, "خطأ", "فشل البحث في ذاكرة الترجمة")
+            return
+        self.translation_text_edit.setPlainText(results['text'])
+        QMessageBox.information(
+            self, "ذاكرة الترجمة",
+            f"تمت ترجمة {results['matched']} من {results['total']} مقطع من الذاكرة"
+        )
+    
+    def build_pdf_data(self, project, translator, translated_content: str) -> Dict[str, Any]:
+        """بيانات العرض التي يحتاجها PDFGenerator.generate_final_pdf"""
+        return {
+            'project_id': project.id,
+            'client_name': project.client_name,
+            'client_email': project.client_email,
+            'source_language': project.source_language,
+            'target_language': project.target_language,
+            'translator_name': translator.name if translator else "",
+            'translator_license': translator.license_number if translator else "",
+            'translation_date': project.created_at.strftime("%Y-%m-%d"),
+            'certification_date': QDate.currentDate().toString("yyyy-MM-dd"),
+            'translated_content': translated_content,
+            'original_content': getattr(project, 'original_content', "") or "",  # المحتوى الأصلي المحفوظ
+            'original_file_path': getattr(project, 'original_file_path', None)  # PDF الأصلي يُختم بدلاً من نصه
+        }
+    
+    def selected_projects(self):
+        """المشاريع المحددة في جدول المشاريع"""
+        project_ids = {self.projects_table.item(index.row(), 0).data(Qt.ItemDataRole.UserRole)
+                       for index in self.projects_table.selectionModel().selectedRows()}
+        return [project for project in self.translation_manager.get_all_projects() if project.id in project_ids]
+    
+    def export_selected_pdfs(self):
+        """تصدير PDF لعدة مشاريع بالتوازي في أرشيف ZIP واحد"""
+        projects = self.selected_projects()
+        if not projects:
+            QMessageBox.warning(self, "تحذير", "يرجى تحديد مشروع واحد على الأقل")
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(self, "حفظ الأرشيف", "translations.zip", "ملفات ZIP (*.zip)")
+        if not file_path:
+            return
+        
+        # الترجمة المحفوظة لكل مشروع هي محتوى وثائقه المترجمة (انظر save_translation في export_pdf)
+        items = []
+        for project in projects:
+            translated_content = "\n".join(
+                document.translated_content for document in self.translation_manager.iter_project_documents(project.id)
+                if document.translated_content
+            )
+            translator = self.translation_manager.get_translator(project.translator_id)
+            items.append((f"{project.title.replace('/', '_')}.pdf", self.build_pdf_data(project, translator, translated_content)))
+        
+        self.run_batch_operation(
+            lambda progress: export_pdf_zip(items, file_path, progress=progress),
+            f"جاري تصدير {len(items)} ملف PDF..."
+        )
+    
+    def get_drive_api(self):
+        """كائن خدمة Google Drive مستعار لعمّال الرفع (الخدمة تُنشأ عند أول حاجة)"""
+        if not self.google_drive_service:
+            self.google_drive_service = GoogleDriveService()
+        return self.google_drive_service.connection()
+    
+    def on_drive_upload_complete(self, item):
+        """حفظ معرف Google Drive للمشروع بعد اكتمال الرفع"""
+        project = self.translation_manager.get_project(item['meta'].get('project_id'))
+        if project:
+            project.google_drive_id = item['drive_file_id']
+            self.translation_manager.save_project(project)
+    
+    def upload_files_to_drive(self):
+        """رفع عدة ملفات إلى Google Drive بالتوازي مع عرض التقدم"""
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "اختيار الملفات للرفع", "", "All Files (*)")
+        if not file_paths:
+            return
+        
+        try:
+            if not self.google_drive_service:
+                self.google_drive_service = GoogleDriveService()
+        except Exception as e:
+            QMessageBox.warning(self, "خطأ في الاتصال", f"فشل في الاتصال بـ Google Drive: {str(e)}")
+            return
+        
+        service = self.google_drive_service
+        self.run_batch_operation(
+            lambda progress: service.upload_files(file_paths, progress=progress),
+            "جاري رفع الملفات إلى Google Drive..."
+        )
+    
+    def run_batch_operation(self, operation, message: str):
+        """تشغيل عملية مجمّعة في خيط خلفي وربط تقدمها بشريط التقدم"""
+        self.batch_worker = BatchWorker(operation, self)
+        self.batch_worker.progress.connect(self.on_batch_progress)
+        self.batch_worker.completed.connect(self.on_batch_completed)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.status_bar.showMessage(message)
+        self.batch_worker.start()
+    
+    def on_batch_progress(self, done: int, total: int):
+        """تحديث شريط التقدم (نسبة مئوية لأن الإجمالي قد يكون بالبايتات)"""
+        self.progress_bar.setValue(int(done * 100 / total) if total else 100)
+    
+    def on_batch_completed(self, results: dict):
+        """عرض ملخص العملية المجمّعة"""
+        self.progress_bar.setVisible(False)
+        failed = [key for key, item in results.items() if not item['success']]
+        self.status_bar.showMessage("جاهز")
+        if failed:
+            QMessageBox.warning(
+                self, "اكتملت العملية مع أخطاء",
+                f"نجح {len(results) - len(failed)} من {len(results)}\n" + "\n".join(failed[:10])
+            )
+        else:
+            QMessageBox.information(self, "اكتملت العملية", f"تمت معالجة {len(results)} ملف بنجاح")
+    
     def add_translator(self):
         """إضافة مترجم جديد"""
-        dialog = AddTranslatorDialog(self)
+        dialog = AddTranslatorDialog(self.translation_manager, self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             self.refresh_translators()
             self.update_statistics()
@@ -603,7 +818,10 @@ class MainWindow(QMainWindow):
         for row, project in enumerate(projects):
             translator = self.translation_manager.get_translator(project.translator_id)
             
-            self.projects_table.setItem(row, 0, QTableWidgetItem(project.title))
+            title_item = QTableWidgetItem(project.title)
+            # معرف المشروع يُحفظ في الخلية لأن العناوين قد تتكرر
+            title_item.setData(Qt.ItemDataRole.UserRole, project.id)
+            self.projects_table.setItem(row, 0, title_item)
             self.projects_table.setItem(row, 1, QTableWidgetItem(project.client_name))
             self.projects_table.setItem(row, 2, QTableWidgetItem(project.source_language))
             self.projects_table.setItem(row, 3, QTableWidgetItem(project.target_language))
@@ -648,14 +866,12 @@ class MainWindow(QMainWindow):
         """عند اختيار مشروع"""
         current_row = self.projects_table.currentRow()
         if current_row >= 0:
-            project_title = self.projects_table.item(current_row, 0).text()  # استخدام العنوان كمعرف مؤقت
-            # البحث عن المشروع بالمعرف الحقيقي
-            for project in self.translation_manager.get_all_projects():
-                if project.title == project_title:
-                    self.current_project = project
-                    self.current_translator = self.translation_manager.get_translator(project.translator_id)
-                    self.update_project_info()
-                    break
+            project_id = self.projects_table.item(current_row, 0).data(Qt.ItemDataRole.UserRole)
+            project = self.translation_manager.get_project(project_id)
+            if project:
+                self.current_project = project
+                self.current_translator = self.translation_manager.get_translator(project.translator_id)
+                self.update_project_info()
         else:
             self.current_project = None
             self.update_project_info()
@@ -685,6 +901,7 @@ class MainWindow(QMainWindow):
             self.project_title_edit.setText(self.current_project.title)
             self.client_name_edit.setText(self.current_project.client_name)
             self.client_email_edit.setText(self.current_project.client_email)
+            self.open_source_view(getattr(self.current_project, 'original_file_path', None))
         else:
             self.project_title_label.setText("لا يوجد مشروع محدد")
             self.project_status_label.setText("")
@@ -693,6 +910,35 @@ class MainWindow(QMainWindow):
             self.project_title_edit.clear()
             self.client_name_edit.clear()
             self.client_email_edit.clear()
+            self.open_source_view(None)
+    
+    def open_source_view(self, file_path: Optional[str]):
+        """عرض المستند الأصلي بجانب الترجمة: عدد الصفحات فوراً والصفحة الأولى فقط"""
+        if self.source_document is not None:
+            self.source_document.close()
+        self.source_document = None
+        if file_path and os.path.exists(file_path):
+            self.source_document = self.document_processor.open_document(file_path)
+        
+        page_count = len(self.source_document) if self.source_document is not None else 0
+        self.source_page_spin.blockSignals(True)
+        self.source_page_spin.setRange(1 if page_count else 0, page_count)
+        self.source_page_spin.setValue(1 if page_count else 0)
+        self.source_page_spin.blockSignals(False)
+        self.source_page_spin.setEnabled(page_count > 1)
+        self.source_page_label.setText(f"من {page_count}" if page_count else "")
+        self.source_text_edit.clear()
+        if page_count:
+            self.show_source_page(1)
+    
+    def show_source_page(self, page_number: int):
+        """عرض صفحة من المستند الأصلي (تُستخرج عند الطلب)"""
+        if self.source_document is None or page_number < 1:
+            return
+        try:
+            self.source_text_edit.setPlainText(self.source_document.page(page_number - 1))
+        except Exception as e:
+            self.status_bar.showMessage(f"تعذر عرض الصفحة: {e}")
     
     def update_translator_info(self):
         """تحديث معلومات المترجم"""
@@ -723,6 +969,8 @@ class MainWindow(QMainWindow):
                 self.current_project.original_file_path = file_path
                 # حفظ المحتوى للاستخدام لاحقاً
                 self.current_project.original_content = content
+                self.translation_manager.save_project(self.current_project)
+                self.open_source_view(file_path)
                 QMessageBox.information(self, "نجح الاستيراد", f"تم استيراد المستند الأصلي بنجاح\nالنوع: {file_type}")
             else:
                 QMessageBox.warning(self, "خطأ في الاستيراد", f"فشل في استيراد الملف: {content}")
@@ -774,11 +1022,8 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            # حذف المترجم من القائمة
-            translators = self.translation_manager.get_all_translators()
-            translators = [t for t in translators if t.id != self.current_translator.id]
-            # إعادة إنشاء مدير الترجمة مع القائمة المحدثة
-            self.translation_manager.translators = {t.id: t for t in translators}
+            # حذف المترجم من قاعدة البيانات
+            self.translation_manager.delete_translator(self.current_translator.id)
             self.refresh_translators()
             self.current_translator = None
             self.update_translator_info()
@@ -795,6 +1040,45 @@ class MainWindow(QMainWindow):
             print(f"تفاصيل الخطأ: {e}")
 
 
+class BatchWorker(QThread):
+    """خيط خلفي للعمليات المجمّعة (Google Drive وتصدير PDF)"""
+    
+    progress = pyqtSignal('qint64', 'qint64')
+    completed = pyqtSignal(dict)
+    
+    def __init__(self, operation, parent=None):
+        super().__init__(parent)
+        # operation تستقبل دالة تقدم وتُرجع نتيجة لكل عنصر
+        self.operation = operation
+    
+    def run(self):
+        try:
+            results = self.operation(self.progress.emit)
+        except Exception as e:
+            print(f"خطأ في العملية المجمّعة: {e}")
+            results = {}
+        self.completed.emit(results or {})
+
+
+class DocumentImportWorker(QThread):
+    """خيط خلفي لقراءة مستند مع إرسال كل صفحة PDF فور استخراجها"""
+    
+    page_ready = pyqtSignal(int, str)
+    progress = pyqtSignal('qint64', 'qint64')
+    completed = pyqtSignal(bool, str, str)
+    
+    def __init__(self, document_processor, file_path: str, parent=None):
+        super().__init__(parent)
+        self.document_processor = document_processor
+        self.file_path = file_path
+    
+    def run(self):
+        success, content, file_type = self.document_processor.read_document(
+            self.file_path, on_page=self.page_ready.emit, progress=self.progress.emit
+        )
+        self.completed.emit(success, content, file_type)
+
+
 class NewProjectDialog(QDialog):
     """حوار إنشاء مشروع جديد"""
     
@@ -880,8 +1164,9 @@ class NewProjectDialog(QDialog):
 class AddTranslatorDialog(QDialog):
     """حوار إضافة مترجم جديد"""
     
-    def __init__(self, parent=None):
+    def __init__(self, translation_manager, parent=None):
         super().__init__(parent)
+        self.translation_manager = translation_manager
         self.init_ui()
     
     def init_ui(self):
@@ -929,9 +1214,7 @@ class AddTranslatorDialog(QDialog):
             return
         
         # إضافة المترجم إلى مدير الترجمة
-        from models import TranslationManager
-        translation_manager = TranslationManager()
-        translation_manager.add_translator(
+        self.translation_manager.add_translator(
             name=self.name_edit.text().strip(),
             license_number=self.license_edit.text().strip(),
             source_langs=[],  # سيتم إضافتها لاحقاً
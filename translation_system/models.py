@@ -5,10 +5,12 @@ Translation Office System - Models and Classes
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Any, Iterator
 from pathlib import Path
 import uuid
 
+from lazy_document import LazyDocument, open_document
+
 
 @dataclass
 class Translator:
@@ -46,6 +48,7 @@ class TranslationProject:
     google_drive_id: Optional[str] = None
     qr_code_path: Optional[str] = None
     verification_url: Optional[str] = None
+    original_content: Optional[str] = None
 
 
 @dataclass
@@ -60,14 +63,27 @@ class TranslationDocument:
     created_at: datetime
     updated_at: datetime
 
+    def open_source(self) -> Optional[LazyDocument]:
+        """مقبض كسول لملف الوثيقة الأصلي (الصفحات تُقرأ عند الطلب بدلاً من content)"""
+        return open_document(self.file_path)
+
 
 class TranslationManager:
-    """مدير الترجمة - المسؤول عن إدارة مشاريع الترجمة"""
+    """مدير الترجمة - المسؤول عن إدارة مشاريع الترجمة
+
+    يعتمد على طبقة تخزين قابلة للاستبدال؛ الافتراضي قاعدة SQLite دائمة
+    (انظر storage.SQLiteStorage) حتى لا تضيع البيانات عند إعادة التشغيل.
+    إذا مُررت ذاكرة ترجمة (translation_memory.TranslationMemory) تُحفظ فيها
+    مقاطع كل وثيقة عند تحديث ترجمتها.
+    """
     
-    def __init__(self):
-        self.projects: Dict[str, TranslationProject] = {}
-        self.translators: Dict[str, Translator] = {}
-        self.documents: Dict[str, TranslationDocument] = {}
+    def __init__(self, storage=None, memory=None):
+        if storage is None:
+            from config import DATABASE_FILE
+            from storage import SQLiteStorage
+            storage = SQLiteStorage(DATABASE_FILE)
+        self.storage = storage
+        self.memory = memory
     
     def create_project(self, title: str, description: str, source_lang: str, 
                       target_lang: str, translator_id: str, client_name: str, 
@@ -90,19 +106,25 @@ class TranslationManager:
             status="draft"
         )
         
-        self.projects[project_id] = project
+        self.storage.save_project(project)
         return project
     
     def get_project(self, project_id: str) -> Optional[TranslationProject]:
         """الحصول على مشروع ترجمة"""
-        return self.projects.get(project_id)
+        return self.storage.get_project(project_id)
+    
+    def save_project(self, project: TranslationProject) -> TranslationProject:
+        """حفظ التعديلات على مشروع موجود"""
+        project.updated_at = datetime.now()
+        self.storage.save_project(project)
+        return project
     
     def update_project_status(self, project_id: str, status: str) -> bool:
         """تحديث حالة المشروع"""
-        project = self.projects.get(project_id)
+        project = self.storage.get_project(project_id)
         if project:
             project.status = status
-            project.updated_at = datetime.now()
+            self.save_project(project)
             return True
         return False
     
@@ -122,12 +144,16 @@ class TranslationManager:
             created_at=datetime.now()
         )
         
-        self.translators[translator_id] = translator
+        self.storage.save_translator(translator)
         return translator
     
     def get_translator(self, translator_id: str) -> Optional[Translator]:
         """الحصول على مترجم"""
-        return self.translators.get(translator_id)
+        return self.storage.get_translator(translator_id)
+    
+    def delete_translator(self, translator_id: str) -> bool:
+        """حذف مترجم"""
+        return self.storage.delete_translator(translator_id)
     
     def create_document(self, project_id: str, file_path: str, file_type: str, 
                        content: str) -> TranslationDocument:
@@ -146,29 +172,73 @@ class TranslationManager:
             updated_at=now
         )
         
-        self.documents[doc_id] = document
+        self.storage.save_document(document)
         return document
     
     def update_translated_content(self, document_id: str, translated_content: str) -> bool:
         """تحديث المحتوى المترجم"""
-        document = self.documents.get(document_id)
+        document = self.storage.get_document(document_id)
         if document:
             document.translated_content = translated_content
             document.updated_at = datetime.now()
+            self.storage.save_document(document)
+            self._remember_translation(document)
             return True
         return False
     
+    def save_translation(self, project: TranslationProject, translated_content: str) -> TranslationDocument:
+        """حفظ الترجمة المعتمدة للمشروع في وثيقته (تُنشأ عند أول تصدير) وفي ذاكرة الترجمة"""
+        documents = self.get_project_documents_page(project.id, per_page=1)
+        if documents:
+            document = documents[0]
+        else:
+            file_path = project.original_file_path or ""
+            document = self.create_document(project.id, file_path, Path(file_path).suffix.lstrip('.').lower(),
+                                            project.original_content or "")
+        document.content = project.original_content or document.content
+        document.translated_content = translated_content
+        document.updated_at = datetime.now()
+        self.storage.save_document(document)
+        self._remember_translation(document)
+        return document
+    
+    def _remember_translation(self, document: TranslationDocument):
+        """حفظ مقاطع الوثيقة المترجمة في ذاكرة الترجمة (بلغتي المشروع)"""
+        if self.memory is None or not document.content or not document.translated_content:
+            return
+        project = self.storage.get_project(document.project_id)
+        if project is not None:
+            self.memory.add_document(document.content, document.translated_content,
+                                     project.source_language, project.target_language, project.id)
+    
     def get_project_documents(self, project_id: str) -> List[TranslationDocument]:
         """الحصول على وثائق المشروع"""
-        return [doc for doc in self.documents.values() if doc.project_id == project_id]
+        return self.storage.list_project_documents(project_id)
+    
+    def get_project_documents_page(self, project_id: str, page: int = 1,
+                                   per_page: int = 50) -> List[TranslationDocument]:
+        """الحصول على صفحة من وثائق المشروع (الترقيم يبدأ من 1)"""
+        page = max(page, 1)
+        return self.storage.list_project_documents(
+            project_id, offset=(page - 1) * per_page, limit=per_page
+        )
+    
+    def count_project_documents(self, project_id: str) -> int:
+        """عدد وثائق المشروع"""
+        return self.storage.count_project_documents(project_id)
+    
+    def iter_project_documents(self, project_id: str, batch_size: int = 100) -> Iterator[TranslationDocument]:
+        """المرور على وثائق المشروع تدريجياً (مثلاً أثناء تصدير PDF)"""
+        return self.storage.iter_project_documents(project_id, batch_size=batch_size)
     
     def get_all_projects(self) -> List[TranslationProject]:
         """الحصول على جميع المشاريع"""
-        return list(self.projects.values())
+        return self.storage.list_projects()
     
     def get_all_translators(self) -> List[Translator]:
         """الحصول على جميع المترجمين"""
-        return list(self.translators.values())
-
-
-
+        return self.storage.list_translators()
+    
+    def close(self):
+        """إغلاق طبقة التخزين"""
+        self.storage.close()
@@ -0,0 +1,118 @@
+"""
+نظام الترجمة المكتبي - ذاكرة ملفات PDF المعروضة
+Translation Office System - Rendered PDF Artifact Cache
+"""
+
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+from config import PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES
+
+
+_SAFE_ID = re.compile(r'[^A-Za-z0-9_-]')
+
+
+class PDFArtifactCache:
+    """ذاكرة على القرص لملفات PDF مفتاحها بصمة مدخلات العرض
+
+    الملف يُخزن باسم {معرف المشروع}.{البصمة}.pdf، فإذا تغيّر أي مدخل
+    (المحتوى، المترجم، إصدار النموذج، إعدادات التخطيط) تتغير البصمة ولا
+    تُستخدم النسخة القديمة. البحث مسار مباشر O(1). عند تجاوز الحجم الأقصى
+    تُحذف الملفات الأقدم استخداماً.
+    """
+
+    def __init__(self, cache_dir: Path = PDF_CACHE_DIR, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # العدادات تُحدَّث من خيوط الطلبات وخيوط انتهاء المهام معاً
+        self._stats_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _prefix(project_id: str) -> str:
+        return _SAFE_ID.sub('_', project_id)
+
+    def path(self, project_id: str, digest: str) -> Path:
+        """مسار نسخة PDF لبصمة معينة"""
+        return self.cache_dir / f"{self._prefix(project_id)}.{digest}.pdf"
+
+    def lookup(self, project_id: str, digest: str) -> Optional[Path]:
+        """النسخة المخزنة إن وُجدت (مع تحديث وقت الاستخدام)"""
+        path = self.path(project_id, digest)
+        try:
+            os.utime(path)
+        except OSError:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return path
+
+    def store(self, project_id: str, digest: str, source: Union[str, Path, bytes]) -> Path:
+        """حفظ PDF (من مسار ملف أو من بايتات في الذاكرة) واستبدال نسخ المشروع القديمة"""
+        path = self.path(project_id, digest)
+        tmp_path = path.with_suffix('.pdf.tmp')
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            tmp_path.write_bytes(source)
+        else:
+            try:
+                # رابط صلب دون نسخ إن كان الملف على نفس القرص
+                os.link(source, tmp_path)
+            except OSError:
+                shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, path)
+        self._count('stores')
+
+        self.invalidate(project_id, keep=path)
+        self.evict(keep=path)
+        return path
+
+    def invalidate(self, project_id: str, keep: Optional[Path] = None) -> int:
+        """حذف نسخ PDF المخزنة لمشروع (عند تعديله أو رفع ملف جديد له)"""
+        removed = 0
+        for path in self.cache_dir.glob(f"{self._prefix(project_id)}.*.pdf"):
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def evict(self, keep: Optional[Path] = None):
+        """حذف الملفات الأقدم استخداماً حتى يعود الحجم تحت الحد"""
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob('*.pdf'):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    path.unlink()
+                    total -= size
+                    self._count('evictions')
+                except OSError:
+                    pass
+
+
+# ذاكرة مشتركة على مستوى العملية
+pdf_artifacts = PDFArtifactCache()
@@ -0,0 +1,111 @@
+"""
+نظام الترجمة المكتبي - استخراج نص PDF بالتوازي صفحة بصفحة
+Translation Office System - Page-Parallel PDF Text Extraction
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, Callable, Dict, Iterator, List, Tuple
+
+import PyPDF2
+
+from config import EXTRACT_WORKERS, EXTRACT_SHARD_PAGES, PDF_PARALLEL_MIN_PAGES
+
+
+# (رقم الصفحة من 0، نص الصفحة)
+PageText = Tuple[int, str]
+
+# دالة التقدم: (الصفحات المنجزة، الإجمالي)
+ProgressCallback = Callable[[int, int], None]
+
+# قارئ واحد لكل عملية عاملة: (المسار، وقت التعديل، القارئ)
+_reader = None
+
+
+def _open_reader(file_path: str) -> PyPDF2.PdfReader:
+    """فتح الملف مرة واحدة في العملية العاملة لكل المهام التي تخصه"""
+    global _reader
+    mtime = os.path.getmtime(file_path)
+    if _reader is None or _reader[0] != file_path or _reader[1] != mtime:
+        _reader = (file_path, mtime, PyPDF2.PdfReader(file_path))
+    return _reader[2]
+
+
+def page_text(page) -> str:
+    try:
+        return page.extract_text() or ''
+    except Exception as e:
+        # صفحة تالفة لا توقف استخراج بقية الملف
+        print(f"تعذر استخراج نص صفحة: {e}")
+        return ''
+
+
+def extract_page_range(file_path: str, start: int, stop: int) -> List[PageText]:
+    """نص الصفحات [start, stop) (تُنفَّذ داخل عملية عاملة)"""
+    reader = _open_reader(file_path)
+    return [(page_number, page_text(reader.pages[page_number])) for page_number in range(start, stop)]
+
+
+def iter_pdf_pages(file_path: str,
+                   workers: int = EXTRACT_WORKERS,
+                   shard_pages: int = EXTRACT_SHARD_PAGES,
+                   progress: Optional[ProgressCallback] = None) -> Iterator[PageText]:
+    """نص صفحات PDF بالترتيب، يُسلَّم كل جزء فور جاهزيته
+
+    الصفحات تُقسم إلى مجموعات من shard_pages صفحة تُوزع على مجمّع عمليات.
+    عدد المجموعات قيد التنفيذ أو المنتظرة للتسليم لا يتجاوز ضعف عدد
+    العمليات، فتبقى الذاكرة محدودة مهما كان عدد الصفحات. الملفات الصغيرة
+    (أقل من PDF_PARALLEL_MIN_PAGES) تُستخرج مباشرة دون مجمّع.
+    """
+    file_path = str(file_path)
+    reader = PyPDF2.PdfReader(file_path)
+    total = len(reader.pages)
+
+    if workers <= 1 or total < PDF_PARALLEL_MIN_PAGES:
+        for page_number, page in enumerate(reader.pages):
+            yield page_number, page_text(page)
+            if progress:
+                progress(page_number + 1, total)
+        return
+    del reader
+
+    shards = iter(range(0, total, shard_pages))
+    window = max(1, workers) * 2
+    pending: Dict = {}
+    ready: Dict[int, List[PageText]] = {}
+    next_start = 0
+    done = 0
+
+    executor = ProcessPoolExecutor(max_workers=max(1, min(workers, -(-total // shard_pages))))
+    finished_cleanly = False
+
+    def fill_window():
+        while len(pending) + len(ready) < window:
+            start = next(shards, None)
+            if start is None:
+                return
+            future = executor.submit(extract_page_range, file_path, start, min(start + shard_pages, total))
+            pending[future] = start
+
+    try:
+        fill_window()
+        while pending or ready:
+            if next_start not in ready:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    ready[pending.pop(future)] = future.result()
+
+            # التسليم بالترتيب؛ ما ينتهي مبكراً ينتظر في ready
+            while next_start in ready:
+                for page in ready.pop(next_start):
+                    yield page
+                    done += 1
+                    if progress:
+                        progress(done, total)
+                next_start += shard_pages
+            fill_window()
+
+        finished_cleanly = True
+    finally:
+        # إذا توقف المستهلك مبكراً تُلغى المهام التي لم تبدأ
+        executor.shutdown(wait=finished_cleanly, cancel_futures=not finished_cleanly)
@@ -3,20 +3,14 @@
 Translation Office System - PDF Generator
 """
 
+import io
 import os
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union, BinaryIO, Iterator
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT, TA_JUSTIFY
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle, Image
+from reportlab.platypus import Flowable, Paragraph, Spacer, PageBreak, Table, TableStyle, Image
 from reportlab.lib import colors
-from reportlab.pdfgen import canvas
-from reportlab.lib.fonts import addMapping
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-import qrcode
 from datetime import datetime
 import uuid
 
@@ -30,6 +24,12 @@ from config import (
     COMPANY_NAME,
     COMPANY_LOGO
 )
+from qr_cache import qr_cache
+from pdf_styles import pdf_styles
+from rtl_text import rtl_text
+from pdf_stream import StreamingDocTemplate, iter_text_flowables
+from pdf_stamp import pdf_stamper, certification_lines, is_pdf_file
+from lazy_document import open_document
 
 
 class PDFGenerator:
@@ -37,232 +37,162 @@ class PDFGenerator:
     
     def __init__(self):
         self.page_width, self.page_height = A4
+        # عرض إطار النص، لتقسيم الأسطر العربية قبل تشكيلها
+        self.text_width = self.page_width - (PDF_MARGIN_LEFT + PDF_MARGIN_RIGHT) * cm
         self._setup_fonts()
         self._setup_styles()
     
     def _setup_fonts(self):
-        """إعداد الخطوط العربية"""
-        try:
-            # محاولة إضافة خط عربي (يجب تثبيت الخط أولاً)
-            arabic_font_path = "fonts/arabic.ttf"  # مسار الخط العربي
-            if Path(arabic_font_path).exists():
-                pdfmetrics.registerFont(TTFont('Arabic', arabic_font_path))
-                addMapping('Arabic', 0, 0, 'Arabic')
-        except:
-            # استخدام الخط الافتراضي إذا لم يتوفر الخط العربي
-            pass
+        """إعداد الخطوط العربية (تُسجَّل مرة واحدة لكل عملية)"""
+        self.font_name = pdf_styles.ensure_fonts()
     
     def _setup_styles(self):
-        """إعداد أنماط النص"""
-        self.styles = getSampleStyleSheet()
-        
-        # نمط العنوان الرئيسي
-        self.styles.add(ParagraphStyle(
-            name='ArabicTitle',
-            parent=self.styles['Title'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Arabic' if 'Arabic' in pdfmetrics.getRegisteredFontNames() else 'Helvetica'
-        ))
-        
-        # نمط العنوان الفرعي
-        self.styles.add(ParagraphStyle(
-            name='ArabicHeading',
-            parent=self.styles['Heading1'],
-            fontSize=14,
-            spaceAfter=20,
-            alignment=TA_RIGHT,
-            fontName='Arabic' if 'Arabic' in pdfmetrics.getRegisteredFontNames() else 'Helvetica'
-        ))
-        
-        # نمط النص العادي
-        self.styles.add(ParagraphStyle(
-            name='ArabicNormal',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            spaceAfter=12,
-            alignment=TA_JUSTIFY,
-            fontName='Arabic' if 'Arabic' in pdfmetrics.getRegisteredFontNames() else 'Helvetica'
-        ))
-        
-        # نمط معلومات المشروع
-        self.styles.add(ParagraphStyle(
-            name='ProjectInfo',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=8,
-            alignment=TA_RIGHT,
-            fontName='Arabic' if 'Arabic' in pdfmetrics.getRegisteredFontNames() else 'Helvetica'
-        ))
+        """أنماط النص المشتركة (تُبنى مرة واحدة ولا تُعدَّل)"""
+        self.styles = pdf_styles.stylesheet()
     
-    def generate_final_pdf(self, project_data: Dict[str, Any], output_path: str) -> bool:
-        """إنشاء PDF نهائي صفحتان فقط: 1) الترجمة + صندوق الاعتماد + QR، 2) المستند الأصلي"""
+    def _paragraph(self, text: str, style_name: str) -> Paragraph:
+        """فقرة يُشكَّل نصها العربي ويُرتب من اليمين لليسار"""
+        return self._make_paragraph(text, self.styles[style_name])
+    
+    def _make_paragraph(self, text: str, style) -> Paragraph:
+        return rtl_text.paragraph(text, style, self.text_width)
+    
+    def generate_final_pdf(self, project_data: Dict[str, Any], output_path: Union[str, BinaryIO]) -> bool:
+        """إنشاء PDF نهائي صفحتان فقط: 1) الترجمة + صندوق الاعتماد + QR، 2) المستند الأصلي
+
+        output_path مسار ملف أو كائن ملف قابل للكتابة (مثل BytesIO).
+        إذا كان original_file_path ملف PDF تُلحق صفحاته الحقيقية مختومة
+        (QR وصندوق اعتماد وأرقام صفحات) بدلاً من نصه المستخرج.
+        """
         try:
-            doc = SimpleDocTemplate(
-                output_path,
-                pagesize=A4,
-                leftMargin=PDF_MARGIN_LEFT * cm,
-                rightMargin=PDF_MARGIN_RIGHT * cm,
-                topMargin=PDF_MARGIN_TOP * cm,
-                bottomMargin=PDF_MARGIN_BOTTOM * cm
-            )
+            original_pdf = project_data.get('original_file_path')
+            if is_pdf_file(original_pdf):
+                translation = io.BytesIO()
+                self._build_final_pdf(project_data, translation, include_original=False)
+                translation.seek(0)
+                return pdf_stamper.stamp(
+                    original_pdf, output_path,
+                    qr_data=self._generate_qr_data(project_data),
+                    certification=certification_lines(project_data),
+                    leading=translation
+                )
             
-            story = []
+            self._build_final_pdf(project_data, output_path)
+            return True
+            
+        except Exception as e:
+            print(f"خطأ في إنشاء PDF: {e}")
+            return False
+    
+    def _build_final_pdf(self, project_data: Dict[str, Any], output_path: Union[str, BinaryIO],
+                         include_original: bool = True):
+        doc = StreamingDocTemplate(
+            output_path,
+            pagesize=A4,
+            leftMargin=PDF_MARGIN_LEFT * cm,
+            rightMargin=PDF_MARGIN_RIGHT * cm,
+            topMargin=PDF_MARGIN_TOP * cm,
+            bottomMargin=PDF_MARGIN_BOTTOM * cm
+        )
+        
+        # بناء PDF (القصة تُنشأ أثناء البناء ولا تُحمّل كاملة في الذاكرة)
+        doc.build(self._iter_final_story(project_data, include_original))
+    
+    def _iter_final_story(self, project_data: Dict[str, Any], include_original: bool = True) -> Iterator[Flowable]:
+        """عناصر الوثيقة النهائية بالترتيب، تُنشأ عند الطلب"""
+        # صفحة 1: الترجمة + صندوق الاعتماد + QR في الأسفل
+        if COMPANY_LOGO.exists():
+            yield self._create_logo_paragraph()
+            yield Spacer(1, 10)
 
-            # صفحة 1: الترجمة + صندوق الاعتماد + QR في الأسفل
-            if COMPANY_LOGO.exists():
-                story.append(self._create_logo_paragraph())
-                story.append(Spacer(1, 10))
+        yield self._paragraph("الترجمة", 'ArabicHeading')
+        yield Spacer(1, 10)
 
-            title = Paragraph("الترجمة", self.styles['ArabicHeading'])
-            story.append(title)
-            story.append(Spacer(1, 10))
+        yield from self._create_translation_section(project_data)
+        yield Spacer(1, 12)
 
-            story.extend(self._create_translation_section(project_data))
-            story.append(Spacer(1, 12))
+        # صندوق الاعتماد
+        yield from self._create_certification_section(project_data)
 
-            # صندوق الاعتماد
-            story.extend(self._create_certification_section(project_data))
+        # QR Code بجانب الصندوق يسار الصفحة (من الذاكرة مباشرة دون ملف مؤقت)
+        try:
+            qr_data = self._generate_qr_data(project_data)
+            qr_image = Image(self._create_qr_code(qr_data), width=QR_CODE_SIZE, height=QR_CODE_SIZE)
+        except Exception as e:
+            print(f"خطأ في إنشاء QR Code: {e}")
+        else:
+            yield Spacer(1, 8)
+            yield qr_image
 
-            # QR Code بجانب الصندوق يسار الصفحة
-            try:
-                qr_data = self._generate_qr_data(project_data)
-                qr_image = self._create_qr_code(qr_data)
-                qr_temp_path = Path(output_path).parent / f"qr_{uuid.uuid4().hex}.png"
-                qr_image.save(qr_temp_path)
-                story.append(Spacer(1, 8))
-                story.append(Image(str(qr_temp_path), width=QR_CODE_SIZE, height=QR_CODE_SIZE))
-                # سيتم حذف الملف المؤقت بعد البناء
-                temp_to_cleanup = [qr_temp_path]
-            except Exception:
-                temp_to_cleanup = []
+        if not include_original:
+            return
 
-            story.append(PageBreak())
+        yield PageBreak()
 
-            # صفحة 2: المستند الأصلي
-            heading = Paragraph("المستند الأصلي", self.styles['ArabicHeading'])
-            story.append(heading)
-            story.append(Spacer(1, 10))
-            story.extend(self._create_original_document_section(project_data))
-            
-            # بناء PDF
-            doc.build(story)
+        # صفحة 2: المستند الأصلي
+        yield self._paragraph("المستند الأصلي", 'ArabicHeading')
+        yield Spacer(1, 10)
+        yield from self._create_original_document_section(project_data)
+    
+    def render_final_pdf(self, project_data: Dict[str, Any]) -> Optional[io.BytesIO]:
+        """عرض الوثيقة النهائية في الذاكرة دون ملفات مؤقتة
 
-            # تنظيف صور QR المؤقتة
-            for p in temp_to_cleanup:
-                try:
-                    if p.exists():
-                        p.unlink()
-                except Exception:
-                    pass
-            
-            return True
-            
-        except Exception as e:
-            print(f"خطأ في إنشاء PDF: {e}")
-            return False
+        يُرجع BytesIO مؤشره في البداية، جاهز لـ send_file أو الرفع إلى Drive
+        أو الكتابة في أرشيف ZIP (getbuffer() للوصول دون نسخ).
+        """
+        buffer = io.BytesIO()
+        if not self.generate_final_pdf(project_data, buffer):
+            return None
+        buffer.seek(0)
+        return buffer
     
     def _create_logo_paragraph(self) -> Paragraph:
         """إنشاء فقرة الشعار"""
         logo_text = f"<img src='{COMPANY_LOGO}' width='100' height='50'/>"
         return Paragraph(logo_text, self.styles['ArabicNormal'])
     
-    def _create_project_info_section(self, project_data: Dict[str, Any]) -> list:
-        """إنشاء قسم معلومات المشروع"""
-        story = []
-        
-        # عنوان القسم
-        heading = Paragraph("معلومات المشروع", self.styles['ArabicHeading'])
-        story.append(heading)
-        story.append(Spacer(1, 15))
-        
-        # معلومات العميل
-        client_info = [
-            f"اسم العميل: {project_data.get('client_name', '')}",
-            f"البريد الإلكتروني: {project_data.get('client_email', '')}"
-        ]
-        
-        for info in client_info:
-            story.append(Paragraph(info, self.styles['ProjectInfo']))
-        
-        story.append(Spacer(1, 10))
-        
-        # معلومات الترجمة
-        translation_info = [
-            f"اللغة المصدر: {project_data.get('source_language', '')}",
-            f"اللغة الهدف: {project_data.get('target_language', '')}",
-            f"تاريخ الترجمة: {project_data.get('translation_date', '')}"
-        ]
-        
-        for info in translation_info:
-            story.append(Paragraph(info, self.styles['ProjectInfo']))
-        
-        story.append(Spacer(1, 10))
-        
-        # معلومات المترجم
-        translator_info = [
-            f"المترجم: {project_data.get('translator_name', '')}",
-            f"رقم الترخيص: {project_data.get('translator_license', '')}"
-        ]
-        
-        for info in translator_info:
-            story.append(Paragraph(info, self.styles['ProjectInfo']))
-        
-        return story
-    
-    def _create_translation_section(self, project_data: Dict[str, Any]) -> list:
-        """إنشاء قسم الترجمة"""
-        story = []
-        
+    def _create_translation_section(self, project_data: Dict[str, Any]) -> Iterator[Flowable]:
+        """إنشاء قسم الترجمة (فقرة بعد فقرة، دون تحميل القسم كاملاً)"""
         # عنوان القسم
-        heading = Paragraph("الترجمة", self.styles['ArabicHeading'])
-        story.append(heading)
-        story.append(Spacer(1, 15))
+        yield self._paragraph("الترجمة", 'ArabicHeading')
+        yield Spacer(1, 15)
         
         # محتوى الترجمة
-        translated_content = project_data.get('translated_content', '')
-        if translated_content:
-            paragraphs = translated_content.split('\n')
-            for para_text in paragraphs:
-                if para_text.strip():
-                    story.append(Paragraph(para_text, self.styles['ArabicNormal']))
-                    story.append(Spacer(1, 8))
-        
-        return story
+        yield from iter_text_flowables(project_data.get('translated_content', ''), self.styles['ArabicNormal'],
+                                       make_paragraph=self._make_paragraph)
     
-    def _create_original_document_section(self, project_data: Dict[str, Any]) -> list:
-        """إنشاء قسم المستند الأصلي"""
-        story = []
-        
+    def _create_original_document_section(self, project_data: Dict[str, Any]) -> Iterator[Flowable]:
+        """إنشاء قسم المستند الأصلي (فقرة بعد فقرة، دون تحميل القسم كاملاً)"""
         # عنوان القسم
-        heading = Paragraph("المستند الأصلي", self.styles['ArabicHeading'])
-        story.append(heading)
-        story.append(Spacer(1, 15))
+        yield self._paragraph("المستند الأصلي", 'ArabicHeading')
+        yield Spacer(1, 15)
         
-        # محتوى المستند الأصلي
+        # محتوى المستند الأصلي؛ بدون نص محفوظ تُسحب الصفحات من الملف واحدة تلو الأخرى
         original_content = project_data.get('original_content', '')
-        if original_content:
-            paragraphs = original_content.split('\n')
-            for para_text in paragraphs:
-                if para_text.strip():
-                    story.append(Paragraph(para_text, self.styles['ArabicNormal']))
-                    story.append(Spacer(1, 8))
+        original_file = project_data.get('original_file_path')
+        document = open_document(original_file) if not original_content and original_file else None
+        if document is None:
+            yield from iter_text_flowables(original_content, self.styles['ArabicNormal'],
+                                           make_paragraph=self._make_paragraph)
+            return
         
-        return story
+        with document:
+            for _, page in document.iter_pages():
+                yield from iter_text_flowables(page, self.styles['ArabicNormal'],
+                                               make_paragraph=self._make_paragraph)
     
     def _create_certification_section(self, project_data: Dict[str, Any]) -> list:
         """إنشاء قسم اعتماد المترجم"""
         story = []
         
         # عنوان القسم
-        heading = Paragraph("اعتماد المترجم المحلف", self.styles['ArabicHeading'])
+        heading = self._paragraph("اعتماد المترجم المحلف", 'ArabicHeading')
         story.append(heading)
         story.append(Spacer(1, 20))
         
         # نص الاعتماد
         certification_text = "أعتمد أنا الموقع أدناه، المترجم المحلف، أن الترجمة المرفقة صحيحة ومطابقة للمستند الأصلي."
-        story.append(Paragraph(certification_text, self.styles['ArabicNormal']))
+        story.append(self._paragraph(certification_text, 'ArabicNormal'))
         story.append(Spacer(1, 20))
         
         # معلومات المترجم في جدول
@@ -273,11 +203,13 @@ class PDFGenerator:
             ['اللغة الهدف:', project_data.get('target_language', '')],
             ['تاريخ الاعتماد:', project_data.get('certification_date', '')]
         ]
+        translator_data = [[rtl_text.shape(str(cell or ''), self.font_name) for cell in row]
+                           for row in translator_data]
         
         table = Table(translator_data, colWidths=[4*cm, 8*cm])
         table.setStyle(TableStyle([
             ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Arabic' if 'Arabic' in pdfmetrics.getRegisteredFontNames() else 'Helvetica'),
+            ('FONTNAME', (0, 0), (-1, -1), self.font_name),
             ('FONTSIZE', (0, 0), (-1, -1), 11),
             ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
             ('GRID', (0, 0), (-1, -1), 1, colors.black)
@@ -288,32 +220,15 @@ class PDFGenerator:
         
         # مساحة للتوقيع
         signature_text = "التوقيع: _________________"
-        story.append(Paragraph(signature_text, self.styles['ArabicNormal']))
+        story.append(self._paragraph(signature_text, 'ArabicNormal'))
         
         return story
     
-    def _add_qr_code_to_pdf(self, pdf_path: str, project_data: Dict[str, Any]):
-        """إضافة QR Code إلى PDF"""
-        try:
-            # إنشاء QR Code
-            qr_data = self._generate_qr_data(project_data)
-            qr_image = self._create_qr_code(qr_data)
-            
-            # حفظ QR Code مؤقتاً
-            qr_temp_path = Path(pdf_path).parent / f"qr_temp_{uuid.uuid4().hex}.png"
-            qr_image.save(qr_temp_path)
-            
-            # إضافة QR Code إلى PDF
-            c = canvas.Canvas(pdf_path, pagesize=A4)
-            c.drawImage(str(qr_temp_path), 50, 50, width=QR_CODE_SIZE, height=QR_CODE_SIZE)
-            c.save()
-            
-            # حذف الملف المؤقت
-            if qr_temp_path.exists():
-                qr_temp_path.unlink()
-            
-        except Exception as e:
-            print(f"خطأ في إضافة QR Code: {e}")
+    def _add_qr_code_to_pdf(self, pdf_path: str, project_data: Dict[str, Any]) -> bool:
+        """ختم QR Code على آخر صفحة من PDF موجود (دون استبدال محتواه)"""
+        return pdf_stamper.stamp_file(
+            pdf_path, qr_data=self._generate_qr_data(project_data), page_numbers=False
+        )
     
     def _generate_qr_data(self, project_data: Dict[str, Any]) -> str:
         """توليد بيانات QR Code"""
@@ -321,23 +236,14 @@ class PDFGenerator:
         verification_url = f"{QR_CODE_BASE_URL}{project_id}"
         return verification_url
     
-    def _create_qr_code(self, data: str) -> Any:
-        """إنشاء QR Code"""
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
-        
-        return qr.make_image(fill_color="black", back_color="white")
+    def _create_qr_code(self, data: str) -> io.BytesIO:
+        """إنشاء QR Code كصورة PNG في الذاكرة (من الذاكرة المؤقتة المشتركة)"""
+        return qr_cache.get_stream(data, box_size=10, border=4, error_correction='L')
     
-    def create_simple_pdf(self, content: str, output_path: str, title: str = "وثيقة") -> bool:
+    def create_simple_pdf(self, content: str, output_path: Union[str, BinaryIO], title: str = "وثيقة") -> bool:
         """إنشاء PDF بسيط"""
         try:
-            doc = SimpleDocTemplate(
+            doc = StreamingDocTemplate(
                 output_path,
                 pagesize=A4,
                 leftMargin=2*cm,
@@ -346,22 +252,19 @@ class PDFGenerator:
                 bottomMargin=2*cm
             )
             
-            story = []
-            
-            # إضافة العنوان
-            title_para = Paragraph(title, self.styles['ArabicTitle'])
-            story.append(title_para)
-            story.append(Spacer(1, 20))
+            def make_paragraph(text, style):
+                return rtl_text.paragraph(text, style, doc.width)
             
-            # إضافة المحتوى
-            paragraphs = content.split('\n')
-            for para_text in paragraphs:
-                if para_text.strip():
-                    story.append(Paragraph(para_text, self.styles['ArabicNormal']))
-                    story.append(Spacer(1, 8))
+            def story():
+                # إضافة العنوان
+                yield make_paragraph(title, self.styles['ArabicTitle'])
+                yield Spacer(1, 20)
+                
+                # إضافة المحتوى
+                yield from iter_text_flowables(content, self.styles['ArabicNormal'], make_paragraph=make_paragraph)
             
             # بناء PDF
-            doc.build(story)
+            doc.build(story())
             return True
             
         except Exception as e:
@@ -0,0 +1,245 @@
+"""
+نظام الترجمة المكتبي - ختم ملفات PDF الأصلية (QR والاعتماد وأرقام الصفحات)
+Translation Office System - Incremental PDF Stamping
+"""
+
+import io
+import os
+from typing import Optional, List, Dict, Any, Sequence, Tuple, Union, BinaryIO
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, NameObject
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas
+
+from config import QR_CODE_SIZE
+from pdf_styles import pdf_styles
+from qr_cache import qr_cache
+from rtl_text import rtl_text
+
+
+PDFSource = Union[str, BinaryIO]
+
+PAGE_NUMBER_FONT_SIZE = 9
+CERTIFICATION_FONT_SIZE = 9
+CERTIFICATION_BOX_WIDTH = 8 * cm
+
+
+def is_pdf_file(path: Optional[str]) -> bool:
+    """هل المسار ملف PDF موجود"""
+    return bool(path) and str(path).lower().endswith('.pdf') and os.path.isfile(path)
+
+
+def certification_lines(project_data: Dict[str, Any]) -> List[str]:
+    """أسطر صندوق الاعتماد المختصر الذي يُختم على المستند الأصلي"""
+    lines = ["ترجمة معتمدة - مطابقة للأصل"]
+    if project_data.get('translator_name'):
+        lines.append(f"المترجم المحلف: {project_data['translator_name']}")
+    if project_data.get('translator_license'):
+        lines.append(f"رقم الترخيص: {project_data['translator_license']}")
+    date = project_data.get('certification_date') or project_data.get('created_at')
+    if date:
+        lines.append(f"تاريخ الاعتماد: {date}")
+    return lines
+
+
+def _page_geometry(page) -> Tuple[float, float, List[float]]:
+    """العرض والارتفاع كما تظهر الصفحة، ومصفوفة تحويلها إلى إحداثيات الصفحة
+
+    الختم يُرسم بإحداثيات الصفحة المعروضة، فإذا كانت الصفحة مدوّرة (/Rotate)
+    تُدار طبقة الختم معها حتى تظهر مستقيمة.
+    """
+    box = page.mediabox
+    left, bottom = float(box.left), float(box.bottom)
+    width, height = float(box.width), float(box.height)
+    rotation = page.rotation % 360
+    if rotation == 90:
+        return height, width, [0, 1, -1, 0, left + width, bottom]
+    if rotation == 180:
+        return width, height, [-1, 0, 0, -1, left + width, bottom + height]
+    if rotation == 270:
+        return height, width, [0, -1, 1, 0, left, bottom + height]
+    return width, height, [1, 0, 0, 1, left, bottom]
+
+
+def _indirect(writer: PdfWriter, obj):
+    """إضافة كائن جديد إلى الملف كائناً غير مباشر وإرجاع مرجعه
+
+    PyPDF2 3.0 لا يوفر واجهة عامة لذلك، فالدالة الخاصة _add_object مستخدمة
+    هنا فقط، والإصدار مثبّت في requirements.txt.
+    """
+    return writer._add_object(obj)
+
+
+def _stream(writer: PdfWriter, data: bytes):
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    # عناصر مصفوفة /Contents يجب أن تكون كائنات غير مباشرة
+    return _indirect(writer, stream)
+
+
+class PDFStamper:
+    """ختم طبقة (QR، صندوق اعتماد، رقم صفحة) فوق صفحات PDF موجود
+
+    الطبقات تُرسم بـ ReportLab في ملف صغير واحد، ثم تُضاف كل طبقة إلى
+    صفحتها كـ Form XObject مع تدفق محتوى قصير "q ... Do Q". محتوى الصفحة
+    الأصلي وصورها (مثل المسح الضوئي) لا تُفك ولا يُعاد ترميزها، والصفحات
+    التي لا تحتاج ختماً تُنسخ كما هي بالمرجع، فيبقى الختم سريعاً والملف صغيراً.
+    """
+
+    def __init__(self):
+        self.font_name = pdf_styles.ensure_fonts()
+
+    def stamp(self, source: PDFSource, output: PDFSource,
+              qr_data: Optional[str] = None,
+              certification: Optional[Sequence[str]] = None,
+              page_numbers: bool = True,
+              stamp_page: int = -1,
+              leading: Optional[PDFSource] = None) -> bool:
+        """ختم source وكتابة الناتج إلى output (مسار أو كائن ملف)
+
+        qr_data و certification يُختمان على الصفحة stamp_page من source
+        (الأخيرة افتراضياً). leading صفحات تُوضع قبل الأصل (مثل صفحة الترجمة)
+        وتدخل في ترقيم الصفحات.
+        """
+        try:
+            pages = list(PdfReader(leading).pages) if leading is not None else []
+            original_start = len(pages)
+            pages.extend(PdfReader(source).pages)
+            total = len(pages)
+
+            stamp_index = None
+            if (qr_data or certification) and total > original_start:
+                stamp_index = original_start + (stamp_page % (total - original_start))
+
+            overlays = self._render_overlays(pages, total, page_numbers, stamp_index, qr_data, certification)
+
+            writer = PdfWriter()
+            for index, page in enumerate(pages):
+                written = writer.add_page(page)
+                overlay = overlays.get(index)
+                if overlay is not None:
+                    self._apply_overlay(writer, written, overlay, index)
+
+            writer.write(output)
+            return True
+
+        except Exception as e:
+            print(f"خطأ في ختم PDF: {e}")
+            return False
+
+    def stamp_file(self, pdf_path: str, **kwargs) -> bool:
+        """ختم ملف في مكانه (كتابة ملف مؤقت ثم استبدال ذري)"""
+        tmp_path = f"{pdf_path}.stamp"
+        if not self.stamp(pdf_path, tmp_path, **kwargs):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, pdf_path)
+        return True
+
+    def _render_overlays(self, pages, total: int, page_numbers: bool, stamp_index: Optional[int],
+                         qr_data: Optional[str], certification: Optional[Sequence[str]]) -> Dict[int, Any]:
+        """رسم طبقات الختم كلها في PDF واحد في الذاكرة: صفحة لكل صفحة مختومة"""
+        targets = [index for index in range(total) if page_numbers or index == stamp_index]
+        if not targets:
+            return {}
+
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer)
+        geometry = {}
+        for index in targets:
+            width, height, matrix = _page_geometry(pages[index])
+            geometry[index] = (width, height, matrix)
+            c.setPageSize((width, height))
+            if page_numbers:
+                self._draw_page_number(c, width, index + 1, total)
+            if index == stamp_index:
+                self._draw_stamp(c, width, qr_data, certification)
+            c.showPage()
+        c.save()
+
+        buffer.seek(0)
+        overlay_pages = PdfReader(buffer).pages
+        return {index: (overlay_pages[position], geometry[index])
+                for position, index in enumerate(targets)}
+
+    def _draw_page_number(self, c: canvas.Canvas, width: float, number: int, total: int):
+        text = rtl_text.shape(f"صفحة {number} من {total}", self.font_name)
+        c.setFont(self.font_name, PAGE_NUMBER_FONT_SIZE)
+        c.setFillColor(colors.black)
+        c.drawCentredString(width / 2, 0.8 * cm, text)
+
+    def _draw_stamp(self, c: canvas.Canvas, width: float,
+                    qr_data: Optional[str], certification: Optional[Sequence[str]]):
+        """QR في أسفل اليسار وصندوق الاعتماد في أسفل اليمين (بخلفية بيضاء فوق المسح)"""
+        margin = 1.5 * cm
+        bottom = 1.5 * cm
+
+        if qr_data:
+            c.drawImage(qr_cache.get_image_reader(qr_data), margin, bottom,
+                        width=QR_CODE_SIZE, height=QR_CODE_SIZE)
+
+        if certification:
+            leading = CERTIFICATION_FONT_SIZE * 1.5
+            box_height = leading * len(certification) + 0.5 * cm
+            box_left = width - margin - CERTIFICATION_BOX_WIDTH
+            c.setFillColor(colors.white)
+            c.setStrokeColor(colors.black)
+            c.rect(box_left, bottom, CERTIFICATION_BOX_WIDTH, box_height, stroke=1, fill=1)
+
+            c.setFillColor(colors.black)
+            c.setFont(self.font_name, CERTIFICATION_FONT_SIZE)
+            y = bottom + box_height - 0.25 * cm - CERTIFICATION_FONT_SIZE
+            for line in certification:
+                c.drawRightString(width - margin - 0.25 * cm, y, rtl_text.shape(line, self.font_name))
+                y -= leading
+
+    @staticmethod
+    def _apply_overlay(writer: PdfWriter, page, overlay, index: int):
+        """إضافة طبقة إلى صفحة دون لمس محتواها الأصلي"""
+        overlay_page, (width, height, matrix) = overlay
+
+        form = DecodedStreamObject()
+        form.set_data(overlay_page.get_contents().get_data())
+        # flate_encode لا ينسخ مفاتيح القاموس، لذلك تُضاف بعده
+        form = form.flate_encode()
+        form.update({
+            NameObject('/Type'): NameObject('/XObject'),
+            NameObject('/Subtype'): NameObject('/Form'),
+            NameObject('/BBox'): ArrayObject([FloatObject(0), FloatObject(0), FloatObject(width), FloatObject(height)]),
+            NameObject('/Matrix'): ArrayObject([FloatObject(value) for value in matrix]),
+            NameObject('/Resources'): overlay_page['/Resources'].get_object().clone(writer),
+        })
+        form_ref = _indirect(writer, form)
+
+        # نسخة سطحية من الموارد: الموارد قد تكون مشتركة بين عدة صفحات
+        resources = DictionaryObject(page.get('/Resources', DictionaryObject()).get_object())
+        xobjects = DictionaryObject(resources.get('/XObject', DictionaryObject()).get_object())
+        name = f'/TSStamp{index}'
+        while name in xobjects:
+            name += 'x'
+        xobjects[NameObject(name)] = form_ref
+        resources[NameObject('/XObject')] = xobjects
+        page[NameObject('/Resources')] = resources
+
+        contents = page.get('/Contents')
+        existing = []
+        if contents is not None:
+            resolved = contents.get_object()
+            if isinstance(resolved, ArrayObject):
+                existing = list(resolved)
+            elif contents is resolved:
+                existing = [_indirect(writer, resolved)]
+            else:
+                existing = [contents]
+
+        # q/Q حول المحتوى الأصلي حتى لا تؤثر حالته الرسومية على موضع الختم
+        page[NameObject('/Contents')] = ArrayObject(
+            [_stream(writer, b"q\n")] + existing + [_stream(writer, f"Q\nq {name} Do Q\n".encode('latin-1'))]
+        )
+
+
+# ختّام مشترك على مستوى العملية
+pdf_stamper = PDFStamper()
@@ -0,0 +1,153 @@
+"""
+نظام الترجمة المكتبي - بناء PDF بالتدفق للوثائق الطويلة
+Translation Office System - Streaming Paginated PDF Builder
+"""
+
+import re
+from typing import Callable, Dict, Iterable, Iterator, Any
+
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Flowable
+
+from config import PDF_STREAM_LOOKAHEAD, PDF_PARAGRAPH_CHUNK_CHARS
+
+
+class _FlowableFeed(list):
+    """قائمة flowables تُملأ من مولّد عند الحاجة
+
+    حلقة build في ReportLab تسأل len(flowables) قبل كل عنصر وتحذف العنصر
+    الأول بعد رسمه، فيبقى في الذاكرة عدد محدود (lookahead) من العناصر
+    بدلاً من القصة كاملة.
+    """
+
+    def __init__(self, source: Iterable[Flowable], lookahead: int):
+        super().__init__()
+        self._source = iter(source)
+        self._lookahead = max(2, lookahead)
+
+    def __len__(self) -> int:
+        while self._source is not None and list.__len__(self) < self._lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return list.__len__(self)
+
+
+class StreamingDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate يقبل مولّداً من flowables
+
+    كل flowable يُنشأ عند الحاجة ويُرسم ثم يُحرر؛ الصفحات المكتملة تُسلَّم
+    إلى الـ canvas فوراً، فلا تنمو ذاكرة التخطيط مع طول الوثيقة.
+    """
+
+    def __init__(self, filename, lookahead: int = PDF_STREAM_LOOKAHEAD, **kw):
+        self.lookahead = lookahead
+        super().__init__(filename, **kw)
+
+    def build(self, flowables, *args, **kwargs):
+        if not isinstance(flowables, list):
+            flowables = _FlowableFeed(flowables, self.lookahead)
+        return super().build(flowables, *args, **kwargs)
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """أسطر النص واحداً تلو الآخر دون إنشاء قائمة بكل الأسطر"""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+# وسم فتح/إغلاق أو مسافة (المسافات داخل الوسوم تُستهلك مع الوسم)
+_CUT_TOKENS = re.compile(r'<(/?)[^>]*?(/?)>| ')
+
+
+def _safe_cut(line: str, limit: int) -> int:
+    """آخر مسافة قبل limit خارج أي وسم أو عنصر تنسيق مفتوح (-1 إن لم توجد)"""
+    last_open = line.rfind('<', 0, limit)
+    if last_open > line.rfind('>', 0, limit):
+        limit = last_open
+    depth = 0
+    cut = -1
+    for match in _CUT_TOKENS.finditer(line, 0, limit):
+        if match.group(0) == ' ':
+            if depth == 0:
+                cut = match.start()
+        elif match.group(1):
+            depth -= 1
+        elif not match.group(2):
+            depth += 1
+    return cut
+
+
+def _next_safe_cut(line: str, start: int) -> int:
+    """أول مسافة من start فما بعد خارج أي وسم أو عنصر تنسيق مفتوح (-1 إن لم توجد)"""
+    depth = 0
+    for match in _CUT_TOKENS.finditer(line):
+        if match.group(0) == ' ':
+            if depth == 0 and match.start() >= start:
+                return match.start()
+        elif match.group(1):
+            depth -= 1
+        elif not match.group(2):
+            depth += 1
+    return -1
+
+
+def iter_chunks(line: str, max_chars: int = PDF_PARAGRAPH_CHUNK_CHARS) -> Iterator[str]:
+    """تقسيم فقرة طويلة جداً عند مسافة لا تقع داخل وسم مثل <b>...</b>
+
+    Paragraph ضخمة تُعاد تجزئتها عند كل صفحة، فتكلفتها تنمو مع مربع
+    طولها. القطع بحجم أقل من صفحة تُعالج مرة واحدة. إذا لم توجد مسافة آمنة
+    قبل max_chars (مثلاً عنصر <b> طويل يبدأ مبكراً) يُقطع عند أول مسافة آمنة
+    بعده، فتطول تلك القطعة وحدها ولا تبقى بقية الفقرة قطعة واحدة.
+    """
+    while len(line) > max_chars:
+        cut = _safe_cut(line, max_chars)
+        if cut <= 0:
+            cut = _next_safe_cut(line, max_chars)
+        if cut <= 0:
+            break
+        yield line[:cut]
+        line = line[cut + 1:].lstrip(' ')
+    if line:
+        yield line
+
+
+_continued_styles: Dict[int, ParagraphStyle] = {}
+
+
+def _continued(style: ParagraphStyle) -> ParagraphStyle:
+    """نمط القطع الداخلية من فقرة مقسمة (دون مسافة بين القطع)"""
+    continued = _continued_styles.get(id(style))
+    if continued is None:
+        continued = ParagraphStyle(f"{style.name}Continued", parent=style, spaceBefore=0, spaceAfter=0)
+        _continued_styles[id(style)] = continued
+    return continued
+
+
+def iter_text_flowables(text: str, style: ParagraphStyle,
+                        make_paragraph: Callable[[str, ParagraphStyle], Any] = Paragraph,
+                        gap: float = 8,
+                        max_chars: int = PDF_PARAGRAPH_CHUNK_CHARS) -> Iterator[Flowable]:
+    """flowables لنص طويل: فقرة لكل سطر غير فارغ، والفقرات الطويلة تُقسم
+
+    make_paragraph تُنشئ الفقرة (مثلاً rtl_text.paragraph للنص العربي).
+    gap مسافة إضافية بعد كل فقرة (0 لعدم إضافة Spacer).
+    """
+    for line in iter_lines(text or ''):
+        if not line.strip():
+            continue
+        chunks = iter_chunks(line, max_chars)
+        chunk = next(chunks)
+        for following in chunks:
+            yield make_paragraph(chunk, _continued(style))
+            chunk = following
+        yield make_paragraph(chunk, style)
+        if gap:
+            yield Spacer(1, gap)
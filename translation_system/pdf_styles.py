@@ -0,0 +1,132 @@
+"""
+نظام الترجمة المكتبي - سجل الخطوط وأنماط PDF المشتركة
+Translation Office System - Shared PDF Font And Style Registry
+"""
+
+import io
+import threading
+from pathlib import Path
+
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_JUSTIFY
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle, StyleSheet1
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from config import ARABIC_FONT_FILE
+
+
+ARABIC_FONT = 'Arabic'
+FALLBACK_FONT = 'Helvetica'
+
+
+class PDFStyleRegistry:
+    """تسجيل الخطوط وبناء الأنماط مرة واحدة لكل عملية
+
+    TTFont يقرأ جداول الخط ومقاييس الحروف عند التسجيل فقط، وReportLab
+    يضمّن في كل PDF مجموعة جزئية (subset) من الحروف المستخدمة فعلاً.
+    الأنماط تُشارك بين كل المولدات والطلبات، لذلك يجب عدم تعديلها؛ من
+    يحتاج نمطاً مختلفاً يُنشئ ParagraphStyle جديداً بـ parent منها.
+    """
+
+    def __init__(self, font_file: Path = ARABIC_FONT_FILE):
+        self.font_file = Path(font_file)
+        self._lock = threading.Lock()
+        self._fonts_ready = False
+        self._stylesheet = None
+        self._warm = False
+
+    def ensure_fonts(self) -> str:
+        """تسجيل الخط العربي (مرة واحدة) وإرجاع اسم الخط المستخدم"""
+        if not self._fonts_ready:
+            with self._lock:
+                if not self._fonts_ready:
+                    try:
+                        if self.font_file.exists() and ARABIC_FONT not in pdfmetrics.getRegisteredFontNames():
+                            pdfmetrics.registerFont(TTFont(ARABIC_FONT, str(self.font_file)))
+                            pdfmetrics.registerFontFamily(
+                                ARABIC_FONT, normal=ARABIC_FONT, bold=ARABIC_FONT,
+                                italic=ARABIC_FONT, boldItalic=ARABIC_FONT
+                            )
+                    except Exception as e:
+                        # استخدام الخط الافتراضي إذا تعذر تحميل الخط العربي
+                        print(f"تعذر تحميل الخط العربي {self.font_file}: {e}")
+                    self._fonts_ready = True
+        return self.font_name
+
+    @property
+    def font_name(self) -> str:
+        """اسم الخط العربي إن كان مسجلاً وإلا الخط الافتراضي"""
+        return ARABIC_FONT if ARABIC_FONT in pdfmetrics.getRegisteredFontNames() else FALLBACK_FONT
+
+    def stylesheet(self) -> StyleSheet1:
+        """ورقة الأنماط المشتركة (تُبنى عند أول طلب)"""
+        if self._stylesheet is None:
+            font_name = self.ensure_fonts()
+            with self._lock:
+                if self._stylesheet is None:
+                    self._stylesheet = self._build_stylesheet(font_name)
+        return self._stylesheet
+
+    def __getitem__(self, name: str) -> ParagraphStyle:
+        return self.stylesheet()[name]
+
+    @staticmethod
+    def _build_stylesheet(font_name: str) -> StyleSheet1:
+        styles = getSampleStyleSheet()
+
+        # أنماط PDFGenerator (الوثيقة النهائية المعتمدة)
+        styles.add(ParagraphStyle(
+            name='ArabicTitle', parent=styles['Title'],
+            fontSize=18, spaceAfter=30, alignment=TA_CENTER, fontName=font_name
+        ))
+        styles.add(ParagraphStyle(
+            name='ArabicHeading', parent=styles['Heading1'],
+            fontSize=14, spaceAfter=20, alignment=TA_RIGHT, fontName=font_name
+        ))
+        styles.add(ParagraphStyle(
+            name='ArabicNormal', parent=styles['Normal'],
+            fontSize=12, spaceAfter=12, alignment=TA_JUSTIFY, fontName=font_name
+        ))
+        styles.add(ParagraphStyle(
+            name='ProjectInfo', parent=styles['Normal'],
+            fontSize=11, spaceAfter=8, alignment=TA_RIGHT, fontName=font_name
+        ))
+
+        # أنماط PDF المبسط في simple_server
+        styles.add(ParagraphStyle(
+            name='SimpleTitle', parent=styles['Heading1'],
+            fontSize=18, spaceAfter=30, alignment=TA_CENTER, fontName=font_name
+        ))
+        styles.add(ParagraphStyle(
+            name='SimpleNormal', parent=styles['Normal'],
+            fontSize=12, spaceAfter=12, fontName=font_name
+        ))
+        return styles
+
+    def warm_up(self):
+        """تحميل الخطوط وبناء الأنماط وعرض صفحة صغيرة مسبقاً
+
+        يُستدعى عند بدء الخادم وفي مُهيّئ عمليات العرض، فلا يدفع أول طلب
+        PDF تكلفة قراءة الخط وتهيئة ReportLab.
+        """
+        if self._warm:
+            return
+        from reportlab.platypus import SimpleDocTemplate, Paragraph
+
+        styles = self.stylesheet()
+        try:
+            doc = SimpleDocTemplate(io.BytesIO())
+            doc.build([Paragraph("تهيئة warm-up", styles[name])
+                       for name in ('ArabicTitle', 'ArabicHeading', 'ArabicNormal', 'SimpleNormal')])
+        except Exception as e:
+            print(f"خطأ في تهيئة PDF: {e}")
+        self._warm = True
+
+
+# سجل مشترك على مستوى العملية
+pdf_styles = PDFStyleRegistry()
+
+
+def warm_up_pdf():
+    """مُهيّئ لعمليات العرض (قابل للتسلسل في ProcessPoolExecutor)"""
+    pdf_styles.warm_up()
@@ -0,0 +1,130 @@
+"""
+نظام الترجمة المكتبي - ذاكرة QR Code المؤقتة
+Translation Office System - Content-Addressed QR Code Cache
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import qrcode
+
+from config import QR_CACHE_DIR, QR_CACHE_MEMORY_ITEMS
+
+
+_ERROR_CORRECTION = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+
+
+class QRCodeCache:
+    """ذاكرة مؤقتة لصور QR بمستويين: LRU في الذاكرة + ملفات على القرص
+
+    المفتاح هو SHA-256 لمحتوى الرمز (رابط التحقق) ومعاملات الرسم، لذلك
+    الصورة نفسها لا تُرسم مرتين ويمكن استخدام المفتاح كـ ETag ثابت.
+    """
+
+    def __init__(self, cache_dir: Path = QR_CACHE_DIR, max_items: int = QR_CACHE_MEMORY_ITEMS):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_items = max_items
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'renders': 0}
+
+    @staticmethod
+    def key(data: str, box_size: int = 10, border: int = 4, error_correction: str = 'L',
+            fill_color: str = 'black', back_color: str = 'white') -> str:
+        """مفتاح المحتوى (يُستخدم أيضاً كـ ETag)"""
+        raw = f"{data}\0{box_size}\0{border}\0{error_correction}\0{fill_color}\0{back_color}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def etag(self, data: str, **params) -> str:
+        """ETag لصورة QR دون رسمها"""
+        return self.key(data, **params)
+
+    def get_png(self, data: str, **params) -> bytes:
+        """الحصول على صورة QR بصيغة PNG"""
+        cache_key = self.key(data, **params)
+
+        with self._lock:
+            png = self._memory.get(cache_key)
+            if png is not None:
+                self._memory.move_to_end(cache_key)
+                self.stats['memory_hits'] += 1
+                return png
+
+        path = self.cache_dir / f"{cache_key}.png"
+        try:
+            png = path.read_bytes()
+            self.stats['disk_hits'] += 1
+        except FileNotFoundError:
+            png = self._render(data, **params)
+            self.stats['renders'] += 1
+            self._write_disk(path, png)
+
+        self._remember(cache_key, png)
+        return png
+
+    def get_stream(self, data: str, **params) -> io.BytesIO:
+        """صورة QR ككائن ملف في الذاكرة (مناسب لـ platypus.Image و send_file)"""
+        return io.BytesIO(self.get_png(data, **params))
+
+    def get_image_reader(self, data: str, **params):
+        """صورة QR جاهزة لـ canvas.drawImage في ReportLab"""
+        from reportlab.lib.utils import ImageReader
+        return ImageReader(self.get_stream(data, **params))
+
+    def clear_memory(self):
+        """تفريغ مستوى الذاكرة فقط"""
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, cache_key: str, png: bytes):
+        with self._lock:
+            self._memory[cache_key] = png
+            self._memory.move_to_end(cache_key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    @staticmethod
+    def _write_disk(path: Path, png: bytes):
+        """كتابة ذرية حتى لا يقرأ خيط آخر ملفاً ناقصاً"""
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(png)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"تعذر حفظ QR في الذاكرة المؤقتة على القرص: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _render(data: str, box_size: int = 10, border: int = 4, error_correction: str = 'L',
+                fill_color: str = 'black', back_color: str = 'white') -> bytes:
+        """رسم صورة QR وإرجاعها كبايتات PNG"""
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=_ERROR_CORRECTION[error_correction],
+            box_size=box_size,
+            border=border,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+
+        img = qr.make_image(fill_color=fill_color, back_color=back_color)
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+
+# ذاكرة مشتركة على مستوى العملية
+qr_cache = QRCodeCache()
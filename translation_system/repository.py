@@ -0,0 +1,122 @@
+"""
+نظام الترجمة المكتبي - مستودع السجلات المفهرسة
+Translation Office System - Indexed Record Repository
+"""
+
+import threading
+from typing import Optional, List, Dict, Any, Iterable, Callable
+
+
+class Repository:
+    """مستودع سجلات في الذاكرة مع فهرس رئيسي وفهارس ثانوية
+
+    كل سجل قاموس (dict) يحمل حقل المعرف. البحث بالمعرف O(1)،
+    والبحث بقيمة حقل مفهرس O(1) + عدد النتائج.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = (), id_field: str = 'id',
+                 indexes: Iterable[str] = ()):
+        self.id_field = id_field
+        self.index_fields = tuple(indexes)
+        self._lock = threading.RLock()
+        # الترتيب محفوظ في القاموس (ترتيب الإدراج)
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[Any, Dict[str, None]]] = {
+            field: {} for field in self.index_fields
+        }
+
+        for record in records:
+            self.add(record)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._records
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def _index_add(self, record: Dict[str, Any]):
+        """إضافة السجل إلى الفهارس الثانوية"""
+        record_id = record[self.id_field]
+        for field in self.index_fields:
+            bucket = self._indexes[field].setdefault(record.get(field), {})
+            bucket[record_id] = None
+
+    def _index_remove(self, record: Dict[str, Any]):
+        """إزالة السجل من الفهارس الثانوية"""
+        record_id = record[self.id_field]
+        for field in self.index_fields:
+            value = record.get(field)
+            bucket = self._indexes[field].get(value)
+            if bucket is not None:
+                bucket.pop(record_id, None)
+                if not bucket:
+                    del self._indexes[field][value]
+
+    def add(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """إضافة سجل جديد (أو استبدال سجل بنفس المعرف)"""
+        with self._lock:
+            record_id = record[self.id_field]
+            existing = self._records.get(record_id)
+            if existing is not None:
+                self._index_remove(existing)
+            self._records[record_id] = record
+            self._index_add(record)
+            return record
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """إضافة عدة سجلات تحت قفل واحد"""
+        with self._lock:
+            return [self.add(record) for record in records]
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        """الحصول على سجل بالمعرف"""
+        return self._records.get(record_id)
+
+    def update(self, record_id: str, **changes) -> Optional[Dict[str, Any]]:
+        """تحديث حقول سجل مع الحفاظ على تزامن الفهارس"""
+        with self._lock:
+            record = self._records.get(record_id)
+            if record is None:
+                return None
+
+            reindex = any(field in changes for field in self.index_fields)
+            if reindex:
+                self._index_remove(record)
+            record.update(changes)
+            if reindex:
+                self._index_add(record)
+            return record
+
+    def remove(self, record_id: str) -> Optional[Dict[str, Any]]:
+        """حذف سجل"""
+        with self._lock:
+            record = self._records.pop(record_id, None)
+            if record is not None:
+                self._index_remove(record)
+            return record
+
+    def find_by(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        """البحث عن السجلات بقيمة حقل مفهرس"""
+        if field not in self._indexes:
+            raise KeyError(f"الحقل غير مفهرس: {field}")
+        with self._lock:
+            ids = list(self._indexes[field].get(value, ()))
+            return [self._records[record_id] for record_id in ids]
+
+    def count_by(self, field: str, value: Any) -> int:
+        """عدد السجلات ذات قيمة معينة لحقل مفهرس"""
+        if field not in self._indexes:
+            raise KeyError(f"الحقل غير مفهرس: {field}")
+        return len(self._indexes[field].get(value, ()))
+
+    def filter(self, predicate: Callable[[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
+        """تصفية السجلات بشرط عام (مسح كامل)"""
+        return [record for record in self.all() if predicate(record)]
+
+    def all(self) -> List[Dict[str, Any]]:
+        """جميع السجلات بترتيب الإدراج"""
+        with self._lock:
+            return list(self._records.values())
@@ -0,0 +1,191 @@
+"""
+نظام الترجمة المكتبي - تشكيل النص العربي وترتيبه من اليمين لليسار
+Translation Office System - Arabic Shaping And Bidi Layout For PDF
+"""
+
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Optional, List, Dict, Any
+from xml.sax.saxutils import escape
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph
+
+from config import RTL_CACHE_SIZE
+
+try:
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+except ImportError:
+    arabic_reshaper = None
+    get_display = None
+
+
+# حروف الكتابة من اليمين لليسار (العبرية والعربية وأشكال العرض العربية)
+_RTL_CHARS = re.compile('[\u0590-\u08FF\uFB1D-\uFDFF\uFE70-\uFEFC]')
+_WORDS = re.compile(r'\S+')
+
+
+class RTLTextEngine:
+    """مرحلة تخطيط النص العربي قبل ReportLab
+
+    ReportLab يرسم الحروف كما هي من اليسار لليمين، فيظهر النص العربي
+    بحروف منفصلة ومعكوسة. هنا يُقسم النص المنطقي إلى أسطر حسب عرض الصفحة
+    (بقياس الحروف بعد تشكيلها)، ثم يُشكَّل كل سطر ويُرتب بخوارزمية bidi إلى
+    الترتيب المرئي. نتيجة كل سطر وعرض كل كلمة محفوظان في ذاكرة LRU مفتاحها
+    النص واسم الخط، فالبنود المتكررة في العقود لا تُعالج مرتين.
+
+    إذا لم تكن arabic_reshaper و python-bidi مثبتتين يُمرر النص كما هو.
+    """
+
+    def __init__(self, cache_size: int = RTL_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._reshapers: Dict[str, Any] = {}
+        self._visual_line = lru_cache(maxsize=cache_size)(self._shape_line)
+        self._word_width = lru_cache(maxsize=cache_size * 4)(self._measure_word)
+
+    @property
+    def available(self) -> bool:
+        return arabic_reshaper is not None and get_display is not None
+
+    @staticmethod
+    def needs_shaping(text: str) -> bool:
+        """هل يحتوي النص على حروف من اليمين لليسار"""
+        return bool(text) and _RTL_CHARS.search(text) is not None
+
+    def _reshaper(self, font_name: str):
+        """مُشكِّل خاص بالخط: يستخدم فقط الحروف المركبة (مثل لا) الموجودة فيه"""
+        reshaper = self._reshapers.get(font_name)
+        if reshaper is None:
+            with self._lock:
+                reshaper = self._reshapers.get(font_name)
+                if reshaper is None:
+                    reshaper = arabic_reshaper.default_reshaper
+                    from pdf_styles import pdf_styles, ARABIC_FONT
+                    if font_name == ARABIC_FONT and pdf_styles.font_file.exists():
+                        try:
+                            # يحتاج fonttools؛ بدونه نستخدم الإعداد الافتراضي
+                            config = arabic_reshaper.config_for_true_type_font(str(pdf_styles.font_file))
+                            reshaper = arabic_reshaper.ArabicReshaper(configuration=config)
+                        except Exception:
+                            pass
+                    self._reshapers[font_name] = reshaper
+        return reshaper
+
+    def _shape_line(self, line: str, font_name: str) -> str:
+        reshaped = self._reshaper(font_name).reshape(line)
+        return get_display(reshaped, base_dir='R')
+
+    def _measure_word(self, word: str, font_name: str, font_size: float) -> float:
+        if self.available and self.needs_shaping(word):
+            word = self._reshaper(font_name).reshape(word)
+        return stringWidth(word, font_name, font_size)
+
+    def shape(self, line: str, font_name: str) -> str:
+        """سطر واحد بالترتيب المرئي (مشكَّل ومرتب)"""
+        if not self.available or not self.needs_shaping(line):
+            return line
+        return self._visual_line(line, font_name)
+
+    def wrap(self, text: str, font_name: str, font_size: float, width: float) -> List[str]:
+        """تقسيم فقرة منطقية إلى أسطر لا يتجاوز عرضها width"""
+        space = stringWidth(' ', font_name, font_size)
+        lines = []
+        current: List[str] = []
+        current_width = 0.0
+        for word in _WORDS.findall(text):
+            word_width = self._word_width(word, font_name, font_size)
+            if current and current_width + space + word_width > width:
+                lines.append(' '.join(current))
+                current, current_width = [word], word_width
+            else:
+                current_width += (space if current else 0) + word_width
+                current.append(word)
+        if current:
+            lines.append(' '.join(current))
+        return lines
+
+    def layout(self, text: str, font_name: str, font_size: float, width: float) -> List[str]:
+        """أسطر الفقرة بالترتيب المرئي، جاهزة للرسم"""
+        return [self.shape(line, font_name) for line in self.wrap(text, font_name, font_size, width)]
+
+    def paragraph(self, text: str, style, width: Optional[float] = None) -> Paragraph:
+        """Paragraph من نص عادي؛ النص العربي يُقسم ويُشكَّل هنا ويُحاذى لليمين
+
+        النص غير العربي يُمرر إلى ReportLab كما كان. width هو عرض الإطار؛
+        بدونه يُشكَّل النص كسطر واحد ويترك التقسيم لـ ReportLab.
+        """
+        if not self.available or not self.needs_shaping(text):
+            return Paragraph(text, style)
+
+        if width is None:
+            lines = [self.shape(text, style.fontName)]
+        else:
+            lines = self.layout(text, style.fontName, style.fontSize, width)
+        return Paragraph('<br/>'.join(escape(line) for line in lines), _rtl_style(style))
+
+    def stats(self) -> Dict[str, Any]:
+        """إحصاءات الذاكرة (للقياس)"""
+        lines = self._visual_line.cache_info()
+        words = self._word_width.cache_info()
+        return {
+            'line_hits': lines.hits, 'line_misses': lines.misses, 'lines_cached': lines.currsize,
+            'word_hits': words.hits, 'word_misses': words.misses,
+        }
+
+    def clear(self):
+        self._visual_line.cache_clear()
+        self._word_width.cache_clear()
+
+
+_rtl_styles: Dict[int, Any] = {}
+
+
+def _rtl_style(style):
+    """نسخة من النمط محاذاة لليمين (تُنشأ مرة لكل نمط ولا يُعدَّل المشترك)"""
+    rtl = _rtl_styles.get(id(style))
+    if rtl is None:
+        from reportlab.lib.enums import TA_RIGHT
+        from reportlab.lib.styles import ParagraphStyle
+        rtl = ParagraphStyle(f"{style.name}RTL", parent=style, alignment=TA_RIGHT)
+        _rtl_styles[id(style)] = rtl
+    return rtl
+
+
+# محرك مشترك على مستوى العملية
+rtl_text = RTLTextEngine()
+
+
+def _benchmark(paragraphs: int = 2000):
+    """قياس التخطيط على عقد طويل: أول مرور (بارد) ثم مرور ثانٍ (من الذاكرة)"""
+    from reportlab.lib.units import cm
+    from pdf_styles import pdf_styles
+
+    clauses = [
+        "يلتزم الطرف الأول بتسليم الوثائق المترجمة خلال مدة لا تتجاوز عشرة أيام عمل من تاريخ الاستلام.",
+        "تخضع هذه الاتفاقية لأحكام القانون المعمول به، وتختص محاكم المدينة بالنظر في أي نزاع ينشأ عنها.",
+        "يحق للطرف الثاني طلب نسخة مصدقة إضافية مقابل رسوم قدرها 150 ليرة لكل صفحة.",
+        "البند رقم {n}: يقر الطرفان بأن جميع البيانات الواردة في المستند الأصلي صحيحة ومطابقة.",
+    ]
+    text = [clauses[i % 3] if i % 4 else clauses[3].format(n=i) for i in range(paragraphs)]
+    style = pdf_styles['ArabicNormal']
+    width = 17 * cm
+
+    if not rtl_text.available:
+        print("arabic_reshaper و python-bidi غير مثبتتين - لا يوجد ما يُقاس")
+        return
+
+    for label in ('بارد', 'من الذاكرة'):
+        start = time.perf_counter()
+        for para in text:
+            rtl_text.layout(para, style.fontName, style.fontSize, width)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {paragraphs} فقرة في {elapsed * 1000:.1f} ms")
+    print(rtl_text.stats())
+
+
+if __name__ == '__main__':
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,118 @@
+"""
+نظام الترجمة المكتبي - PDF المبسط لمشاريع simple_server
+Translation Office System - Simple Server Project PDF
+
+دوال العرض هنا تُرسل إلى مجمّعات العمليات (مهام PDF والتصدير بالجملة)،
+فالوحدة لا تنشئ عند استيرادها أي طوابير أو مجمّعات أو حالة دائمة.
+"""
+
+import io
+import os
+
+from pdf_styles import pdf_styles
+
+
+# مجلد الملفات المؤقتة في simple_server (الملفات المرفوعة وناتج PDF الافتراضي)
+UPLOAD_FOLDER = 'temp'
+
+
+def get_verification_url(project_id):
+    """رابط التحقق المضمَّن في QR code"""
+    return f"http://localhost:5000/verify/{project_id}"
+
+
+def create_simple_pdf(project, pdf_path=None):
+    """إنشاء PDF بسيط للمشروع"""
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import Spacer, PageBreak
+        from reportlab.lib.units import cm
+        from pdf_stream import StreamingDocTemplate, iter_text_flowables
+        from pdf_stamp import pdf_stamper, certification_lines, is_pdf_file
+        from rtl_text import rtl_text
+        
+        # إنشاء ملف PDF
+        if pdf_path is None:
+            pdf_path = os.path.join(UPLOAD_FOLDER, f'project_{project["id"]}.pdf')
+        
+        # إذا كان الملف المرفوع PDF تُلحق صفحاته الحقيقية مختومة بعد صفحات الترجمة
+        original_pdf = project.get('original_file')
+        stamp_original = is_pdf_file(original_pdf)
+        translation = io.BytesIO() if stamp_original else pdf_path
+        
+        doc = StreamingDocTemplate(translation, pagesize=A4, 
+                                   leftMargin=2*cm, rightMargin=2*cm,
+                                   topMargin=3*cm, bottomMargin=2*cm)
+        
+        # الأنماط المشتركة (تُبنى مرة واحدة لكل عملية)
+        title_style = pdf_styles['SimpleTitle']
+        heading_style = pdf_styles['ArabicHeading']
+        normal_style = pdf_styles['SimpleNormal']
+        
+        # النص العربي يُقسم حسب عرض الإطار ويُشكَّل قبل ReportLab
+        def make_paragraph(text, style):
+            return rtl_text.paragraph(text, style, doc.width)
+        
+        # محتوى PDF (يُنشأ أثناء البناء؛ النصوص الطويلة تُقسم إلى فقرات)
+        def story():
+            # العنوان
+            yield make_paragraph("وثيقة الترجمة الرسمية", title_style)
+            yield Spacer(1, 20)
+            
+            # معلومات المشروع
+            yield make_paragraph(f"عنوان المشروع: {project['title']}", normal_style)
+            yield make_paragraph(f"اسم العميل: {project['client_name']}", normal_style)
+            yield make_paragraph(f"اللغة المصدر: {project['source_language']}", normal_style)
+            yield make_paragraph(f"اللغة الهدف: {project['target_language']}", normal_style)
+            yield make_paragraph(f"المترجم: {project['translator_name']}", normal_style)
+            yield make_paragraph(f"رقم الترخيص: {project['translator_license']}", normal_style)
+            yield make_paragraph(f"تاريخ الترجمة: {project['created_at']}", normal_style)
+            
+            yield Spacer(1, 20)
+            
+            # الترجمة
+            if project.get('translated_content'):
+                yield make_paragraph("محتوى الترجمة", heading_style)
+                yield from iter_text_flowables(project['translated_content'], normal_style,
+                                               make_paragraph=make_paragraph, gap=0)
+                yield PageBreak()
+            
+            # المحتوى الأصلي (من الملف المرفوع)
+            if project.get('original_content') and not stamp_original:
+                yield make_paragraph("المستند الأصلي", heading_style)
+                yield from iter_text_flowables(project['original_content'], normal_style,
+                                               make_paragraph=make_paragraph, gap=0)
+        
+        # بناء PDF
+        doc.build(story())
+        
+        if stamp_original:
+            translation.seek(0)
+            if not pdf_stamper.stamp(original_pdf, pdf_path,
+                                     qr_data=get_verification_url(project['id']),
+                                     certification=certification_lines(project),
+                                     leading=translation):
+                return None
+        
+        return pdf_path
+        
+    except Exception as e:
+        print(f"خطأ في إنشاء PDF: {e}")
+        return None
+
+
+def render_simple_pdf(project):
+    """عرض PDF المشروع في الذاكرة دون ملفات مؤقتة (BytesIO مؤشره في البداية)"""
+    buffer = io.BytesIO()
+    if create_simple_pdf(project, buffer) is None:
+        return None
+    buffer.seek(0)
+    return buffer
+
+
+def render_simple_pdf_bytes(project):
+    """نسخة قابلة للتسلسل لمجمّع العمليات (التصدير بالجملة)"""
+    buffer = render_simple_pdf(project)
+    if buffer is None:
+        raise RuntimeError("فشل في إنشاء PDF")
+    return buffer.getvalue()
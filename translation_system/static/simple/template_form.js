@@ -0,0 +1,139 @@
+// نظام الترجمة المكتبي - محرر النماذج (إنشاء وتعديل)
+
+// الصفوف الموجودة عند التحميل (صف فارغ للنموذج الجديد أو متغيرات النموذج المعدَّل)
+let variableIndex = document.querySelectorAll('#variables-container .variable-row').length;
+
+function addVariable() {
+    const container = document.getElementById('variables-container');
+    const newRow = document.createElement('div');
+    newRow.className = 'variable-row';
+    newRow.innerHTML = `
+        <input type="text" name="var_name_${variableIndex}" placeholder="اسم المتغير (مثل: اسم العميل)" onchange="generateKey(this, ${variableIndex})" required>
+        <input type="text" name="var_key_${variableIndex}" placeholder="مفتاح المتغير (سيتم إنشاؤه تلقائياً)" readonly>
+        <button type="button" class="insert-variable-btn" onclick="insertVariable(${variableIndex})" title="إدراج المتغير في المحرر">📝</button>
+        <button type="button" class="remove-variable-btn" onclick="removeVariable(this)">حذف</button>
+    `;
+    container.appendChild(newRow);
+    variableIndex++;
+}
+
+function generateKey(nameInput, index) {
+    const name = nameInput.value.trim();
+    if (name) {
+        // Convert Arabic text to English key
+        let key = name
+            .replace(/[أإآ]/g, 'a')
+            .replace(/[ب]/g, 'b')
+            .replace(/[ت]/g, 't')
+            .replace(/[ث]/g, 'th')
+            .replace(/[ج]/g, 'j')
+            .replace(/[ح]/g, 'h')
+            .replace(/[خ]/g, 'kh')
+            .replace(/[د]/g, 'd')
+            .replace(/[ذ]/g, 'dh')
+            .replace(/[ر]/g, 'r')
+            .replace(/[ز]/g, 'z')
+            .replace(/[س]/g, 's')
+            .replace(/[ش]/g, 'sh')
+            .replace(/[ص]/g, 's')
+            .replace(/[ض]/g, 'd')
+            .replace(/[ط]/g, 't')
+            .replace(/[ظ]/g, 'z')
+            .replace(/[ع]/g, 'a')
+            .replace(/[غ]/g, 'gh')
+            .replace(/[ف]/g, 'f')
+            .replace(/[ق]/g, 'q')
+            .replace(/[ك]/g, 'k')
+            .replace(/[ل]/g, 'l')
+            .replace(/[م]/g, 'm')
+            .replace(/[ن]/g, 'n')
+            .replace(/[ه]/g, 'h')
+            .replace(/[و]/g, 'w')
+            .replace(/[يى]/g, 'y')
+            .replace(/[ة]/g, 'a')
+            .replace(/[ء]/g, '')
+            .replace(/[^\w\s]/g, '') // Remove special characters
+            .replace(/\s+/g, '_') // Replace spaces with underscores
+            .toLowerCase();
+
+        // Ensure key is not empty and add prefix if needed
+        if (key) {
+            document.querySelector(`input[name="var_key_${index}"]`).value = key;
+        }
+    }
+}
+
+function removeVariable(button) {
+    button.parentElement.remove();
+}
+
+function insertVariable(index) {
+    const keyInput = document.querySelector(`input[name="var_key_${index}"]`);
+    const nameInput = document.querySelector(`input[name="var_name_${index}"]`);
+
+    if (keyInput && keyInput.value.trim()) {
+        const variableText = `{${keyInput.value.trim()}}`;
+
+        // إدراج المتغير في محرر TinyMCE
+        if (tinymce.get('content')) {
+            tinymce.get('content').insertContent(variableText);
+        } else {
+            // إذا لم يكن TinyMCE جاهز، استخدم textarea العادي
+            const textarea = document.getElementById('content');
+            const cursorPos = textarea.selectionStart;
+            const textBefore = textarea.value.substring(0, cursorPos);
+            const textAfter = textarea.value.substring(cursorPos);
+            textarea.value = textBefore + variableText + textAfter;
+
+            // تحديث موضع المؤشر
+            textarea.selectionStart = cursorPos + variableText.length;
+            textarea.selectionEnd = cursorPos + variableText.length;
+            textarea.focus();
+        }
+
+        // إظهار رسالة تأكيد
+        showInsertMessage(nameInput.value.trim());
+    } else {
+        alert('يرجى إدخال اسم المتغير أولاً');
+    }
+}
+
+function showInsertMessage(variableName) {
+    // إنشاء رسالة تأكيد مؤقتة
+    const message = document.createElement('div');
+    message.className = 'insert-message';
+    message.textContent = `تم إدراج المتغير: {${variableName}}`;
+    document.body.appendChild(message);
+
+    // إزالة الرسالة بعد ثانيتين
+    setTimeout(() => {
+        if (message.parentNode) {
+            message.parentNode.removeChild(message);
+        }
+    }, 2000);
+}
+
+// إعداد محرر المحتوى
+tinymce.init({
+    selector: '#content',
+    directionality: 'rtl',
+    language: 'ar',
+    height: 400,
+    plugins: [
+        'advlist', 'autolink', 'lists', 'link', 'image', 'charmap', 'preview',
+        'anchor', 'searchreplace', 'visualblocks', 'code', 'fullscreen',
+        'insertdatetime', 'media', 'table', 'help', 'wordcount'
+    ],
+    toolbar: 'undo redo | formatselect | bold italic underline strikethrough | alignleft aligncenter alignright alignjustify | bullist numlist outdent indent | link image media table | preview fullscreen',
+    content_style: 'body { font-family: Arial, sans-serif; font-size: 14px; line-height: 1.6; }',
+    menubar: 'file edit view insert format tools table help',
+    branding: false,
+    elementpath: false,
+    resize: true,
+    setup: function(editor) {
+        editor.on('init', function() {
+            // إزالة required من textarea عند تهيئة المحرر
+            document.getElementById('content').removeAttribute('required');
+        });
+    }
+});
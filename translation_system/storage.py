@@ -0,0 +1,382 @@
+"""
+نظام الترجمة المكتبي - طبقة التخزين
+Translation Office System - Storage Backends
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import fields, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Type, Iterator
+
+from config import DATABASE_POOL_SIZE, DATABASE_BUSY_TIMEOUT
+from models import Translator, TranslationProject, TranslationDocument
+
+
+class MemoryStorage:
+    """تخزين في الذاكرة (غير دائم) - مفيد للتجارب والاختبارات"""
+
+    def __init__(self):
+        self.projects: Dict[str, TranslationProject] = {}
+        self.translators: Dict[str, Translator] = {}
+        self.documents: Dict[str, TranslationDocument] = {}
+        # فهرس ثانوي: معرف المشروع -> معرفات الوثائق (بترتيب الإنشاء)
+        self.project_documents: Dict[str, Dict[str, None]] = {}
+
+    def save_project(self, project: TranslationProject):
+        self.projects[project.id] = project
+
+    def get_project(self, project_id: str) -> Optional[TranslationProject]:
+        return self.projects.get(project_id)
+
+    def list_projects(self) -> List[TranslationProject]:
+        return list(self.projects.values())
+
+    def save_translator(self, translator: Translator):
+        self.translators[translator.id] = translator
+
+    def get_translator(self, translator_id: str) -> Optional[Translator]:
+        return self.translators.get(translator_id)
+
+    def list_translators(self) -> List[Translator]:
+        return list(self.translators.values())
+
+    def delete_translator(self, translator_id: str) -> bool:
+        return self.translators.pop(translator_id, None) is not None
+
+    def save_document(self, document: TranslationDocument):
+        previous = self.documents.get(document.id)
+        if previous is not None and previous.project_id != document.project_id:
+            self.project_documents.get(previous.project_id, {}).pop(document.id, None)
+        self.documents[document.id] = document
+        self.project_documents.setdefault(document.project_id, {})[document.id] = None
+
+    def get_document(self, document_id: str) -> Optional[TranslationDocument]:
+        return self.documents.get(document_id)
+
+    def list_project_documents(self, project_id: str, offset: int = 0,
+                               limit: Optional[int] = None) -> List[TranslationDocument]:
+        ids = list(self.project_documents.get(project_id, ()))
+        end = None if limit is None else offset + limit
+        return [self.documents[doc_id] for doc_id in ids[offset:end]]
+
+    def count_project_documents(self, project_id: str) -> int:
+        return len(self.project_documents.get(project_id, ()))
+
+    def iter_project_documents(self, project_id: str,
+                               batch_size: int = 100) -> Iterator[TranslationDocument]:
+        for doc_id in list(self.project_documents.get(project_id, ())):
+            document = self.documents.get(doc_id)
+            if document is not None:
+                yield document
+
+    def close(self):
+        pass
+
+
+class ConnectionPool:
+    """مجمّع اتصالات SQLite آمن للاستخدام من عدة خيوط (مثل خيوط Flask)
+
+    كل اتصال يُستخدم من خيط واحد في كل مرة، ويُعاد إلى المجمّع بعد الانتهاء.
+    """
+
+    def __init__(self, db_path: Path, size: int = DATABASE_POOL_SIZE,
+                 busy_timeout: float = DATABASE_BUSY_TIMEOUT):
+        self.db_path = Path(db_path)
+        self.size = size
+        self.busy_timeout = busy_timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._all: List[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        """فتح اتصال جديد وإعداده"""
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            # ذاكرة العبارات المُعدّة (prepared statements) لكل اتصال
+            cached_statements=256
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """الحصول على اتصال من المجمّع"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+
+        return self._idle.get(timeout=self.busy_timeout)
+
+    def release(self, conn: sqlite3.Connection):
+        """إعادة الاتصال إلى المجمّع"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """مدير سياق لاستعارة اتصال"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """إغلاق جميع الاتصالات"""
+        with self._lock:
+            for conn in self._all:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._all.clear()
+            self._created = 0
+            self._idle = queue.LifoQueue(maxsize=self.size)
+
+
+def _columns(model: Type) -> List[str]:
+    return [f.name for f in fields(model)]
+
+
+def _upsert_sql(table: str, model: Type) -> str:
+    # ON CONFLICT بدلاً من INSERT OR REPLACE حتى يبقى rowid ثابتاً عند التحديث
+    columns = _columns(model)
+    placeholders = ", ".join(f":{c}" for c in columns)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "id")
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+        f"ON CONFLICT(id) DO UPDATE SET {updates}"
+    )
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translators (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    license_number TEXT NOT NULL,
+    source_languages TEXT NOT NULL,
+    target_languages TEXT NOT NULL,
+    email TEXT,
+    phone TEXT,
+    address TEXT,
+    created_at TEXT NOT NULL,
+    is_active INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    source_language TEXT,
+    target_language TEXT,
+    translator_id TEXT,
+    client_name TEXT,
+    client_email TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    source_file_path TEXT,
+    translated_file_path TEXT,
+    original_file_path TEXT,
+    final_pdf_path TEXT,
+    google_drive_id TEXT,
+    qr_code_path TEXT,
+    verification_url TEXT,
+    original_content TEXT
+);
+
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    file_path TEXT,
+    file_type TEXT,
+    content TEXT,
+    translated_content TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_documents_project
+    ON documents (project_id, created_at);
+"""
+
+# عبارات SQL ثابتة تُبنى مرة واحدة حتى تستفيد من ذاكرة العبارات المُعدّة
+_UPSERT_PROJECT = _upsert_sql("projects", TranslationProject)
+_UPSERT_TRANSLATOR = _upsert_sql("translators", Translator)
+_UPSERT_DOCUMENT = _upsert_sql("documents", TranslationDocument)
+_SELECT_PROJECT = "SELECT * FROM projects WHERE id = ?"
+_SELECT_PROJECTS = "SELECT * FROM projects ORDER BY created_at, rowid"
+_SELECT_TRANSLATOR = "SELECT * FROM translators WHERE id = ?"
+_SELECT_TRANSLATORS = "SELECT * FROM translators ORDER BY created_at, rowid"
+_DELETE_TRANSLATOR = "DELETE FROM translators WHERE id = ?"
+_SELECT_DOCUMENT = "SELECT * FROM documents WHERE id = ?"
+_SELECT_PROJECT_DOCUMENTS = "SELECT * FROM documents WHERE project_id = ? ORDER BY created_at, rowid"
+_SELECT_PROJECT_DOCUMENTS_PAGE = (
+    "SELECT * FROM documents WHERE project_id = ? ORDER BY created_at, rowid LIMIT ? OFFSET ?"
+)
+_COUNT_PROJECT_DOCUMENTS = "SELECT COUNT(*) FROM documents WHERE project_id = ?"
+# ترقيم بمفتاح الموضع (keyset) حتى لا تتدهور الصفحات البعيدة كما مع OFFSET
+_SELECT_PROJECT_DOCUMENTS_FIRST = (
+    "SELECT rowid AS _rowid, * FROM documents WHERE project_id = ? "
+    "ORDER BY created_at, rowid LIMIT ?"
+)
+_SELECT_PROJECT_DOCUMENTS_AFTER = (
+    "SELECT rowid AS _rowid, * FROM documents WHERE project_id = ? "
+    "AND (created_at, rowid) > (?, ?) ORDER BY created_at, rowid LIMIT ?"
+)
+
+
+class SQLiteStorage:
+    """تخزين دائم في SQLite بوضع WAL
+
+    وضع WAL يسمح لخادم التحقق بالقراءة أثناء كتابة الواجهة الرسومية.
+    """
+
+    def __init__(self, db_path: Path, pool_size: int = DATABASE_POOL_SIZE):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool = ConnectionPool(self.db_path, size=pool_size)
+        self._create_schema()
+
+    def _create_schema(self):
+        """إنشاء الجداول إذا لم تكن موجودة"""
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    # ---- التحويل بين الصفوف والنماذج ----
+
+    @staticmethod
+    def _to_row(obj) -> Dict[str, Any]:
+        row = asdict(obj)
+        for key, value in row.items():
+            if isinstance(value, datetime):
+                row[key] = value.isoformat()
+            elif isinstance(value, list):
+                row[key] = json.dumps(value, ensure_ascii=False)
+            elif isinstance(value, bool):
+                row[key] = int(value)
+        return row
+
+    @staticmethod
+    def _from_row(model: Type, row: sqlite3.Row):
+        data = dict(row)
+        for f in fields(model):
+            value = data.get(f.name)
+            if value is None:
+                continue
+            if f.type is datetime:
+                data[f.name] = datetime.fromisoformat(value)
+            elif f.type is bool:
+                data[f.name] = bool(value)
+            elif f.type == List[str]:
+                data[f.name] = json.loads(value)
+        return model(**{f.name: data.get(f.name) for f in fields(model) if f.name in data})
+
+    def _write(self, sql: str, params):
+        with self.pool.connection() as conn:
+            with conn:
+                conn.execute(sql, params)
+
+    def _fetch_one(self, model: Type, sql: str, params):
+        with self.pool.connection() as conn:
+            row = conn.execute(sql, params).fetchone()
+        return self._from_row(model, row) if row else None
+
+    def _fetch_all(self, model: Type, sql: str, params=()):
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._from_row(model, row) for row in rows]
+
+    # ---- المشاريع ----
+
+    def save_project(self, project: TranslationProject):
+        self._write(_UPSERT_PROJECT, self._to_row(project))
+
+    def get_project(self, project_id: str) -> Optional[TranslationProject]:
+        return self._fetch_one(TranslationProject, _SELECT_PROJECT, (project_id,))
+
+    def list_projects(self) -> List[TranslationProject]:
+        return self._fetch_all(TranslationProject, _SELECT_PROJECTS)
+
+    # ---- المترجمون ----
+
+    def save_translator(self, translator: Translator):
+        self._write(_UPSERT_TRANSLATOR, self._to_row(translator))
+
+    def get_translator(self, translator_id: str) -> Optional[Translator]:
+        return self._fetch_one(Translator, _SELECT_TRANSLATOR, (translator_id,))
+
+    def list_translators(self) -> List[Translator]:
+        return self._fetch_all(Translator, _SELECT_TRANSLATORS)
+
+    def delete_translator(self, translator_id: str) -> bool:
+        with self.pool.connection() as conn:
+            with conn:
+                cursor = conn.execute(_DELETE_TRANSLATOR, (translator_id,))
+        return cursor.rowcount > 0
+
+    # ---- الوثائق ----
+
+    def save_document(self, document: TranslationDocument):
+        self._write(_UPSERT_DOCUMENT, self._to_row(document))
+
+    def get_document(self, document_id: str) -> Optional[TranslationDocument]:
+        return self._fetch_one(TranslationDocument, _SELECT_DOCUMENT, (document_id,))
+
+    def list_project_documents(self, project_id: str, offset: int = 0,
+                               limit: Optional[int] = None) -> List[TranslationDocument]:
+        if limit is None and not offset:
+            return self._fetch_all(TranslationDocument, _SELECT_PROJECT_DOCUMENTS, (project_id,))
+        return self._fetch_all(
+            TranslationDocument, _SELECT_PROJECT_DOCUMENTS_PAGE,
+            (project_id, -1 if limit is None else limit, offset)
+        )
+
+    def count_project_documents(self, project_id: str) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute(_COUNT_PROJECT_DOCUMENTS, (project_id,)).fetchone()[0]
+
+    def iter_project_documents(self, project_id: str,
+                               batch_size: int = 100) -> Iterator[TranslationDocument]:
+        """المرور على وثائق المشروع دفعة بعد دفعة دون تحميلها كلها"""
+        cursor_key = None
+        while True:
+            with self.pool.connection() as conn:
+                if cursor_key is None:
+                    rows = conn.execute(_SELECT_PROJECT_DOCUMENTS_FIRST,
+                                        (project_id, batch_size)).fetchall()
+                else:
+                    rows = conn.execute(_SELECT_PROJECT_DOCUMENTS_AFTER,
+                                        (project_id, *cursor_key, batch_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._from_row(TranslationDocument, row)
+            last = rows[-1]
+            cursor_key = (last['created_at'], last['_rowid'])
+            if len(rows) < batch_size:
+                return
+
+    def close(self):
+        """إغلاق اتصالات قاعدة البيانات"""
+        self.pool.close_all()
@@ -0,0 +1,94 @@
+"""
+نظام الترجمة المكتبي - مترجم متغيرات النماذج
+Translation Office System - Compiled Template Variable Substitution
+"""
+
+import re
+import threading
+from typing import List, Dict, Any, Iterable, Tuple
+
+
+# {اسم_المتغير}: أي نص بين قوسين لا يحتوي مسافات أو أقواس
+_PLACEHOLDER = re.compile(r'\{([^{}\s]+)\}')
+
+
+class CompiledTemplate:
+    """محتوى نموذج محلَّل مسبقاً إلى مقاطع ثابتة ومتغيرات
+
+    segments تتناوب بين نص ثابت (المواقع الزوجية) واسم متغير (المواقع
+    الفردية)، فيتم العرض بمرور واحد و join بدلاً من str.replace لكل متغير
+    على كامل النص.
+    """
+
+    def __init__(self, content: str):
+        self.content = content or ''
+        self.segments: List[str] = _PLACEHOLDER.split(self.content)
+        # أسماء المتغيرات بترتيب أول ظهور لها
+        self.placeholders: Tuple[str, ...] = tuple(dict.fromkeys(self.segments[1::2]))
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """تعويض المتغيرات؛ المتغير الذي لا قيمة له يبقى كما هو {name}"""
+        parts = list(self.segments)
+        for index in range(1, len(parts), 2):
+            name = parts[index]
+            parts[index] = str(values[name]) if name in values else f'{{{name}}}'
+        return ''.join(parts)
+
+    def render_many(self, value_sets: Iterable[Dict[str, Any]]) -> List[str]:
+        """عرض النموذج نفسه لعدة مجموعات من القيم"""
+        return [self.render(values) for values in value_sets]
+
+    def check(self, values: Dict[str, Any]) -> Dict[str, List[str]]:
+        """المتغيرات الناقصة (في النص بلا قيمة) وغير المستخدمة (قيمة بلا موضع في النص)"""
+        placeholders = set(self.placeholders)
+        return {
+            'missing': [name for name in self.placeholders if name not in values],
+            'unused': [name for name in values if name not in placeholders],
+        }
+
+
+class TemplateCompiler:
+    """ذاكرة للنماذج المترجمة حسب معرف النموذج ورقم إصداره
+
+    تعديل النموذج يرفع حقل version، فتُترجم النسخة الجديدة عند أول عرض
+    وتحل محل القديمة.
+    """
+
+    def __init__(self):
+        self._compiled: Dict[str, Tuple[Any, CompiledTemplate]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'compiles': 0}
+
+    def get(self, template: Dict[str, Any]) -> CompiledTemplate:
+        """النسخة المترجمة لنموذج (قاموس يحتوي id و content و version)"""
+        template_id = template['id']
+        version = template.get('version', 0)
+        with self._lock:
+            cached = self._compiled.get(template_id)
+            if cached is not None and cached[0] == version:
+                self.stats['hits'] += 1
+                return cached[1]
+
+        compiled = CompiledTemplate(template.get('content', ''))
+        with self._lock:
+            self._compiled[template_id] = (version, compiled)
+            self.stats['compiles'] += 1
+        return compiled
+
+    def render(self, template: Dict[str, Any], values: Dict[str, Any]) -> str:
+        """عرض نموذج بمجموعة قيم واحدة"""
+        return self.get(template).render(values)
+
+    def render_many(self, template: Dict[str, Any],
+                    value_sets: Iterable[Dict[str, Any]]) -> List[str]:
+        """عرض نموذج لعدة مجموعات من القيم (مثلاً دفعة شهادات)"""
+        return self.get(template).render_many(value_sets)
+
+    def forget(self, template_id: str):
+        """حذف النسخة المترجمة (عند حذف النموذج)"""
+        with self._lock:
+            self._compiled.pop(template_id, None)
+
+
+# ذاكرة مشتركة على مستوى العملية
+template_compiler = TemplateCompiler()
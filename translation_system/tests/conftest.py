@@ -0,0 +1,8 @@
+"""
+إعداد الاختبارات: الوحدات في المجلد الأب تُستورد مباشرة
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
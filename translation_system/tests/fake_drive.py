@@ -0,0 +1,159 @@
+"""
+خادم Google Drive وهمي محلي لاختبار الرفع القابل للاستئناف
+Local Fake Google Drive Server For Resumable Upload Tests
+"""
+
+import json
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+import httplib2
+
+
+_CONTENT_RANGE = re.compile(r'bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)')
+
+
+class FakeDrive:
+    """يطبق جزء Drive v3 الذي يستخدمه الرفع: إنشاء جلسة، رفع الدفعات، سؤال التقدم
+
+    fail_chunks عدد دفعات البيانات التي يُرد عليها بخطأ 400 (دون حفظها)
+    بعد أول دفعة ناجحة، لمحاكاة انقطاع الرفع في منتصفه.
+    deleted_folders معرفات مجلدات محذوفة: إنشاء جلسة رفع فيها يُرد عليه بـ 404.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.requests = []
+        self.fail_chunks = 0
+        self.deleted_folders = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self) -> "FakeDrive":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def service(self):
+        """خدمة Drive حقيقية من googleapiclient موجهة إلى هذا الخادم"""
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.discovery_cache import get_static_doc
+        return build_from_document(get_static_doc('drive', 'v3'), http=_LocalHttp(self.endpoint),
+                                   client_options={'api_endpoint': self.endpoint})
+
+    @contextmanager
+    def connection(self):
+        """مثل DriveClient.connection: خدمة مستعارة لعملية واحدة"""
+        yield self.service()
+
+    # ---- معالجة الطلبات ----
+
+    def _handler(self):
+        drive = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+            def _send(self, status: int, payload: Optional[Dict[str, Any]] = None, headers=None):
+                data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self._body()
+                drive.requests.append(('POST', self.path, len(body)))
+                if not self.path.startswith('/upload/drive/v3/files') or 'uploadType=resumable' not in self.path:
+                    self._send(404, {'error': 'not found'})
+                    return
+                metadata = json.loads(body or b'{}')
+                if drive.deleted_folders.intersection(metadata.get('parents') or ()):
+                    self._send(404, {'error': {'code': 404, 'message': 'File not found'}})
+                    return
+                session_id = uuid.uuid4().hex
+                with drive._lock:
+                    drive.sessions[session_id] = {'metadata': metadata, 'data': bytearray(), 'file_id': None}
+                host, port = drive._server.server_address[:2]
+                self._send(200, headers={'Location': f'http://{host}:{port}/upload/session/{session_id}'})
+
+            def do_PUT(self):
+                body = self._body()
+                drive.requests.append(('PUT', self.path, len(body)))
+                session = drive.sessions.get(self.path.rsplit('/', 1)[-1])
+                if session is None:
+                    self._send(404, {'error': 'session expired'})
+                    return
+                match = _CONTENT_RANGE.match(self.headers.get('Content-Range', ''))
+                if match is None:
+                    self._send(400, {'error': 'bad Content-Range'})
+                    return
+                start, total = match.group(1), match.group(3)
+
+                with drive._lock:
+                    data = session['data']
+                    if start is not None:
+                        if len(data) and drive.fail_chunks > 0:
+                            drive.fail_chunks -= 1
+                            self._send(400, {'error': 'simulated interruption'})
+                            return
+                        if int(start) != len(data):
+                            self._send(400, {'error': 'unexpected offset'})
+                            return
+                        data.extend(body)
+                    if total != '*' and len(data) == int(total):
+                        self._send(200, drive._finish(session))
+                        return
+                headers = {'Range': f'bytes=0-{len(data) - 1}'} if data else {}
+                self._send(308, headers=headers)
+
+        return Handler
+
+    def _finish(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        if session['file_id'] is None:
+            file_id = uuid.uuid4().hex[:16]
+            session['file_id'] = file_id
+            self.files[file_id] = {
+                'name': session['metadata'].get('name'),
+                'parents': session['metadata'].get('parents'),
+                'data': bytes(session['data']),
+            }
+        file_id = session['file_id']
+        return {'id': file_id, 'name': self.files[file_id]['name'],
+                'webViewLink': f'https://drive.example/file/{file_id}'}
+
+
+class _LocalHttp(httplib2.Http):
+    """googleapiclient يفرض https لمسارات الرفع؛ الخادم الوهمي يعمل بـ http"""
+
+    def __init__(self, endpoint: str):
+        super().__init__()
+        # مثل googleapiclient.http.build_http: الرد 308 تقدّم رفع وليس تحويلاً
+        self.redirect_codes = self.redirect_codes - {308}
+        self._netloc = endpoint.split('://', 1)[1].rstrip('/')
+
+    def request(self, uri, method='GET', body=None, headers=None, *args, **kwargs):
+        if uri.startswith(f'https://{self._netloc}/'):
+            uri = 'http://' + uri[len('https://'):]
+        return super().request(uri, method, body, headers, *args, **kwargs)
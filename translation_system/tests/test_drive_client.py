@@ -0,0 +1,42 @@
+"""
+اختبارات مجمّع كائنات الخدمة في عميل Google Drive
+"""
+
+import queue
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from drive_client import DriveClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    credentials = SimpleNamespace(token='token', expiry=None)
+    client = DriveClient('test', lambda: credentials, pool_size=2, pool_timeout=0.2)
+    monkeypatch.setattr(client, '_build_service', lambda: object())
+    return client
+
+
+def test_services_are_reused_after_release(client):
+    with client.connection() as first:
+        pass
+    with client.connection() as second:
+        assert second is first
+    assert client.health()['services_idle'] == 1
+
+
+def test_pool_is_bounded(client):
+    first, second = client.acquire(), client.acquire()
+    assert first is not second
+    with pytest.raises(queue.Empty):
+        client.acquire()
+
+    # خيط آخر يحصل على الكائن المعاد بدلاً من بناء كائن ثالث
+    borrowed = []
+    waiter = threading.Thread(target=lambda: borrowed.append(client.acquire()))
+    waiter.start()
+    client.release(first)
+    waiter.join(1)
+    assert borrowed == [first]
@@ -0,0 +1,133 @@
+"""
+اختبارات طابور الرفع إلى Google Drive مقابل خادم Drive وهمي محلي
+"""
+
+import os
+import threading
+from contextlib import nullcontext
+
+import pytest
+
+import upload_queue
+from upload_queue import UploadQueue, DONE, PENDING, UPLOADING
+from fake_drive import FakeDrive
+
+CHUNK = 256 * 1024
+
+
+@pytest.fixture
+def drive():
+    fake = FakeDrive().start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "translation.pdf"
+    path.write_bytes(os.urandom(3 * CHUNK + 1000))
+    return path
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # ثلاث دفعات أو أكثر لملف صغير حتى يمكن قطع الرفع في منتصفه
+    original = upload_queue.resumable_upload
+
+    def upload(*args, **kwargs):
+        kwargs['chunk_size'] = CHUNK
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(upload_queue, 'resumable_upload', upload)
+    monkeypatch.setattr(UploadQueue, '_backoff', lambda self, attempts: 0)
+
+
+def test_process_once_uploads_and_calls_handlers(tmp_path, drive, source_file, small_chunks):
+    queue = UploadQueue('test', drive.connection, db_path=tmp_path / "queue.db", workers=0)
+    completed = []
+    queue.on_complete(completed.append)
+
+    item_id = queue.enqueue(str(source_file), folder='folder-1', meta={'project_id': 'p1'})
+    assert queue.process_once()
+
+    item = queue.get(item_id)
+    assert item['status'] == DONE
+    assert drive.files[item['drive_file_id']]['data'] == source_file.read_bytes()
+    assert drive.files[item['drive_file_id']]['parents'] == ['folder-1']
+    assert item['web_link'].endswith(item['drive_file_id'])
+    assert [done['meta'] for done in completed] == [{'project_id': 'p1'}]
+    assert not queue.process_once()
+    queue.stop()
+
+
+def test_interrupted_upload_resumes_from_server_offset(tmp_path, drive, source_file, small_chunks):
+    queue = UploadQueue('test', drive.connection, db_path=tmp_path / "queue.db", workers=0)
+    item_id = queue.enqueue(str(source_file))
+
+    drive.fail_chunks = 1
+    assert queue.process_once()
+    item = queue.get(item_id)
+    assert item['status'] == PENDING
+    assert item['attempts'] == 1
+    assert item['resumable_uri']
+
+    assert queue.process_once()
+    item = queue.get(item_id)
+    assert item['status'] == DONE
+    assert drive.files[item['drive_file_id']]['data'] == source_file.read_bytes()
+
+    # جلسة واحدة فقط، والاستئناف بدأ بسؤال التقدم ولم يُعد إرسال الدفعة الأولى
+    assert sum(1 for method, _, _ in drive.requests if method == 'POST') == 1
+    sent = sum(size for method, _, size in drive.requests if method == 'PUT')
+    assert sent == source_file.stat().st_size + CHUNK  # الدفعة المرفوضة فقط أُعيدت
+    queue.stop()
+
+
+def test_expired_session_starts_new_upload(tmp_path, drive, source_file, small_chunks):
+    queue = UploadQueue('test', drive.connection, db_path=tmp_path / "queue.db", workers=0)
+    item_id = queue.enqueue(str(source_file))
+    queue._set(item_id, resumable_uri=drive.endpoint + 'upload/session/expired')
+
+    assert queue.process_once()
+    item = queue.get(item_id)
+    assert item['status'] == DONE
+    assert drive.files[item['drive_file_id']]['data'] == source_file.read_bytes()
+    queue.stop()
+
+
+def test_deleted_folder_is_resolved_again(tmp_path, drive, source_file, small_chunks):
+    drive.deleted_folders.add('stale-folder')
+    calls = []
+
+    def resolve(folder, refresh=False):
+        calls.append((folder, refresh))
+        return 'new-folder' if refresh else 'stale-folder'
+
+    queue = UploadQueue('test', drive.connection, resolve, db_path=tmp_path / "queue.db", workers=0)
+    item_id = queue.enqueue(str(source_file), folder='translations')
+
+    assert queue.process_once()
+    item = queue.get(item_id)
+    assert item['status'] == DONE
+    assert drive.files[item['drive_file_id']]['parents'] == ['new-folder']
+    assert calls == [('translations', False), ('translations', True)]
+    queue.stop()
+
+
+def test_leftover_uploads_resume_on_start(tmp_path, drive, source_file, small_chunks):
+    db_path = tmp_path / "queue.db"
+    # عملية سابقة توقفت أثناء الرفع
+    previous = UploadQueue('test', nullcontext, db_path=db_path, workers=0)
+    item_id = previous.enqueue(str(source_file))
+    previous._set(item_id, status=UPLOADING)
+    previous.stop()
+
+    queue = UploadQueue('test', drive.connection, db_path=db_path, workers=1)
+    assert queue.get(item_id)['status'] == PENDING
+
+    finished = threading.Event()
+    queue.on_complete(lambda item: finished.set())
+    queue.start()
+    assert finished.wait(10)
+    assert queue.get(item_id)['status'] == DONE
+    queue.stop(timeout=5)
@@ -0,0 +1,467 @@
+"""
+نظام الترجمة المكتبي - ذاكرة الترجمة على مستوى المقاطع
+Translation Office System - Segment-Level Translation Memory
+"""
+
+import hashlib
+import heapq
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from datetime import datetime
+from operator import itemgetter
+from pathlib import Path
+from typing import Optional, List, Dict, Iterable, NamedTuple, Set, Tuple
+
+from config import (
+    SUPPORTED_LANGUAGES,
+    TM_DATABASE_FILE,
+    TM_NGRAM_SIZE,
+    TM_FUZZY_THRESHOLD,
+    TM_FUZZY_LIMIT,
+    TM_FUZZY_CANDIDATES,
+    TM_MAX_POSTINGS_SCAN
+)
+from storage import ConnectionPool
+
+
+# نهاية جملة: علامة يتبعها فراغ، أو علامات CJK التي لا يتبعها فراغ عادة
+_SENTENCE_END = re.compile(r'[.!?؟…]+["»”)]*\s+|[。！？]+')
+_LAST_WORD = re.compile(r'(\S+)$')
+_WORDS = re.compile(r'\w+')
+# اختصارات شائعة في الوثائق الرسمية تنتهي بنقطة ولا تنهي الجملة
+_ABBREVIATIONS = frozenset({
+    'no', 'nos', 'nr', 'dr', 'mr', 'mrs', 'ms', 'prof', 'st', 'jr', 'sr', 'sra', 'art', 'pp', 'para',
+    'fig', 'vol', 'ch', 'sec', 'inc', 'ltd', 'co', 'corp', 'vs', 'cf', 'approx', 'dept', 'tel',
+    'bzw', 'str', 'sn', 'mme', 'mlle', 'sig',
+})
+# التشكيل والتطويل لا يغيران المعنى ولا يجب أن يمنعا التطابق
+_DIACRITICS = re.compile('[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')
+# طول المقاطع الحرفية لحساب التشابه
+_CHAR_GRAM = 3
+
+
+class TMMatch(NamedTuple):
+    """اقتراح من الذاكرة"""
+    segment_id: int
+    source: str
+    target: str
+    score: float  # 1.0 تطابق تام
+
+
+def split_segments(text: str) -> List[str]:
+    """تقسيم النص إلى مقاطع: كل سطر ثم كل جملة داخل السطر
+
+    لا يُقسم بعد الأرقام والحروف المفردة (مثل "1." أو "A.") ولا بعد
+    الاختصارات (مثل "No." و "Dr." و "U.S.") حتى تبقى في مقطعها.
+    """
+    segments = []
+    for line in (text or '').split('\n'):
+        start = 0
+        for match in _SENTENCE_END.finditer(line):
+            word = _LAST_WORD.search(line, start, match.start() + 1)
+            token = word.group(1).rstrip('.!?؟…') if word else ''
+            if len(token) <= 1 or token.isdigit() or '.' in token or token.casefold() in _ABBREVIATIONS:
+                continue
+            segment = line[start:match.end()].strip()
+            if segment:
+                segments.append(segment)
+            start = match.end()
+        segment = line[start:].strip()
+        if segment:
+            segments.append(segment)
+    return segments
+
+
+def align_segments(source_text: str, target_text: str) -> List[Tuple[str, str]]:
+    """أزواج (الأصل، الترجمة) من نصين متقابلين
+
+    المحاذاة بالأسطر: يجب أن يتساوى عدد الأسطر غير الفارغة، وإلا لا يُعاد شيء.
+    داخل كل سطر تُقابل الجمل إذا تساوى عددها، وإلا يُحفظ السطر كاملاً كمقطع.
+    """
+    source_lines = [line.strip() for line in (source_text or '').split('\n') if line.strip()]
+    target_lines = [line.strip() for line in (target_text or '').split('\n') if line.strip()]
+    if len(source_lines) != len(target_lines):
+        return []
+
+    pairs = []
+    for source_line, target_line in zip(source_lines, target_lines):
+        source_segments = split_segments(source_line)
+        target_segments = split_segments(target_line)
+        if len(source_segments) == len(target_segments):
+            pairs.extend(zip(source_segments, target_segments))
+        else:
+            pairs.append((source_line, target_line))
+    return pairs
+
+
+def normalize(text: str) -> str:
+    """الشكل الموحد للمقارنة: NFKC، بدون تشكيل، أحرف صغيرة، فراغات مفردة"""
+    text = _DIACRITICS.sub('', unicodedata.normalize('NFKC', text))
+    return ' '.join(text.casefold().split())
+
+
+def segment_hash(normalized: str) -> int:
+    """بصمة 64 بت للمقطع الموحد (مفتاح البحث التام في SQLite)"""
+    digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def ngrams(normalized: str, size: int = TM_NGRAM_SIZE) -> Set[str]:
+    """مفاتيح الفهرس: كل size كلمات متتالية (أو الكلمات كلها في مقطع أقصر)
+
+    الكلمات دون علامات الترقيم، فاختلاف نقطة أو فاصلة لا يمنع إيجاد المرشح.
+    """
+    words = _WORDS.findall(normalized)
+    if len(words) <= size:
+        return {' '.join(words)}
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def char_grams(normalized: str) -> Set[str]:
+    """المقاطع الحرفية الثلاثية (مع فراغ في الطرفين لتمييز حدود الكلمات)"""
+    padded = f' {normalized} '
+    if len(padded) <= _CHAR_GRAM:
+        return {padded}
+    return {padded[i:i + _CHAR_GRAM] for i in range(len(padded) - _CHAR_GRAM + 1)}
+
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    """معامل Dice بين مجموعتي مقاطع حرفية (1.0 للتطابق)"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class _NGramIndex:
+    """فهرس مقلوب في الذاكرة: مفتاح كلمات ← معرفات المقاطع التي تحتويه
+
+    القوائم مصفوفات أعداد صحيحة (array) تُضاف إليها المعرفات بالترتيب،
+    فتبقى الذاكرة صغيرة (نحو 12 مدخلاً لكل مقطع). covered_id أكبر معرف
+    قرأه البناء من SQLite؛ ما بعده يُضاف من add_pairs.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.postings: Dict[str, array] = {}
+        self.segments = 0
+        self.covered_id = 0
+
+    def __len__(self) -> int:
+        return self.segments
+
+    def add(self, segment_id: int, normalized: str):
+        self.segments += 1
+        postings = self.postings
+        for key in ngrams(normalized, self.size):
+            posting = postings.get(key)
+            if posting is None:
+                posting = postings[key] = array('q')
+            posting.append(segment_id)
+
+    def candidates(self, keys: Set[str], limit: int = TM_FUZZY_CANDIDATES,
+                   budget: int = TM_MAX_POSTINGS_SCAN) -> List[int]:
+        """المقاطع التي تشترك مع الاستعلام في أكبر عدد من المفاتيح
+
+        القوائم تُقرأ من الأندر إلى الأشيع حتى نفاد budget، فالمفاتيح المميزة
+        (أرقام وأسماء ومصطلحات) تحدد المرشحين ولا تُقرأ القوائم الشائعة جداً
+        (مثل "من هذا") إلا جزئياً: أحدث المدخلات فيها فقط.
+        """
+        postings = self.postings
+        found = sorted((postings[key] for key in keys if key in postings), key=len)
+        hits: Counter = Counter()
+        remaining = budget
+        for posting in found:
+            if remaining <= 0:
+                break
+            hits.update(posting[-remaining:] if len(posting) > remaining else posting)
+            remaining -= len(posting)
+        return [segment_id for segment_id, _ in heapq.nlargest(limit, hits.items(), key=itemgetter(1))]
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tm_segments (
+    id INTEGER PRIMARY KEY,
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    source_hash INTEGER NOT NULL,
+    source_text TEXT NOT NULL,
+    target_text TEXT NOT NULL,
+    project_id TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tm_segments_hash
+    ON tm_segments (source_lang, target_lang, source_hash);
+"""
+
+_SELECT_BY_HASH = (
+    "SELECT id, source_text, target_text FROM tm_segments "
+    "WHERE source_lang = ? AND target_lang = ? AND source_hash = ?"
+)
+_INSERT_SEGMENT = (
+    "INSERT INTO tm_segments (source_lang, target_lang, source_hash, source_text, target_text, "
+    "project_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_UPDATE_TARGET = "UPDATE tm_segments SET target_text = ?, project_id = ?, updated_at = ? WHERE id = ?"
+_SELECT_PAIR_SOURCES = (
+    "SELECT id, source_text FROM tm_segments WHERE source_lang = ? AND target_lang = ? ORDER BY id"
+)
+_COUNT_PAIR = "SELECT COUNT(*) FROM tm_segments WHERE source_lang = ? AND target_lang = ?"
+
+
+def _language_pair(source_lang: str, target_lang: str) -> Optional[Tuple[str, str]]:
+    if source_lang in SUPPORTED_LANGUAGES and target_lang in SUPPORTED_LANGUAGES and source_lang != target_lang:
+        return source_lang, target_lang
+    return None
+
+
+class TranslationMemory:
+    """ذاكرة ترجمة: أزواج (مقطع أصلي، ترجمته) لكل زوج لغات
+
+    الأزواج محفوظة في SQLite (بوضع WAL عبر ConnectionPool)، والبحث التام
+    بالبصمة عبر فهرس فريد. البحث التقريبي عبر فهرس مقطعي مقلوب في الذاكرة
+    يُبنى عند أول بحث تقريبي لكل زوج لغات ثم يُحدَّث مع كل إضافة. الفهرس
+    يختار عدداً محدوداً من المرشحين، ثم يُحسب تشابه كل مرشح بدقة بمعامل Dice
+    على المقاطع الحرفية الثلاثية.
+    """
+
+    def __init__(self, db_path: Path = TM_DATABASE_FILE, ngram_size: int = TM_NGRAM_SIZE):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool = ConnectionPool(self.db_path)
+        self.ngram_size = ngram_size
+        self._lock = threading.Lock()
+        self._indexes: Dict[Tuple[str, str], _NGramIndex] = {}
+        # أثناء بناء فهرس: أقفال البناء، والمقاطع المضافة بانتظار دمجها فيه
+        self._build_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._pending: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    # ---- الإضافة ----
+
+    def add(self, source: str, target: str, source_lang: str, target_lang: str,
+            project_id: Optional[str] = None) -> bool:
+        """حفظ زوج واحد (الترجمة الأحدث تحل محل السابقة لنفس المقطع)"""
+        return self.add_pairs([(source, target)], source_lang, target_lang, project_id) == 1
+
+    def add_pairs(self, pairs: Iterable[Tuple[str, str]], source_lang: str, target_lang: str,
+                  project_id: Optional[str] = None) -> int:
+        """حفظ أزواج في معاملة واحدة؛ يُرجع عدد الأزواج المحفوظة"""
+        language_pair = _language_pair(source_lang, target_lang)
+        if language_pair is None:
+            print(f"زوج لغات غير مدعوم في ذاكرة الترجمة: {source_lang} → {target_lang}")
+            return 0
+
+        now = datetime.now().isoformat()
+        added = []
+        stored = 0
+        with self.pool.connection() as conn:
+            with conn:
+                for source, target in pairs:
+                    source, target = (source or '').strip(), (target or '').strip()
+                    normalized = normalize(source)
+                    if not normalized or not target:
+                        continue
+                    key = segment_hash(normalized)
+                    row = conn.execute(_SELECT_BY_HASH, (source_lang, target_lang, key)).fetchone()
+                    if row is not None:
+                        conn.execute(_UPDATE_TARGET, (target, project_id, now, row[0]))
+                    else:
+                        cursor = conn.execute(_INSERT_SEGMENT, (source_lang, target_lang, key, source,
+                                                                target, project_id, now, now))
+                        added.append((cursor.lastrowid, normalized))
+                    stored += 1
+
+        with self._lock:
+            index = self._indexes.get(language_pair)
+            if index is not None:
+                for segment_id, normalized in added:
+                    # المقاطع التي قرأها بناء الفهرس موجودة فيه
+                    if segment_id > index.covered_id:
+                        index.add(segment_id, normalized)
+            elif language_pair in self._pending:
+                # الفهرس قيد البناء: تُدمج عند اكتماله
+                self._pending[language_pair].extend(added)
+        return stored
+
+    def add_document(self, source_text: str, target_text: str, source_lang: str, target_lang: str,
+                     project_id: Optional[str] = None) -> int:
+        """حفظ وثيقة مترجمة مقطعاً بمقطع (انظر align_segments)"""
+        pairs = align_segments(source_text, target_text)
+        if not pairs:
+            return 0
+        return self.add_pairs(pairs, source_lang, target_lang, project_id)
+
+    # ---- البحث ----
+
+    def exact(self, source: str, source_lang: str, target_lang: str) -> Optional[TMMatch]:
+        """ترجمة محفوظة لنفس المقطع (بعد التوحيد) أو None"""
+        normalized = normalize(source or '')
+        if not normalized or _language_pair(source_lang, target_lang) is None:
+            return None
+        with self.pool.connection() as conn:
+            row = conn.execute(_SELECT_BY_HASH, (source_lang, target_lang, segment_hash(normalized))).fetchone()
+        # البصمة 64 بت؛ مقارنة النص تستبعد التصادم النادر
+        if row is None or normalize(row['source_text']) != normalized:
+            return None
+        return TMMatch(row['id'], row['source_text'], row['target_text'], 1.0)
+
+    def fuzzy(self, source: str, source_lang: str, target_lang: str,
+              threshold: float = TM_FUZZY_THRESHOLD, limit: int = TM_FUZZY_LIMIT) -> List[TMMatch]:
+        """أقرب المقاطع المحفوظة مرتبة حسب التشابه"""
+        language_pair = _language_pair(source_lang, target_lang)
+        normalized = normalize(source or '')
+        if language_pair is None or not normalized:
+            return []
+
+        index = self._index(language_pair)
+        candidates = index.candidates(ngrams(normalized, self.ngram_size))
+        if not candidates:
+            return []
+
+        placeholders = ', '.join('?' for _ in candidates)
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, source_text, target_text FROM tm_segments WHERE id IN ({placeholders})",
+                candidates
+            ).fetchall()
+
+        query = char_grams(normalized)
+        matches = []
+        for row in rows:
+            score = similarity(query, char_grams(normalize(row['source_text'])))
+            if score >= threshold:
+                matches.append(TMMatch(row['id'], row['source_text'], row['target_text'], score))
+        matches.sort(key=lambda match: match.score, reverse=True)
+        return matches[:limit]
+
+    def lookup(self, source: str, source_lang: str, target_lang: str,
+               threshold: float = TM_FUZZY_THRESHOLD, limit: int = TM_FUZZY_LIMIT) -> List[TMMatch]:
+        """التطابق التام إن وُجد، وإلا الاقتراحات التقريبية"""
+        match = self.exact(source, source_lang, target_lang)
+        if match is not None:
+            return [match]
+        return self.fuzzy(source, source_lang, target_lang, threshold, limit)
+
+    def pretranslate(self, text: str, source_lang: str, target_lang: str,
+                     threshold: float = TM_FUZZY_THRESHOLD) -> List[Tuple[str, Optional[TMMatch]]]:
+        """كل مقطع من النص مع أفضل اقتراح له (أو None)"""
+        result = []
+        for segment in split_segments(text):
+            matches = self.lookup(segment, source_lang, target_lang, threshold, limit=1)
+            result.append((segment, matches[0] if matches else None))
+        return result
+
+    # ---- الفهرس ----
+
+    def _index(self, language_pair: Tuple[str, str]) -> _NGramIndex:
+        """فهرس زوج اللغات (يُبنى من SQLite عند أول طلب)
+
+        البناء يتم خارج self._lock فلا يوقف الإضافة والبحث في أزواج اللغات
+        الأخرى؛ المقاطع المحفوظة أثناءه تُجمع في _pending وتُدمج قبل نشر الفهرس.
+        """
+        index = self._indexes.get(language_pair)
+        if index is not None:
+            return index
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(language_pair, threading.Lock())
+        with build_lock:
+            index = self._indexes.get(language_pair)
+            if index is not None:
+                return index
+
+            with self._lock:
+                self._pending[language_pair] = []
+            try:
+                index = _NGramIndex(self.ngram_size)
+                with self.pool.connection() as conn:
+                    # استعلام واحد = لقطة ثابتة من القاعدة (WAL)
+                    for segment_id, source in conn.execute(_SELECT_PAIR_SOURCES, language_pair):
+                        index.add(segment_id, normalize(source))
+                        index.covered_id = segment_id
+            except Exception:
+                with self._lock:
+                    del self._pending[language_pair]
+                raise
+
+            with self._lock:
+                for segment_id, normalized in self._pending.pop(language_pair):
+                    if segment_id > index.covered_id:
+                        index.add(segment_id, normalized)
+                self._indexes[language_pair] = index
+            return index
+
+    def preload(self, source_lang: str, target_lang: str) -> int:
+        """بناء فهرس زوج لغات مسبقاً (مثلاً في خيط خلفي عند بدء التطبيق)"""
+        language_pair = _language_pair(source_lang, target_lang)
+        return len(self._index(language_pair)) if language_pair else 0
+
+    def count(self, source_lang: str, target_lang: str) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute(_COUNT_PAIR, (source_lang, target_lang)).fetchone()[0]
+
+    def close(self):
+        self.pool.close_all()
+
+
+def _benchmark(segments: int = 1_000_000, queries: int = 200):
+    """قياس زمن البحث على ذاكرة كبيرة من بنود عقود مولّدة"""
+    import random
+    import tempfile
+
+    subjects = ["الطرف الأول", "الطرف الثاني", "المترجم", "العميل", "الشركة", "المستأجر", "المؤجر", "الكفيل"]
+    verbs = ["يلتزم", "يتعهد", "يحق", "لا يجوز", "يُلزم", "يقر"]
+    objects = ["بتسليم الوثائق", "بدفع الرسوم", "بتجديد الإقامة", "بتصديق الشهادة", "بإبلاغ الطرف الآخر",
+               "بحفظ سرية البيانات", "بترجمة المستندات", "بتقديم نسخة مصدقة"]
+    terms = ["خلال مدة لا تتجاوز", "قبل انقضاء", "في موعد أقصاه", "بعد مرور"]
+    units = ["يوم عمل", "شهر", "أسبوع", "سنة"]
+    rng = random.Random(7)
+
+    def clause(n: int) -> str:
+        return (f"{rng.choice(verbs)} {rng.choice(subjects)} {rng.choice(objects)} {rng.choice(terms)} "
+                f"{rng.randint(1, 90)} {rng.choice(units)} وفقاً للبند {n} من هذا العقد.")
+
+    with tempfile.TemporaryDirectory() as folder:
+        memory = TranslationMemory(Path(folder) / "tm.db")
+        start = time.perf_counter()
+        batch = []
+        sources = []
+        for n in range(segments):
+            source = clause(n)
+            batch.append((source, f"Clause {n} translation"))
+            if n % max(1, segments // queries) == 0:
+                sources.append(source)
+            if len(batch) == 50000:
+                memory.add_pairs(batch, 'ar', 'en')
+                batch = []
+        memory.add_pairs(batch, 'ar', 'en')
+        print(f"إضافة {segments} مقطع: {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        memory.preload('ar', 'en')
+        print(f"بناء الفهرس: {time.perf_counter() - start:.1f} s")
+
+        for label, make_query in (('تام', lambda s: s), ('تقريبي', lambda s: s.replace('العقد', 'الاتفاق'))):
+            timings = []
+            found = 0
+            for source in sources:
+                start = time.perf_counter()
+                matches = memory.lookup(make_query(source), 'ar', 'en')
+                timings.append((time.perf_counter() - start) * 1000)
+                found += bool(matches)
+            timings.sort()
+            print(f"بحث {label}: الوسيط {timings[len(timings) // 2]:.2f} ms، "
+                  f"p95 {timings[int(len(timings) * 0.95)]:.2f} ms، وُجد {found}/{len(sources)}")
+        memory.close()
+
+
+if __name__ == '__main__':
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
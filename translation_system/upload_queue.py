@@ -0,0 +1,385 @@
+"""
+نظام الترجمة المكتبي - طابور الرفع إلى Google Drive
+Translation Office System - Durable Google Drive Upload Outbox
+"""
+
+import io
+import json
+import mimetypes
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Tuple, Union, BinaryIO
+
+from config import (
+    UPLOAD_QUEUE_DB,
+    UPLOAD_WORKERS,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_MAX_ATTEMPTS,
+    UPLOAD_BACKOFF_BASE,
+    UPLOAD_BACKOFF_MAX
+)
+from storage import ConnectionPool
+from drive_client import is_not_found
+
+
+# حالات عنصر الرفع
+PENDING = 'pending'
+UPLOADING = 'uploading'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def resumable_upload(service, file_path: Union[str, bytes, memoryview, BinaryIO], metadata: Dict[str, Any],
+                     mime_type: Optional[str] = None, chunk_size: int = UPLOAD_CHUNK_SIZE,
+                     resumable_uri: Optional[str] = None,
+                     on_session: Optional[Callable[[str], None]] = None,
+                     on_progress: Optional[Callable[[int, int], None]] = None,
+                     fields: str = 'id, name, webViewLink') -> Dict[str, Any]:
+    """رفع ملف على دفعات عبر جلسة رفع قابلة للاستئناف
+
+    إذا مُرِّر resumable_uri من محاولة سابقة يُسأل الخادم عن التقدّم
+    ويُستكمل الرفع من آخر بايت مُستلم بدلاً من البدء من الصفر.
+    file_path يمكن أن يكون أيضاً محتوى في الذاكرة (bytes/memoryview أو BytesIO)
+    فيُرفع دون كتابته على القرص.
+    """
+    from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
+
+    if isinstance(file_path, (bytes, bytearray, memoryview)):
+        file_path = io.BytesIO(file_path)
+
+    if hasattr(file_path, 'read'):
+        media = MediaIoBaseUpload(file_path, mimetype=mime_type or 'application/octet-stream',
+                                  chunksize=chunk_size, resumable=True)
+    else:
+        if mime_type is None:
+            mime_type = mimetypes.guess_type(str(file_path))[0] or 'application/octet-stream'
+        media = MediaFileUpload(str(file_path), mimetype=mime_type, chunksize=chunk_size, resumable=True)
+    request = service.files().create(body=metadata, media_body=media, fields=fields)
+
+    if resumable_uri:
+        offset, response = _query_session(request.http, resumable_uri, media.size())
+        if response is not None:
+            # الرفع اكتمل قبل انقطاع المحاولة السابقة
+            return response
+        if offset is not None:
+            request.resumable_uri = resumable_uri
+            request.resumable_progress = offset
+
+    response = None
+    reported_uri = resumable_uri
+    while response is None:
+        status, response = request.next_chunk(num_retries=2)
+        if on_session and request.resumable_uri and request.resumable_uri != reported_uri:
+            reported_uri = request.resumable_uri
+            on_session(reported_uri)
+        if status and on_progress:
+            on_progress(status.resumable_progress, status.total_size)
+
+    return response
+
+
+def _query_session(http, resumable_uri: str, size: int) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+    """سؤال الخادم عن تقدم جلسة رفع سابقة (PUT فارغ مع Content-Range: bytes */size)
+
+    يُرجع (عدد البايتات المستلمة، None)، أو (None، الاستجابة) إذا اكتمل الرفع،
+    أو (None، None) إذا انتهت صلاحية الجلسة فيبدأ رفع جديد.
+    """
+    resp, content = http.request(resumable_uri, method='PUT', body=b'',
+                                 headers={'Content-Range': f'bytes */{size}', 'Content-Length': '0'})
+    status = int(resp.status)
+    if status == 308:
+        # Range: bytes=0-N تعني استلام N+1 بايت؛ غيابه يعني لا شيء بعد
+        received = resp.get('range')
+        return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+    if status in (200, 201):
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        return None, json.loads(content or '{}')
+    if status in (404, 410):
+        return None, None
+    from googleapiclient.errors import HttpError
+    raise HttpError(resp, content, uri=resumable_uri)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    id TEXT PRIMARY KEY,
+    queue TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    folder TEXT,
+    mime_type TEXT,
+    meta TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    resumable_uri TEXT,
+    drive_file_id TEXT,
+    web_link TEXT,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_uploads_due
+    ON uploads (queue, status, next_attempt_at);
+"""
+
+
+class UploadQueue:
+    """طابور رفع دائم (outbox) مع مجموعة عمّال وإعادة محاولة بتراجع أُسّي
+
+    الملفات تُسجَّل أولاً في قاعدة SQLite محلية ثم تُرفع في الخلفية، فلا
+    ينتظر طلب HTTP استجابة Drive. عند اكتمال الرفع تُستدعى معالجات
+    الإكمال المسجّلة (مثلاً لتعبئة google_drive_id للمشروع).
+
+    service_factory: دالة تُرجع مدير سياق يعير خدمة Drive (أو None إذا لم
+    تتوفر) ثم يعيدها إلى مجمّعها، ويمكن توجيهها إلى خادم Drive وهمي محلي للاختبار.
+    folder_resolver: دالة تحوّل اسم المجلد المنطقي إلى معرف مجلد Drive، وتقبل
+    refresh=True لتنسى المعرف المخزن وتبحث عن المجلد من جديد.
+    """
+
+    def __init__(self, name: str, service_factory: Callable[[], Any],
+                 folder_resolver: Optional[Callable[[str], Optional[str]]] = None,
+                 db_path: Path = UPLOAD_QUEUE_DB, workers: int = UPLOAD_WORKERS,
+                 max_attempts: int = UPLOAD_MAX_ATTEMPTS):
+        self.name = name
+        self.service_factory = service_factory
+        self.folder_resolver = folder_resolver
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._handlers: List[Callable[[Dict[str, Any]], None]] = []
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Condition()
+        self._start_lock = threading.Lock()
+        # اتصالات مُعاد استخدامها بدلاً من فتح اتصال جديد لكل عملية
+        self.pool = ConnectionPool(self.db_path, size=workers + 2)
+
+        with self.pool.connection() as conn, conn:
+            conn.executescript(_SCHEMA)
+            # العناصر التي كانت قيد الرفع عند توقف العملية تعود إلى الطابور
+            conn.execute(
+                "UPDATE uploads SET status = ? WHERE queue = ? AND status = ?",
+                (PENDING, self.name, UPLOADING)
+            )
+
+    @staticmethod
+    def _to_item(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        item['meta'] = json.loads(item['meta'])
+        return item
+
+    # ---- الواجهة العامة ----
+
+    def on_complete(self, handler: Callable[[Dict[str, Any]], None]):
+        """تسجيل معالج يُستدعى بعد نجاح كل رفع"""
+        self._handlers.append(handler)
+        return handler
+
+    def enqueue(self, file_path: str, file_name: Optional[str] = None,
+                folder: Optional[str] = None, mime_type: Optional[str] = None,
+                meta: Optional[Dict[str, Any]] = None) -> str:
+        """إضافة ملف إلى طابور الرفع وإرجاع معرف العنصر"""
+        item_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        with self.pool.connection() as conn, conn:
+            conn.execute(
+                "INSERT INTO uploads (id, queue, file_path, file_name, folder, mime_type, meta, "
+                "status, attempts, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?, ?)",
+                (item_id, self.name, str(file_path), file_name or Path(file_path).name, folder,
+                 mime_type, json.dumps(meta or {}, ensure_ascii=False), PENDING, time.time(), now, now)
+            )
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return item_id
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """حالة عنصر في الطابور"""
+        with self.pool.connection() as conn, conn:
+            row = conn.execute("SELECT * FROM uploads WHERE id = ?", (item_id,)).fetchone()
+        return self._to_item(row) if row else None
+
+    def pending_count(self) -> int:
+        """عدد العناصر التي لم تُرفع بعد"""
+        with self.pool.connection() as conn, conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM uploads WHERE queue = ? AND status IN (?, ?)",
+                (self.name, PENDING, UPLOADING)
+            ).fetchone()[0]
+
+    def retry_failed(self) -> int:
+        """إعادة العناصر الفاشلة نهائياً إلى الطابور"""
+        with self.pool.connection() as conn, conn:
+            cursor = conn.execute(
+                "UPDATE uploads SET status = ?, attempts = 0, next_attempt_at = ? "
+                "WHERE queue = ? AND status = ?",
+                (PENDING, time.time(), self.name, FAILED)
+            )
+        with self._wakeup:
+            self._wakeup.notify_all()
+        return cursor.rowcount
+
+    def start(self):
+        """تشغيل العمّال (آمن للاستدعاء أكثر من مرة)
+
+        يُستدعى عند بدء العملية بعد تسجيل معالجات الإكمال، حتى تُرفع العناصر
+        المتبقية من تشغيل سابق دون انتظار عنصر جديد.
+        """
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, name=f"upload-{self.name}-{index}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """إيقاف العمّال"""
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.pool.close_all()
+
+    def process_once(self) -> bool:
+        """معالجة عنصر واحد مستحق إن وُجد (مفيد للاختبار دون خيوط)"""
+        item = self._claim_next()
+        if item is None:
+            return False
+        self._process(item)
+        return True
+
+    # ---- العمّال ----
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """حجز العنصر المستحق التالي بشكل ذري"""
+        with self.pool.connection() as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM uploads WHERE queue = ? AND status = ? AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at LIMIT 1",
+                (self.name, PENDING, time.time())
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE uploads SET status = ?, updated_at = ? WHERE id = ?",
+                (UPLOADING, datetime.now().isoformat(), row['id'])
+            )
+        return self._to_item(row)
+
+    def _next_due_in(self) -> float:
+        with self.pool.connection() as conn, conn:
+            row = conn.execute(
+                "SELECT MIN(next_attempt_at) FROM uploads WHERE queue = ? AND status = ?",
+                (self.name, PENDING)
+            ).fetchone()
+        if row[0] is None:
+            return 30.0
+        return max(0.0, min(30.0, row[0] - time.time()))
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            try:
+                if self.process_once():
+                    continue
+                delay = self._next_due_in()
+            except sqlite3.Error as e:
+                print(f"خطأ في طابور الرفع: {e}")
+                delay = 5.0
+            with self._wakeup:
+                self._wakeup.wait(delay)
+
+    def _set(self, item_id: str, **changes):
+        changes['updated_at'] = datetime.now().isoformat()
+        assignments = ", ".join(f"{column} = ?" for column in changes)
+        with self.pool.connection() as conn, conn:
+            conn.execute(f"UPDATE uploads SET {assignments} WHERE id = ?", (*changes.values(), item_id))
+
+    def _backoff(self, attempts: int) -> float:
+        """تراجع أُسّي مع تشويش عشوائي"""
+        delay = min(UPLOAD_BACKOFF_MAX, UPLOAD_BACKOFF_BASE * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _resolve_folder(self, folder: Optional[str], refresh: bool = False) -> Optional[str]:
+        """معرف مجلد Drive لاسم المجلد المنطقي (None للجذر)"""
+        if not folder:
+            return None
+        if not self.folder_resolver:
+            return folder
+        folder_id = self.folder_resolver(folder, refresh=True) if refresh else self.folder_resolver(folder)
+        if not folder_id:
+            raise ConnectionError(f"تعذر تحديد مجلد Drive: {folder}")
+        return folder_id
+
+    def _upload(self, item: Dict[str, Any], folder_id: Optional[str],
+                resumable_uri: Optional[str]) -> Dict[str, Any]:
+        metadata = {'name': item['file_name']}
+        if folder_id:
+            metadata['parents'] = [folder_id]
+        with self.service_factory() as service:
+            if service is None:
+                raise ConnectionError("خدمة Google Drive غير متاحة")
+            return resumable_upload(
+                service, item['file_path'], metadata,
+                mime_type=item['mime_type'],
+                resumable_uri=resumable_uri,
+                on_session=lambda uri: self._set(item['id'], resumable_uri=uri)
+            )
+
+    def _process(self, item: Dict[str, Any]):
+        try:
+            if not Path(item['file_path']).exists():
+                raise FileNotFoundError(f"الملف غير موجود: {item['file_path']}")
+
+            try:
+                result = self._upload(item, self._resolve_folder(item['folder']), item['resumable_uri'])
+            except Exception as e:
+                if not (is_not_found(e) and item['folder'] and self.folder_resolver):
+                    raise
+                # المعرف المخزن لمجلد حُذف من Drive: يُنسى ويُحدَّد المجلد من جديد مرة واحدة
+                result = self._upload(item, self._resolve_folder(item['folder'], refresh=True), None)
+        except Exception as e:
+            attempts = item['attempts'] + 1
+            permanent = isinstance(e, FileNotFoundError) or attempts >= self.max_attempts
+            self._set(
+                item['id'],
+                status=FAILED if permanent else PENDING,
+                attempts=attempts,
+                next_attempt_at=time.time() + self._backoff(attempts),
+                last_error=str(e)
+            )
+            print(f"فشل رفع {item['file_name']} (المحاولة {attempts}): {e}")
+            return
+
+        self._set(
+            item['id'],
+            status=DONE,
+            drive_file_id=result.get('id'),
+            web_link=result.get('webViewLink'),
+            resumable_uri=None,
+            last_error=None
+        )
+        item = self.get(item['id'])
+        print(f"تم رفع الملف إلى Google Drive: {item['file_name']} ({item['web_link']})")
+
+        for handler in self._handlers:
+            try:
+                handler(item)
+            except Exception as e:
+                print(f"خطأ في معالج إكمال الرفع: {e}")
@@ -7,7 +7,7 @@ import os
 import json
 from pathlib import Path
 from typing import Optional, Dict, Any
-from flask import Flask, render_template, request, jsonify, send_file, abort
+from flask import Flask, render_template, request, jsonify, send_file, abort, Response, stream_with_context
 from datetime import datetime
 import uuid
 
@@ -92,10 +92,14 @@ class VerificationServer:
             if not project:
                 abort(404, description="المشروع غير موجود")
             
-            if not project.final_pdf_path or not Path(project.final_pdf_path).exists():
-                abort(404, description="الوثيقة غير موجودة")
+            if project.final_pdf_path and Path(project.final_pdf_path).exists():
+                return send_file(project.final_pdf_path, mimetype='application/pdf')
             
-            return send_file(project.final_pdf_path, mimetype='application/pdf')
+            # الوثيقة غير موجودة محلياً: تدفق من Google Drive دون انتظار الملف كاملاً
+            if project.google_drive_id:
+                return self.stream_drive_document(project.google_drive_id)
+            
+            abort(404, description="الوثيقة غير موجودة")
         
         @self.app.route('/download/<project_id>')
         def download_document(project_id):
@@ -179,8 +183,39 @@ class VerificationServer:
             """معالج الأخطاء 500"""
             return render_template('500.html'), 500
     
+    def stream_drive_document(self, file_id: str):
+        """إرسال ملف Google Drive بالتدفق (أو من الذاكرة المحلية إن كان مكتملاً)"""
+        try:
+            if not self.google_drive_service:
+                self.google_drive_service = GoogleDriveService()
+        except Exception as e:
+            print(f"خطأ في الاتصال بـ Google Drive: {e}")
+            abort(503, description="خدمة Google Drive غير متاحة")
+        
+        info = self.google_drive_service.get_download_info(file_id)
+        if not info:
+            abort(404, description="الوثيقة غير موجودة")
+        
+        # النسخة المكتملة تُرسل كملف عادي فتدعم طلبات Range من المتصفح
+        cached_path = self.google_drive_service.cached_file_path(info)
+        if cached_path:
+            return send_file(cached_path, mimetype=info.get('mimeType', 'application/pdf'), conditional=True)
+        
+        headers = {}
+        if info.get('size'):
+            headers['Content-Length'] = info['size']
+        return Response(
+            stream_with_context(self.google_drive_service.stream_file(file_id, info=info)),
+            mimetype=info.get('mimeType', 'application/pdf'),
+            headers=headers
+        )
+    
     def load_sample_data(self):
         """تحميل بيانات تجريبية"""
+        # البيانات محفوظة في قاعدة البيانات من تشغيل سابق
+        if self.translation_manager.get_all_translators():
+            return
+        
         # إضافة مترجم تجريبي
         translator = self.translation_manager.add_translator(
             name="أحمد محمد",
@@ -207,6 +242,7 @@ class VerificationServer:
         project.final_pdf_path = "sample_document.pdf"
         project.google_drive_id = "sample_drive_id"
         project.verification_url = f"{QR_CODE_BASE_URL}{project.id}"
+        self.translation_manager.save_project(project)
     
     def start(self, host: str = None, port: int = None, debug: bool = None):
         """تشغيل الخادم"""
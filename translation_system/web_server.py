@@ -13,11 +13,12 @@ from PIL import Image
 import io
 import base64
 import requests
-from google.oauth2 import service_account
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 import pickle
+from contextlib import contextmanager
+
+from drive_client import drive_clients, drive_folders, find_or_create_folder as drive_find_or_create_folder
 
 app = Flask(__name__)
 
@@ -55,39 +56,26 @@ sample_projects = [
     }
 ]
 
-def get_google_drive_service():
-    """إنشاء خدمة Google Drive مع Service Account"""
+@contextmanager
+def google_drive_service():
+    """خدمة Google Drive مع Service Account، مستعارة من مجمّع العميل المشترك (None إذا لم تتوفر)"""
+    client = service = None
     try:
-        if not os.path.exists(SERVICE_ACCOUNT_FILE):
-            print(f"ملف Service Account غير موجود: {SERVICE_ACCOUNT_FILE}")
-            return None
-        
-        credentials = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-        service = build('drive', 'v3', credentials=credentials)
-        return service
+        client = drive_clients.service_account(SERVICE_ACCOUNT_FILE, SCOPES)
+        if client is not None:
+            service = client.acquire()
     except Exception as e:
         print(f"خطأ في إنشاء خدمة Google Drive: {e}")
-        return None
+    try:
+        yield service
+    finally:
+        if service is not None:
+            client.release(service)
 
 def find_or_create_folder(service, folder_name):
-    """البحث عن مجلد أو إنشاؤه إذا لم يكن موجوداً"""
+    """البحث عن مجلد أو إنشاؤه إذا لم يكن موجوداً (مع ذاكرة دائمة للمعرفات)"""
     try:
-        # البحث عن المجلد
-        query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        results = service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
-        files = results.get('files', [])
-        
-        if files:
-            return files[0]['id']
-        else:
-            # إنشاء المجلد الجديد
-            folder_metadata = {
-                'name': folder_name,
-                'mimeType': 'application/vnd.google-apps.folder'
-            }
-            folder = service.files().create(body=folder_metadata, fields='id').execute()
-            return folder.get('id')
+        return drive_find_or_create_folder(service, folder_name, account=SERVICE_ACCOUNT_FILE)
     except Exception as e:
         print(f"خطأ في البحث/إنشاء المجلد {folder_name}: {e}")
         return None
@@ -96,18 +84,24 @@ def initialize_google_drive_folders():
     """تهيئة مجلدات Google Drive"""
     global uploads_folder_id, translations_folder_id
     
-    service = get_google_drive_service()
-    if not service:
-        return False
+    # المعرفات المحفوظة من تشغيل سابق تغني عن البحث في Drive
+    uploads_folder_id = drive_folders.get(SERVICE_ACCOUNT_FILE, TEVASUL_UPLOADS_FOLDER)
+    translations_folder_id = drive_folders.get(SERVICE_ACCOUNT_FILE, TEVASUL_TRANSLATIONS_FOLDER)
+    if uploads_folder_id and translations_folder_id:
+        return True
     
-    try:
-        uploads_folder_id = find_or_create_folder(service, TEVASUL_UPLOADS_FOLDER)
-        translations_folder_id = find_or_create_folder(service, TEVASUL_TRANSLATIONS_FOLDER)
+    with google_drive_service() as service:
+        if not service:
+            return False
         
-        return uploads_folder_id and translations_folder_id
-    except Exception as e:
-        print(f"خطأ في تهيئة مجلدات Google Drive: {e}")
-        return False
+        try:
+            uploads_folder_id = find_or_create_folder(service, TEVASUL_UPLOADS_FOLDER)
+            translations_folder_id = find_or_create_folder(service, TEVASUL_TRANSLATIONS_FOLDER)
+            
+            return uploads_folder_id and translations_folder_id
+        except Exception as e:
+            print(f"خطأ في تهيئة مجلدات Google Drive: {e}")
+            return False
 
 @app.route('/')
 def index():